@@ -3,7 +3,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.dependencies import get_db, get_duckdb, get_neo4j, get_scheduler
+from app.dependencies import get_db, get_duckdb, get_neo4j, get_notifier, get_scheduler
 from app.models.alarm import Alarm, AlarmEvent
 from app.schemas.alarm import (
     AlarmCreate,
@@ -14,6 +14,7 @@ from app.schemas.alarm import (
 from app.services.alarm_service import AlarmService
 from app.services.duckdb_service import DuckDBService
 from app.services.neo4j_service import Neo4jService
+from app.services.notification_service import SlackDispatcher
 from app.services.scheduler_service import SchedulerService
 
 router = APIRouter(prefix="/alarms", tags=["alarms"])
@@ -120,9 +121,10 @@ async def test_alarm(
     db: AsyncSession = Depends(get_db),
     duckdb: DuckDBService = Depends(get_duckdb),
     neo4j: Neo4jService = Depends(get_neo4j),
+    notifier: SlackDispatcher = Depends(get_notifier),
 ):
     alarm = await db.get(Alarm, alarm_id)
     if not alarm:
         raise HTTPException(status_code=404, detail="Alarm not found")
-    service = AlarmService(db, duckdb, neo4j)
+    service = AlarmService(db, duckdb, neo4j, notifier)
     return await service.test_alarm(alarm)
@@ -1,19 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from collections.abc import Awaitable, Callable
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db, get_duckdb
-from app.schemas.dataset import DatasetPreview, DatasetResponse
+from app.config import settings
+from app.dependencies import (
+    get_db,
+    get_duckdb,
+    get_ingestor,
+    get_schema_cache,
+    get_upload_sessions,
+)
+from app.schemas.dataset import (
+    DatasetPreview,
+    DatasetResponse,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+from app.services.dataset_ingest import DatasetIngestor
 from app.services.dataset_service import DatasetService
 from app.services.duckdb_service import DuckDBService
+from app.services.result_format import columnar_response, negotiate
+from app.services.schema_context import SchemaContextCache
+from app.services.upload_service import UploadOffsetMismatch, UploadSessions, UploadTooLarge
+
+# Room for multipart boundaries and part headers around an upload of the maximum size
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitedRoute(APIRoute):
+    """Rejects request bodies over the upload limit before they are parsed.
+
+    FastAPI parses a multipart form, spooling its file, before the endpoint runs,
+    so the limit is enforced on the raw body: from Content-Length up front, and
+    while the body is received for requests that don't declare a length.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            limit = settings.max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+            too_large = HTTPException(
+                status_code=413, detail=f"Upload exceeds {settings.max_upload_bytes} bytes"
+            )
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > limit:
+                raise too_large
+            received = 0
+
+            async def receive():
+                nonlocal received
+                message = await request.receive()
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise too_large
+                return message
+
+            return await handler(Request(request.scope, receive))
+
+        return limited_handler
 
-router = APIRouter(prefix="/datasets", tags=["datasets"])
+
+router = APIRouter(prefix="/datasets", tags=["datasets"], route_class=UploadSizeLimitedRoute)
 
 
 def _get_service(
     db: AsyncSession = Depends(get_db),
     duckdb: DuckDBService = Depends(get_duckdb),
+    schema_cache: SchemaContextCache = Depends(get_schema_cache),
+    ingestor: DatasetIngestor = Depends(get_ingestor),
 ) -> DatasetService:
-    return DatasetService(db, duckdb)
+    return DatasetService(db, duckdb, schema_cache, ingestor)
+
+
+def _upload_error(e: ValueError) -> HTTPException:
+    if isinstance(e, UploadTooLarge):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, UploadOffsetMismatch):
+        return HTTPException(
+            status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)}
+        )
+    return HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/upload", response_model=DatasetResponse)
@@ -25,11 +94,75 @@ async def upload_dataset(
         dataset = await service.upload(file)
         return dataset
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _upload_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
 
 
+@router.post("/uploads", response_model=UploadSessionResponse)
+async def create_upload(
+    body: UploadSessionCreate,
+    sessions: UploadSessions = Depends(get_upload_sessions),
+):
+    try:
+        return sessions.create(body.filename, body.size)
+    except ValueError as e:
+        raise _upload_error(e)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(
+    upload_id: str,
+    sessions: UploadSessions = Depends(get_upload_sessions),
+):
+    try:
+        return sessions.status(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def append_upload(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    sessions: UploadSessions = Depends(get_upload_sessions),
+):
+    """Append the raw request body at ``offset``; on 409 resume from the returned offset."""
+    try:
+        return await sessions.append(upload_id, offset, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except ValueError as e:
+        raise _upload_error(e)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=DatasetResponse)
+async def complete_upload(
+    upload_id: str,
+    service: DatasetService = Depends(_get_service),
+    sessions: UploadSessions = Depends(get_upload_sessions),
+):
+    try:
+        return await service.create_from_upload(upload_id, sessions)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except ValueError as e:
+        raise _upload_error(e)
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    sessions: UploadSessions = Depends(get_upload_sessions),
+):
+    try:
+        sessions.abort(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"detail": "Upload aborted"}
+
+
 @router.get("/", response_model=list[DatasetResponse])
 async def list_datasets(service: DatasetService = Depends(_get_service)):
     return await service.list_all()
@@ -51,11 +184,18 @@ async def preview_dataset(
     dataset_id: str,
     limit: int = 50,
     service: DatasetService = Depends(_get_service),
+    accept: str | None = Header(default=None),
 ):
     dataset = await service.get(dataset_id)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
-    columns, rows, total = service.preview(dataset.duckdb_table, limit)
+    if dataset.status != "ready":
+        raise HTTPException(status_code=409, detail=f"Dataset is {dataset.status}")
+    media_type = negotiate(accept)
+    if media_type:
+        table, total = await service.preview_arrow(dataset.duckdb_table, limit)
+        return columnar_response(table, media_type, total_rows=total)
+    columns, rows, total = await service.preview(dataset.duckdb_table, limit)
     return DatasetPreview(columns=columns, rows=rows, total_rows=total)
 
 
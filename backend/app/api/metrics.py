@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_duckdb, get_neo4j
+from app.config import settings
+from app.dependencies import get_db, get_duckdb, get_neo4j
 from app.schemas.metric import (
+    MetricBackfillRequest,
+    MetricBackfillResponse,
     MetricComputeResponse,
     MetricCreate,
     MetricResponse,
     MetricUpdate,
 )
+from app.services.backfill_service import SnapshotBackfillService, period_range
 from app.services.duckdb_service import DuckDBService
 from app.services.neo4j_service import Neo4jService
 
@@ -102,7 +107,7 @@ async def compute_metric(
         )
 
     try:
-        _, rows, _ = duckdb.execute_query(sql)
+        _, rows, _ = await duckdb.execute_query_async(sql)
         value = float(list(rows[0].values())[0]) if rows else None
         return MetricComputeResponse(
             metric_id=metric_id,
@@ -118,3 +123,29 @@ async def compute_metric(
             unit=metric.get("unit", ""),
             error=str(e),
         )
+
+
+@router.post("/{metric_id}/backfill", response_model=MetricBackfillResponse)
+async def backfill_metric(
+    metric_id: str,
+    body: MetricBackfillRequest,
+    db: AsyncSession = Depends(get_db),
+    neo4j: Neo4jService = Depends(get_neo4j),
+    duckdb: DuckDBService = Depends(get_duckdb),
+):
+    if len(period_range(body.start_period, body.end_period)) > settings.backfill_max_periods:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Backfill range exceeds {settings.backfill_max_periods} periods",
+        )
+    service = SnapshotBackfillService(db, duckdb, neo4j)
+    summary = await service.backfill(
+        metric_id,
+        body.start_period,
+        body.end_period,
+        include_children=body.include_children,
+        overwrite=body.overwrite,
+    )
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Metric not found")
+    return summary
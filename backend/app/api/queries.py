@@ -1,26 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+import base64
+import json
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+import pyarrow as pa
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer
 
-from app.dependencies import get_db, get_duckdb, get_llm
+from app.config import settings
+from app.dependencies import get_db, get_duckdb, get_llm, get_result_store, get_schema_cache
 from app.models.conversation import Conversation, Message
+from app.models.database import async_session_factory
 from app.models.dataset import Dataset
 from app.schemas.query import (
     ConversationCreate,
     ConversationDetail,
     ConversationResponse,
+    MessagePage,
     MessageResponse,
+    MessageSummary,
     QueryRequest,
     SqlExecuteRequest,
     SqlExecuteResponse,
+    SqlStreamRequest,
 )
+from app.services.answer_cache import AnswerCache
+from app.services.chat_history import Turn, compact_history, history_budget
 from app.services.duckdb_service import DuckDBService
+from app.services.llm_gateway import LLMUnavailable
 from app.services.llm_service import LLMService
+from app.services.result_store import ResultStore
+from app.services.result_format import (
+    ARROW_STREAM_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    columnar_response,
+    iter_arrow_ipc,
+    iter_ndjson,
+    negotiate,
+)
+from app.services.schema_context import SchemaContextCache
 from app.services.text_to_sql import TextToSQLService
 
 router = APIRouter(prefix="/queries", tags=["queries"])
 
+SSE_MEDIA_TYPE = "text/event-stream"
+
 
 @router.post("/conversations", response_model=ConversationResponse)
 async def create_conversation(
@@ -42,29 +70,171 @@ async def list_conversations(db: AsyncSession = Depends(get_db)):
     return result.scalars().all()
 
 
+def _message_cursor(msg: Message) -> str:
+    raw = f"{msg.created_at.isoformat()}|{msg.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _parse_message_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, _, msg_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(created_at), msg_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid message cursor")
+
+
+async def _message_page(
+    db: AsyncSession,
+    conv_id: str,
+    before: str | None,
+    limit: int | None,
+    include_results: bool,
+) -> MessagePage:
+    """The ``limit`` messages preceding ``before`` (newest when omitted), oldest first.
+
+    Keyset pagination on ``(created_at, id)`` so each page is an index range scan;
+    ``result_data`` is not read from SQLite unless ``include_results`` is set.
+    """
+    limit = min(limit or settings.message_page_size, settings.max_message_page_size)
+    stmt = select(Message).where(Message.conversation_id == conv_id)
+    if not include_results:
+        stmt = stmt.options(defer(Message.result_data, raiseload=True))
+    if before:
+        created_at, msg_id = _parse_message_cursor(before)
+        stmt = stmt.where(
+            or_(
+                Message.created_at < created_at,
+                and_(Message.created_at == created_at, Message.id < msg_id),
+            )
+        )
+    stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+    rows = list((await db.execute(stmt)).scalars().all())
+
+    next_cursor = _message_cursor(rows[limit - 1]) if len(rows) > limit else None
+    model = MessageResponse if include_results else MessageSummary
+    messages = [model.model_validate(msg) for msg in reversed(rows[:limit])]
+    return MessagePage(messages=messages, next_cursor=next_cursor)
+
+
 @router.get("/conversations/{conv_id}", response_model=ConversationDetail)
-async def get_conversation(conv_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Conversation)
-        .where(Conversation.id == conv_id)
-        .options(selectinload(Conversation.messages))
-    )
-    conv = result.scalar_one_or_none()
+async def get_conversation(
+    conv_id: str,
+    limit: int | None = Query(default=None, gt=0),
+    include_results: bool = True,
+    db: AsyncSession = Depends(get_db),
+):
+    """The conversation with its most recent page of messages; older ones via ``/messages``."""
+    conv = await db.get(Conversation, conv_id)
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return conv
+    page = await _message_page(db, conv_id, None, limit, include_results)
+    return ConversationDetail(
+        id=conv.id,
+        title=conv.title,
+        dataset_ids=conv.dataset_ids,
+        messages=page.messages,
+        next_cursor=page.next_cursor,
+        created_at=conv.created_at,
+        updated_at=conv.updated_at,
+    )
+
+
+@router.get("/conversations/{conv_id}/messages", response_model=MessagePage)
+async def list_messages(
+    conv_id: str,
+    before: str | None = None,
+    limit: int | None = Query(default=None, gt=0),
+    include_results: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    if not await db.get(Conversation, conv_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return await _message_page(db, conv_id, before, limit, include_results)
+
+
+async def _recent_history(db: AsyncSession, conv_id: str) -> list[dict[str, str]]:
+    """LLM history within the provider's token budget, reading only the text columns.
+
+    The last ``chat_history_turns`` exchanges are candidates for verbatim replay;
+    up to ``chat_history_summary_queries`` older statements feed the SQL summary.
+    """
+    result = await db.execute(
+        select(Message.role, Message.content, Message.generated_sql, Message.created_at, Message.id)
+        .where(Message.conversation_id == conv_id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(settings.chat_history_turns * 2)
+    )
+    rows = result.all()
+    earlier_sql: list[str] = []
+    if len(rows) == settings.chat_history_turns * 2:
+        oldest = rows[-1]
+        earlier = await db.execute(
+            select(Message.generated_sql)
+            .where(
+                Message.conversation_id == conv_id,
+                or_(
+                    Message.created_at < oldest.created_at,
+                    and_(Message.created_at == oldest.created_at, Message.id < oldest.id),
+                ),
+                Message.generated_sql.is_not(None),
+            )
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(settings.chat_history_summary_queries)
+        )
+        earlier_sql = list(earlier.scalars())
+    turns = [
+        Turn(role, content, generated_sql)
+        for role, content, generated_sql, _, _ in reversed(rows)
+        if role in ("user", "assistant")
+    ]
+    return compact_history(turns, earlier_sql, history_budget()).messages
 
 
 @router.delete("/conversations/{conv_id}")
-async def delete_conversation(conv_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_conversation(
+    conv_id: str,
+    db: AsyncSession = Depends(get_db),
+    result_store: ResultStore = Depends(get_result_store),
+):
     conv = await db.get(Conversation, conv_id)
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    result = await db.execute(select(Message.id).where(Message.conversation_id == conv_id))
+    message_ids = list(result.scalars().all())
     await db.delete(conv)
     await db.commit()
+    result_store.delete(message_ids)
     return {"detail": "Conversation deleted"}
 
 
+@router.get("/messages/{message_id}/result")
+async def stream_message_result(
+    message_id: str,
+    db: AsyncSession = Depends(get_db),
+    result_store: ResultStore = Depends(get_result_store),
+    accept: str | None = Header(default=None),
+):
+    """Stream a message's full query result as NDJSON or (on request) Arrow IPC."""
+    result = await db.execute(select(Message.result_data).where(Message.id == message_id))
+    result_data = result.scalar_one_or_none()
+    if not result_data:
+        raise HTTPException(status_code=404, detail="Message has no result")
+    try:
+        schema = result_store.schema(message_id, result_data)
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Stored result is no longer available")
+
+    chunks = result_store.iter_batches(message_id, result_data, settings.stream_batch_size)
+    headers = {"X-Total-Rows": str(result_data.get("row_count", 0))}
+    if negotiate(accept) == ARROW_STREAM_MEDIA_TYPE:
+        return StreamingResponse(
+            iter_arrow_ipc(schema, chunks), media_type=ARROW_STREAM_MEDIA_TYPE, headers=headers
+        )
+    return StreamingResponse(
+        iter_ndjson(schema, chunks), media_type=NDJSON_MEDIA_TYPE, headers=headers
+    )
+
+
 @router.post("/conversations/{conv_id}/messages", response_model=MessageResponse)
 async def send_message(
     conv_id: str,
@@ -72,14 +242,18 @@ async def send_message(
     db: AsyncSession = Depends(get_db),
     duckdb: DuckDBService = Depends(get_duckdb),
     llm: LLMService = Depends(get_llm),
+    schema_cache: SchemaContextCache = Depends(get_schema_cache),
+    result_store: ResultStore = Depends(get_result_store),
+    accept: str | None = Header(default=None),
 ):
+    """Answer a question; send ``Accept: text/event-stream`` to receive it as SSE.
+
+    The stream emits ``token`` events as the LLM writes, a ``sql`` event before
+    each query runs (``retry`` if it fails) and finally a ``result`` event with
+    the saved assistant message, or an ``error`` event.
+    """
     # Load conversation
-    result = await db.execute(
-        select(Conversation)
-        .where(Conversation.id == conv_id)
-        .options(selectinload(Conversation.messages))
-    )
-    conv = result.scalar_one_or_none()
+    conv = await db.get(Conversation, conv_id)
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
@@ -88,57 +262,179 @@ async def send_message(
     if body.dataset_ids and body.dataset_ids != conv.dataset_ids:
         conv.dataset_ids = body.dataset_ids
 
-    tables = []
+    datasets = []
     for did in dataset_ids:
         ds = await db.get(Dataset, did)
+        if ds and ds.status != "ready":
+            raise HTTPException(
+                status_code=409, detail=f"Dataset {ds.filename} is {ds.status}"
+            )
         if ds:
-            tables.append(ds.duckdb_table)
+            datasets.append(ds)
 
-    if not tables:
+    if not datasets:
         raise HTTPException(status_code=400, detail="No datasets selected")
 
+    # Build conversation history for LLM (before the new message is flushed)
+    history = await _recent_history(db, conv_id)
+
     # Save user message
     user_msg = Message(conversation_id=conv_id, role="user", content=body.content)
     db.add(user_msg)
 
-    # Build conversation history for LLM
-    history = []
-    for msg in conv.messages:
-        if msg.role == "user":
-            history.append({"role": "user", "content": msg.content})
-        elif msg.role == "assistant":
-            content = msg.content
-            if msg.generated_sql:
-                content += f"\n```sql\n{msg.generated_sql}\n```"
-            history.append({"role": "assistant", "content": content})
-
     # Run text-to-SQL pipeline
-    t2s = TextToSQLService(llm, duckdb)
-    result = await t2s.generate_and_execute(body.content, tables, history)
+    t2s = TextToSQLService(llm, duckdb, schema_cache, AnswerCache())
+    if accept and SSE_MEDIA_TYPE in accept:
+        await db.commit()  # persist the user message before the stream starts
+        return StreamingResponse(
+            _stream_answer(t2s, conv_id, body.content, datasets, history, result_store),
+            media_type=SSE_MEDIA_TYPE,
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    try:
+        result = await t2s.generate_and_execute(body.content, datasets, history)
+    except LLMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
     # Save assistant message
-    assistant_msg = Message(
+    assistant_msg = await _assistant_message(conv_id, result, result_store)
+    db.add(assistant_msg)
+    await db.commit()
+    await db.refresh(assistant_msg)
+    return assistant_msg
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _assistant_message(conv_id: str, result: dict, result_store: ResultStore) -> Message:
+    message_id = str(uuid.uuid4())
+    return Message(
+        id=message_id,
         conversation_id=conv_id,
         role="assistant",
         content=result["content"],
         generated_sql=result["generated_sql"],
-        result_data=result["result_data"],
+        result_data=await result_store.save(message_id, result["result_data"]),
         chart_config=result["chart_config"],
         error=result["error"],
+        usage=result.get("usage"),
+    )
+
+
+async def _stream_answer(
+    t2s: TextToSQLService,
+    conv_id: str,
+    question: str,
+    datasets: list[Dataset],
+    history: list[dict[str, str]],
+    result_store: ResultStore,
+) -> AsyncIterator[str]:
+    try:
+        async for event, data in t2s.iter_events(question, datasets, history, stream=True):
+            if event != "result":
+                yield _sse(event, data)
+                continue
+            # The request's session is closed once streaming starts
+            async with async_session_factory() as db:
+                assistant_msg = await _assistant_message(conv_id, data, result_store)
+                db.add(assistant_msg)
+                await db.commit()
+                await db.refresh(assistant_msg)
+            message = MessageResponse.model_validate(assistant_msg)
+            yield _sse("result", message.model_dump(mode="json"))
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+
+
+def _page_response(page: pa.Table, next_page_token: str | None, media_type: str | None):
+    if media_type:
+        return columnar_response(page, media_type, next_page_token=next_page_token)
+    return SqlExecuteResponse(
+        columns=page.column_names,
+        rows=page.to_pylist(),
+        row_count=page.num_rows,
+        next_page_token=next_page_token,
     )
-    db.add(assistant_msg)
-    await db.commit()
-    await db.refresh(assistant_msg)
-    return assistant_msg
 
 
 @router.post("/execute-sql", response_model=SqlExecuteResponse)
 async def execute_sql(
     body: SqlExecuteRequest,
     duckdb: DuckDBService = Depends(get_duckdb),
+    accept: str | None = Header(default=None),
 ):
+    media_type = negotiate(accept)
     try:
-        columns, rows, row_count = duckdb.execute_query(body.sql)
+        if body.page_size:
+            page_size = min(body.page_size, settings.max_page_size)
+            page, next_page_token = await duckdb.start_paged_query(body.sql, page_size)
+            return _page_response(page, next_page_token, media_type)
+        if media_type:
+            table = await duckdb.execute_arrow_async(body.sql)
+            return columnar_response(table, media_type)
+        columns, rows, row_count = await duckdb.execute_query_async(body.sql)
         return SqlExecuteResponse(columns=columns, rows=rows, row_count=row_count)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"SQL execution error: {e}")
+
+
+@router.get("/results", response_model=SqlExecuteResponse)
+async def next_result_page(
+    page_token: str,
+    page_size: int = Query(default=1000, gt=0),
+    duckdb: DuckDBService = Depends(get_duckdb),
+    accept: str | None = Header(default=None),
+):
+    try:
+        page, next_page_token = await duckdb.fetch_next_page(
+            page_token, min(page_size, settings.max_page_size)
+        )
+    except KeyError:
+        raise HTTPException(status_code=410, detail="Page token expired or already used")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"SQL execution error: {e}")
+    return _page_response(page, next_page_token, negotiate(accept))
+
+
+@router.delete("/results")
+async def release_results(page_token: str, duckdb: DuckDBService = Depends(get_duckdb)):
+    if not duckdb.result_cursors.release(page_token):
+        raise HTTPException(status_code=404, detail="Result not found")
+    return {"detail": "Result released"}
+
+
+@router.post("/execute-sql/stream")
+async def stream_sql(
+    body: SqlStreamRequest,
+    duckdb: DuckDBService = Depends(get_duckdb),
+    accept: str | None = Header(default=None),
+):
+    try:
+        cursor = await duckdb.open_result_cursor_async(body.sql, settings.stream_batch_size)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"SQL execution error: {e}")
+
+    chunks = duckdb.iter_batches(cursor, settings.stream_batch_size)
+    if negotiate(accept) == ARROW_STREAM_MEDIA_TYPE:
+        return StreamingResponse(
+            iter_arrow_ipc(cursor.schema, chunks), media_type=ARROW_STREAM_MEDIA_TYPE
+        )
+    return StreamingResponse(iter_ndjson(cursor.schema, chunks), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/llm")
+async def llm_stats(llm: LLMService = Depends(get_llm)):
+    return llm.stats()
+
+
+@router.get("/cache")
+async def cache_stats(duckdb: DuckDBService = Depends(get_duckdb)):
+    return duckdb.result_cache.stats()
+
+
+@router.delete("/cache")
+async def clear_cache(duckdb: DuckDBService = Depends(get_duckdb)):
+    duckdb.result_cache.clear()
+    return {"detail": "Query cache cleared"}
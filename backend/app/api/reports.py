@@ -2,17 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db, get_duckdb, get_neo4j, get_scheduler
+from app.dependencies import get_db, get_report_jobs, get_scheduler
 from app.models.report import Report, ReportSchedule
 from app.schemas.report import (
+    ReportJobResponse,
     ReportResponse,
     ReportScheduleCreate,
     ReportScheduleResponse,
     ReportScheduleUpdate,
 )
-from app.services.duckdb_service import DuckDBService
-from app.services.neo4j_service import Neo4jService
-from app.services.report_service import ReportService
+from app.services.report_jobs import ReportJobManager
 from app.services.scheduler_service import SchedulerService
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -88,18 +87,45 @@ async def delete_schedule(
     return {"detail": "Schedule deleted"}
 
 
-@router.post("/schedules/{schedule_id}/run", response_model=ReportResponse)
+@router.post("/schedules/{schedule_id}/run", response_model=ReportJobResponse, status_code=202)
 async def run_report(
     schedule_id: str,
     db: AsyncSession = Depends(get_db),
-    duckdb: DuckDBService = Depends(get_duckdb),
-    neo4j: Neo4jService = Depends(get_neo4j),
+    report_jobs: ReportJobManager = Depends(get_report_jobs),
 ):
-    service = ReportService(db, duckdb, neo4j)
-    report = await service.generate_report(schedule_id)
-    if not report:
-        raise HTTPException(status_code=404, detail="Schedule not found or no metrics")
-    return report
+    if not await db.get(ReportSchedule, schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return report_jobs.submit(schedule_id)
+
+
+@router.get("/jobs", response_model=list[ReportJobResponse])
+async def list_report_jobs(
+    schedule_id: str | None = None,
+    report_jobs: ReportJobManager = Depends(get_report_jobs),
+):
+    return report_jobs.list(schedule_id)
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_report_job(
+    job_id: str,
+    report_jobs: ReportJobManager = Depends(get_report_jobs),
+):
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.delete("/jobs/{job_id}", response_model=ReportJobResponse)
+async def cancel_report_job(
+    job_id: str,
+    report_jobs: ReportJobManager = Depends(get_report_jobs),
+):
+    job = await report_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
 
 
 @router.get("/", response_model=list[ReportResponse])
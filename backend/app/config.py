@@ -5,15 +5,34 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # LLM
-    llm_provider: str = "anthropic"
+    llm_provider: str = "anthropic"  # anthropic, openai or fake
     anthropic_api_key: str = ""
     openai_api_key: str = ""
     llm_model: str = ""  # empty = use provider default
+    llm_max_concurrent: int = 8  # completions in flight per worker; the rest queue
+    llm_requests_per_minute: int = 0  # 0 = unlimited
+    llm_input_tokens_per_minute: int = 0  # estimated prompt tokens; 0 = unlimited
+    llm_request_timeout_seconds: float = 60.0  # per completion, incl. queueing and retries
+    llm_max_retries: int = 4  # on 429, 5xx and connection errors
+
+    # Conversations
+    chat_history_turns: int = 10  # most recent exchanges eligible for verbatim LLM history
+    chat_history_token_budget: int = 0  # 0 = provider default
+    chat_history_summary_queries: int = 20  # older SQL statements summarized beyond that
+    message_page_size: int = 50
+    message_result_preview_rows: int = 100  # rows kept in SQLite; larger results go to Parquet
+    max_message_page_size: int = 200
+
+    # Answer cache (question -> SQL reuse for standalone questions)
+    answer_cache_enabled: bool = True
+    answer_cache_similarity: float = 1.0  # 1.0 = exact only; below, trigram Jaccard fuzzy hits
 
     # Neo4j
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "querypilot"
+    metric_cache_ttl_seconds: int = 60  # bounds staleness of writes from other workers
+    metric_cache_retry_seconds: int = 30  # reload backoff while Neo4j is unreachable
 
     # Paths
     data_dir: Path = Path("data")
@@ -21,8 +40,41 @@ class Settings(BaseSettings):
     sqlite_url: str = "sqlite+aiosqlite:///data/querypilot.db"
     duckdb_path: str = "data/querypilot.duckdb"
 
+    # Uploads
+    max_upload_bytes: int = 5 * 1024**3
+    upload_write_buffer_bytes: int = 4 * 1024**2  # bytes buffered per disk write
+    ingest_max_concurrent: int = 2  # background CSV conversions / registrations at once
+    parquet_row_group_size: int = 122_880
+
+    # DuckDB
+    dataset_storage: str = "view"  # view (over Parquet; CSV converted) or table (copied in)
+    duckdb_max_workers: int = 4  # size of the interactive query worker pool
+    duckdb_background_workers: int = 2  # separate pool for report runs
+    result_cursor_ttl_seconds: int = 300  # idle lifetime of a paged query result
+    max_open_result_cursors: int = 32
+    max_page_size: int = 10_000
+    stream_batch_size: int = 5_000
+    query_cache_enabled: bool = True
+    query_cache_max_bytes: int = 256 * 1024 * 1024
+    query_cache_max_entries: int = 1024
+    schema_context_cache_max_entries: int = 256  # rendered prompt schemas per dataset set
+
+    # Reports
+    report_metric_concurrency: int = 4  # metrics computed in parallel per report
+    backfill_max_periods: int = 240  # upper bound on periods per backfill request
+    report_max_concurrent_runs: int = 2  # report runs (on-demand and scheduled) at once
+
+    # Scheduler
+    scheduler_sync_seconds: int = 30  # how often each worker reloads jobs from SQLite
+    scheduler_misfire_grace_seconds: int = 300
+    scheduler_lease_seconds: int = 60  # a claimed run not renewed within this is retried
+
     # Slack
     slack_webhook_url: str = ""
+    slack_queue_size: int = 1000
+    slack_rate_limit_per_second: float = 1.0  # per webhook
+    slack_batch_window_seconds: float = 1.0  # bursts within the window become one message
+    slack_max_retries: int = 3
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
@@ -4,10 +4,16 @@ from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.database import async_session_factory
+from app.services.dataset_ingest import DatasetIngestor
 from app.services.duckdb_service import DuckDBService
 from app.services.llm_service import LLMService
 from app.services.neo4j_service import Neo4jService
+from app.services.notification_service import SlackDispatcher
+from app.services.report_jobs import ReportJobManager
+from app.services.result_store import ResultStore
+from app.services.schema_context import SchemaContextCache
 from app.services.scheduler_service import SchedulerService
+from app.services.upload_service import UploadSessions
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -27,5 +33,29 @@ def get_llm(request: Request) -> LLMService:
     return request.app.state.llm
 
 
+def get_schema_cache(request: Request) -> SchemaContextCache:
+    return request.app.state.schema_cache
+
+
 def get_scheduler(request: Request) -> SchedulerService:
     return request.app.state.scheduler
+
+
+def get_notifier(request: Request) -> SlackDispatcher:
+    return request.app.state.notifier
+
+
+def get_report_jobs(request: Request) -> ReportJobManager:
+    return request.app.state.report_jobs
+
+
+def get_ingestor(request: Request) -> DatasetIngestor:
+    return request.app.state.ingestor
+
+
+def get_upload_sessions(request: Request) -> UploadSessions:
+    return request.app.state.upload_sessions
+
+
+def get_result_store(request: Request) -> ResultStore:
+    return request.app.state.result_store
@@ -8,10 +8,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
 from app.config import settings
 from app.models.database import init_db
+from app.services.dataset_ingest import DatasetIngestor
 from app.services.duckdb_service import DuckDBService
 from app.services.llm_service import LLMService
 from app.services.neo4j_service import Neo4jService
+from app.services.notification_service import SlackDispatcher
+from app.services.report_jobs import ReportJobManager
+from app.services.result_store import ResultStore
+from app.services.schema_context import SchemaContextCache
 from app.services.scheduler_service import SchedulerService
+from app.services.upload_service import UploadSessions
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,6 +42,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     app.state.duckdb = duckdb
     logger.info("DuckDB connected")
 
+    # Background dataset ingestion; picks up uploads interrupted by a restart
+    ingestor = DatasetIngestor(duckdb)
+    app.state.ingestor = ingestor
+    app.state.upload_sessions = UploadSessions()
+    await ingestor.resume_pending()
+
     # Initialize Neo4j
     neo4j = Neo4jService()
     try:
@@ -47,10 +59,21 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     # Initialize LLM service
     app.state.llm = LLMService()
+    app.state.schema_cache = SchemaContextCache()
+    app.state.result_store = ResultStore()
     logger.info(f"LLM provider: {settings.llm_provider}")
 
+    # Initialize Slack notifications
+    notifier = SlackDispatcher()
+    notifier.start()
+    app.state.notifier = notifier
+
+    # Background report runs, shared by the API and the scheduler
+    report_jobs = ReportJobManager(duckdb, neo4j)
+    app.state.report_jobs = report_jobs
+
     # Initialize scheduler
-    scheduler = SchedulerService(duckdb, neo4j)
+    scheduler = SchedulerService(duckdb, neo4j, notifier, report_jobs)
     try:
         await scheduler.start()
     except Exception as e:
@@ -62,6 +85,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Shutdown
     logger.info("Shutting down QueryPilot...")
     await scheduler.stop()
+    await report_jobs.shutdown()
+    await ingestor.shutdown()
+    await notifier.stop()
+    await app.state.llm.close()
     await neo4j.close()
     duckdb.close()
 
@@ -74,6 +101,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Row-Count", "X-Total-Rows", "X-Next-Page-Token"],
 )
 
 app.include_router(api_router)
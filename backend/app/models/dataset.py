@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import JSON, DateTime, Integer, String
+from sqlalchemy import JSON, DateTime, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.database import Base
@@ -18,4 +18,9 @@ class Dataset(Base):
     duckdb_table: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     column_schema: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
     row_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)  # sha256 of the upload
+    status: Mapped[str] = mapped_column(
+        String, nullable=False, default="ready", server_default="ready"
+    )  # ingesting, ready, failed
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
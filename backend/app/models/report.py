@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, String
+from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.database import Base
@@ -38,6 +38,7 @@ class Report(Base):
 
 class MetricSnapshot(Base):
     __tablename__ = "metric_snapshots"
+    __table_args__ = (Index("ix_metric_snapshots_metric_period", "metric_id", "period"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     metric_id: Mapped[str] = mapped_column(String, nullable=False)
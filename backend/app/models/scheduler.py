@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.database import Base
+
+
+class SchedulerLease(Base):
+    """The latest fire time of a scheduled job that some worker has claimed.
+
+    The claim holds until ``expires_at`` (renewed while the run is in progress);
+    ``completed_fire_at`` catches up with ``last_fire_at`` when the run finishes.
+    """
+
+    __tablename__ = "scheduler_leases"
+
+    job_id: Mapped[str] = mapped_column(String, primary_key=True)
+    last_fire_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    owner: Mapped[str] = mapped_column(String, nullable=False)
+    claimed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    completed_fire_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -1,3 +1,5 @@
+# Static text first and table schemas last, so prompts over different datasets
+# still share a cacheable prefix
 SYSTEM_PROMPT = """You are a SQL expert that translates natural language questions into DuckDB SQL queries.
 
 ## Rules
@@ -9,16 +11,15 @@ SYSTEM_PROMPT = """You are a SQL expert that translates natural language questio
 - Keep queries efficient; use LIMIT when appropriate for exploration queries
 - When asked about "top N", always include ORDER BY with LIMIT
 
-## Available Tables
-{table_schemas}
-
 ## DuckDB Notes
 - Use ILIKE for case-insensitive pattern matching
 - String concatenation uses || operator
 - Date functions: date_part('year', col), date_trunc('month', col)
 - Aggregate: list_agg, string_agg, approx_count_distinct
 - Window functions are fully supported
-"""
+
+## Available Tables
+{table_schemas}"""
 
 RETRY_PROMPT = """The previous SQL query failed with this error:
 ```
@@ -28,13 +29,16 @@ RETRY_PROMPT = """The previous SQL query failed with this error:
 Please fix the query and try again. Output ONLY the corrected SQL in a ```sql``` code block."""
 
 
+PROMPT_SAMPLE_ROWS = 3  # sample rows shown per table
+
+
 def build_table_schema_text(tables: list[dict]) -> str:
     parts = []
     for table in tables:
         cols = ", ".join(f"{name} ({dtype})" for name, dtype in table["schema"].items())
         sample_text = ""
         if table.get("sample_rows"):
-            rows = table["sample_rows"][:3]
+            rows = table["sample_rows"][:PROMPT_SAMPLE_ROWS]
             sample_text = "\nSample rows:\n" + "\n".join(str(r) for r in rows)
         parts.append(f"### {table['table_name']}\nColumns: {cols}{sample_text}\n")
     return "\n".join(parts)
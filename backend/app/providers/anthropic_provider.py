@@ -1,17 +1,62 @@
+from collections.abc import AsyncIterator
+
 import anthropic
 
 from app.config import settings
+from app.providers.base import add_usage
+
+
+def _cached_system(system_prompt: str) -> list[dict]:
+    # The system prompt (rules plus table schemas) is identical across turns and
+    # retries of a conversation, so it's marked as a prompt-cache breakpoint
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def _record_usage(usage: dict | None, response_usage) -> None:
+    cache_read = response_usage.cache_read_input_tokens or 0
+    cache_write = response_usage.cache_creation_input_tokens or 0
+    add_usage(
+        usage,
+        input_tokens=response_usage.input_tokens + cache_read + cache_write,
+        cache_read_tokens=cache_read,
+        cache_write_tokens=cache_write,
+        output_tokens=response_usage.output_tokens,
+    )
 
 
 class AnthropicProvider:
     def __init__(self) -> None:
-        self._client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+        # Retries and deadlines are handled by LLMGateway
+        self._client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            timeout=settings.llm_request_timeout_seconds,
+            max_retries=0,
+        )
 
-    async def generate(self, system_prompt: str, messages: list[dict[str, str]]) -> str:
+    async def close(self) -> None:
+        await self._client.close()
+
+    async def generate(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> str:
         response = await self._client.messages.create(
             model=settings.effective_model,
             max_tokens=4096,
-            system=system_prompt,
+            system=_cached_system(system_prompt),
             messages=messages,
         )
+        _record_usage(usage, response.usage)
         return response.content[0].text
+
+    async def stream(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> AsyncIterator[str]:
+        async with self._client.messages.stream(
+            model=settings.effective_model,
+            max_tokens=4096,
+            system=_cached_system(system_prompt),
+            messages=messages,
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            _record_usage(usage, (await stream.get_final_message()).usage)
@@ -1,5 +1,27 @@
+from collections.abc import AsyncIterator
 from typing import Protocol
 
 
 class LLMProvider(Protocol):
-    async def generate(self, system_prompt: str, messages: list[dict[str, str]]) -> str: ...
+    """Providers add the call's token counts to ``usage`` when one is passed.
+
+    Keys are ``input_tokens`` (the whole prompt, cached or not),
+    ``cache_read_tokens``, ``cache_write_tokens`` and ``output_tokens``.
+    """
+
+    async def generate(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> str: ...
+
+    def stream(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> AsyncIterator[str]: ...
+
+    async def close(self) -> None: ...
+
+
+def add_usage(usage: dict | None, **counts: int | None) -> None:
+    if usage is None:
+        return
+    for key, value in counts.items():
+        usage[key] = usage.get(key, 0) + (value or 0)
@@ -0,0 +1,39 @@
+import asyncio
+import re
+from collections.abc import AsyncIterator
+
+
+class FakeProvider:
+    """Offline provider for local development and tests; needs no API key.
+
+    Answers every question with a preview query over the first table listed in
+    the system prompt, streamed a few characters at a time.
+    """
+
+    def __init__(self, chunk_size: int = 8, delay: float = 0.0) -> None:
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    def _respond(self, system_prompt: str) -> str:
+        match = re.search(r"^### (\w+)", system_prompt, re.MULTILINE)
+        if not match:
+            return "There are no tables available to query."
+        table = match.group(1)
+        return f"Here is a preview of {table}.\n```sql\nSELECT * FROM {table} LIMIT 10\n```"
+
+    async def generate(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> str:
+        return self._respond(system_prompt)
+
+    async def close(self) -> None:
+        pass
+
+    async def stream(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> AsyncIterator[str]:
+        text = self._respond(system_prompt)
+        for start in range(0, len(text), self.chunk_size):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield text[start : start + self.chunk_size]
@@ -1,17 +1,68 @@
+import hashlib
+from collections.abc import AsyncIterator
+
 import openai
 
 from app.config import settings
+from app.providers.base import add_usage
+
+
+def _record_usage(usage: dict | None, response_usage) -> None:
+    details = response_usage.prompt_tokens_details
+    add_usage(
+        usage,
+        input_tokens=response_usage.prompt_tokens,
+        cache_read_tokens=details.cached_tokens if details else 0,
+        output_tokens=response_usage.completion_tokens,
+    )
 
 
 class OpenAIProvider:
     def __init__(self) -> None:
-        self._client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+        # Retries and deadlines are handled by LLMGateway
+        self._client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.llm_request_timeout_seconds,
+            max_retries=0,
+        )
+
+    async def close(self) -> None:
+        await self._client.close()
 
-    async def generate(self, system_prompt: str, messages: list[dict[str, str]]) -> str:
-        all_messages = [{"role": "system", "content": system_prompt}, *messages]
+    def _request(self, system_prompt: str, messages: list[dict[str, str]]) -> dict:
+        # Prefix caching is automatic; the static system prompt goes first and the
+        # cache key routes requests sharing it to the same cache
+        return {
+            "model": settings.effective_model,
+            "messages": [{"role": "system", "content": system_prompt}, *messages],
+            "max_tokens": 4096,
+            # Sent as a raw body field so SDKs older than the typed parameter still work
+            "extra_body": {
+                "prompt_cache_key": hashlib.sha256(system_prompt.encode()).hexdigest()[:32]
+            },
+        }
+
+    async def generate(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> str:
         response = await self._client.chat.completions.create(
-            model=settings.effective_model,
-            messages=all_messages,
-            max_tokens=4096,
+            **self._request(system_prompt, messages)
         )
+        if response.usage:
+            _record_usage(usage, response.usage)
         return response.choices[0].message.content or ""
+
+    async def stream(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> AsyncIterator[str]:
+        response = await self._client.chat.completions.create(
+            **self._request(system_prompt, messages),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in response:
+            # The final chunk carries usage and no choices
+            if chunk.usage:
+                _record_usage(usage, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -1,6 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.query import ColumnarResult
 
 
 class DatasetResponse(BaseModel):
@@ -11,12 +13,31 @@ class DatasetResponse(BaseModel):
     duckdb_table: str
     column_schema: dict
     row_count: int
+    content_hash: str | None = None
+    status: str = "ready"
+    error: str | None = None
     uploaded_at: datetime
 
     model_config = {"from_attributes": True}
 
 
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int = Field(gt=0)
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    size: int
+    offset: int
+
+
 class DatasetPreview(BaseModel):
     columns: list[str]
     rows: list[dict]
     total_rows: int
+
+
+class DatasetColumnarPreview(ColumnarResult):
+    total_rows: int
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+
+PERIOD_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
 
 
 class MetricCreate(BaseModel):
@@ -37,3 +39,26 @@ class MetricComputeResponse(BaseModel):
     value: float | None
     unit: str
     error: str | None = None
+
+
+class MetricBackfillRequest(BaseModel):
+    start_period: str = Field(pattern=PERIOD_PATTERN)
+    end_period: str = Field(pattern=PERIOD_PATTERN)
+    include_children: bool = True
+    overwrite: bool = False
+
+    @model_validator(mode="after")
+    def check_range(self) -> "MetricBackfillRequest":
+        if self.start_period > self.end_period:
+            raise ValueError("start_period must not be after end_period")
+        return self
+
+
+class MetricBackfillResponse(BaseModel):
+    metrics: int
+    periods: int
+    computed: int
+    skipped: int
+    empty: int
+    errors: dict[str, str]
+    elapsed_ms: float
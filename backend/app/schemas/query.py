@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ConversationCreate(BaseModel):
@@ -18,25 +18,35 @@ class ConversationResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
-class MessageResponse(BaseModel):
+class MessageSummary(BaseModel):
     id: str
     conversation_id: str
     role: str
     content: str
     generated_sql: str | None = None
-    result_data: dict | None = None
     chart_config: dict | None = None
     error: str | None = None
+    usage: dict | None = None  # estimated and provider-reported token counts, cache hits included
     created_at: datetime
 
     model_config = {"from_attributes": True}
 
 
+class MessageResponse(MessageSummary):
+    result_data: dict | None = None
+
+
+class MessagePage(BaseModel):
+    messages: list[MessageResponse | MessageSummary]  # oldest first
+    next_cursor: str | None = None  # pass as ``before`` to fetch older messages
+
+
 class ConversationDetail(BaseModel):
     id: str
     title: str
     dataset_ids: list[str]
-    messages: list[MessageResponse]
+    messages: list[MessageResponse | MessageSummary]  # the most recent page, oldest first
+    next_cursor: str | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -50,9 +60,27 @@ class QueryRequest(BaseModel):
 
 class SqlExecuteRequest(BaseModel):
     sql: str
+    page_size: int | None = Field(default=None, gt=0)  # set to page through the result
 
 
 class SqlExecuteResponse(BaseModel):
     columns: list[str]
     rows: list[dict]
     row_count: int
+    next_page_token: str | None = None
+
+
+class SqlStreamRequest(BaseModel):
+    sql: str
+
+
+class ColumnarResult(BaseModel):
+    """Shape of the columnar JSON body, which result_format encodes straight from Arrow."""
+
+    columns: list[str]
+    data: list[list]  # one list of values per column
+    row_count: int
+
+
+class ColumnarPage(ColumnarResult):
+    next_page_token: str | None = None
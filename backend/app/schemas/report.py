@@ -36,3 +36,18 @@ class ReportResponse(BaseModel):
     generated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ReportJobResponse(BaseModel):
+    id: str
+    schedule_id: str
+    status: str
+    metrics_done: int
+    metrics_total: int
+    report_id: str | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
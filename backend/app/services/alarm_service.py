@@ -1,12 +1,14 @@
+import asyncio
 import operator as op
 from datetime import datetime
 
-import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.alarm import Alarm, AlarmEvent
 from app.services.duckdb_service import DuckDBService
+from app.services.metric_evaluator import MetricEvaluator
 from app.services.neo4j_service import Neo4jService
+from app.services.notification_service import SlackDispatcher
 
 OPERATORS = {
     "gt": op.gt,
@@ -19,39 +21,86 @@ OPERATORS = {
 
 class AlarmService:
     def __init__(
-        self, db: AsyncSession, duckdb: DuckDBService, neo4j: Neo4jService
+        self,
+        db: AsyncSession,
+        duckdb: DuckDBService,
+        neo4j: Neo4jService,
+        notifier: SlackDispatcher,
     ) -> None:
         self.db = db
         self.duckdb = duckdb
         self.neo4j = neo4j
+        self.notifier = notifier
+        self.evaluator = MetricEvaluator(duckdb)
 
     async def evaluate(self, alarm: Alarm) -> AlarmEvent | None:
-        metric = await self.neo4j.get_metric(alarm.metric_id)
-        if not metric or not metric.get("sql_query"):
-            alarm.status = "error"
-            alarm.last_checked_at = datetime.utcnow()
-            await self.db.commit()
-            return None
+        events = await self.evaluate_batch([alarm])
+        return events[0] if events else None
+
+    async def evaluate_batch(self, alarms: list[Alarm]) -> list[AlarmEvent]:
+        """Check many alarms, evaluating each of their metrics once.
+
+        The scheduler passes every alarm due in a check cycle, so alarms watching
+        the same metric share one query. Alarm state changes and events for the
+        whole batch are committed in one transaction; Slack notifications are
+        queued after the commit.
+        """
+        metrics: dict[str, dict | None] = {}
+        for metric_id in {alarm.metric_id for alarm in alarms}:
+            metrics[metric_id] = await self.neo4j.get_metric(metric_id)
+
+        runnable = [mid for mid, m in metrics.items() if m and m.get("sql_query")]
+        outcomes = dict(
+            zip(
+                runnable,
+                await asyncio.gather(*(self._run(metrics[mid]["sql_query"]) for mid in runnable)),
+            )
+        )
+
+        events: list[AlarmEvent] = []
+        for alarm in alarms:
+            metric = metrics.get(alarm.metric_id)
+            if not metric or not metric.get("sql_query"):
+                alarm.status = "error"
+                alarm.last_checked_at = datetime.utcnow()
+                continue
+            value, error = outcomes[alarm.metric_id]
+            event = self._apply(alarm, metric, value, error)
+            if event is None:
+                continue
+            self.db.add(event)
+            events.append(event)
 
+        await self.db.commit()
+
+        alarms_by_id = {alarm.id: alarm for alarm in alarms}
+        for event in events:
+            webhook_url = alarms_by_id[event.alarm_id].slack_webhook
+            if webhook_url and event.event_type != "error":
+                self.notifier.enqueue(webhook_url, event.message)
+        return events
+
+    async def _run(self, sql: str) -> tuple[float | None, str | None]:
         try:
-            _, rows, _ = self.duckdb.execute_query(metric["sql_query"])
-            if not rows:
-                return None
-            value = float(list(rows[0].values())[0])
+            return await self.evaluator.evaluate(sql), None
         except Exception as e:
+            return None, str(e)
+
+    def _apply(
+        self, alarm: Alarm, metric: dict, value: float | None, error: str | None
+    ) -> AlarmEvent | None:
+        if error is None and value is None:
+            error = "Metric returned no value"
+        if error is not None:
             alarm.status = "error"
             alarm.last_checked_at = datetime.utcnow()
-            event = AlarmEvent(
+            return AlarmEvent(
                 alarm_id=alarm.id,
                 event_type="error",
                 metric_value=None,
                 threshold=alarm.threshold,
-                message=f"Error computing metric: {e}",
+                message=f"Error computing metric: {error}",
             )
-            self.db.add(event)
-            await self.db.commit()
-            return event
-
         alarm.last_value = value
         alarm.last_checked_at = datetime.utcnow()
 
@@ -64,20 +113,13 @@ class AlarmService:
                 f"🚨 Alarm '{alarm.name}' triggered: "
                 f"{metric['name']} = {value} {alarm.operator} {alarm.threshold}"
             )
-            event = AlarmEvent(
+            return AlarmEvent(
                 alarm_id=alarm.id,
                 event_type="triggered",
                 metric_value=value,
                 threshold=alarm.threshold,
                 message=message,
             )
-            self.db.add(event)
-            await self.db.commit()
-
-            if alarm.slack_webhook:
-                await self._send_slack(alarm.slack_webhook, message)
-
-            return event
 
         elif not is_breached and alarm.status == "triggered":
             alarm.status = "ok"
@@ -85,43 +127,23 @@ class AlarmService:
                 f"✅ Alarm '{alarm.name}' resolved: "
                 f"{metric['name']} = {value} (threshold: {alarm.threshold})"
             )
-            event = AlarmEvent(
+            return AlarmEvent(
                 alarm_id=alarm.id,
                 event_type="resolved",
                 metric_value=value,
                 threshold=alarm.threshold,
                 message=message,
             )
-            self.db.add(event)
-            await self.db.commit()
 
-            if alarm.slack_webhook:
-                await self._send_slack(alarm.slack_webhook, message)
-
-            return event
-
-        await self.db.commit()
         return None
 
-    async def _send_slack(self, webhook_url: str, message: str) -> bool:
-        try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(
-                    webhook_url,
-                    json={"text": message},
-                    timeout=10,
-                )
-                return resp.status_code == 200
-        except Exception:
-            return False
-
     async def test_alarm(self, alarm: Alarm) -> dict:
         metric = await self.neo4j.get_metric(alarm.metric_id)
         if not metric or not metric.get("sql_query"):
             return {"error": "Metric not found or has no SQL query"}
 
         try:
-            _, rows, _ = self.duckdb.execute_query(metric["sql_query"])
+            _, rows, _ = await self.duckdb.execute_query_async(metric["sql_query"])
             if not rows:
                 return {"error": "Query returned no results"}
             value = float(list(rows[0].values())[0])
@@ -142,6 +164,6 @@ class AlarmService:
 
         if alarm.slack_webhook:
             test_msg = f"🧪 Test alarm '{alarm.name}': {metric['name']} = {value}"
-            result["slack_sent"] = await self._send_slack(alarm.slack_webhook, test_msg)
+            result["slack_sent"] = await self.notifier.send(alarm.slack_webhook, test_msg)
 
         return result
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import re
+import unicodedata
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.conversation import CachedAnswer
+from app.models.database import async_session_factory
+from app.models.dataset import Dataset
+
+# Fuzzy matching only scans this many recently used answers per schema
+MAX_CANDIDATES = 500
+
+# Words in any script, decimals, and comparison/arithmetic operators all change
+# the answer; other punctuation and spacing do not
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|\w+|[<>!]?=|[<>%+*/]")
+_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"|\d+(?:\.\d+)?")
+
+
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return " ".join(_TOKEN.findall(text))
+
+
+def question_literals(question: str) -> list[str]:
+    """Numbers and quoted strings, which change the answer however small the edit."""
+    return sorted(_LITERAL.findall(question))
+
+
+def schema_fingerprint(datasets: list[Dataset]) -> str:
+    schema = sorted((ds.duckdb_table, sorted(ds.column_schema.items())) for ds in datasets)
+    return hashlib.sha256(json.dumps(schema).encode()).hexdigest()
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of character trigrams, in [0, 1]."""
+    grams_a, grams_b = _trigrams(a), _trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class AnswerCache:
+    """Maps a normalized question plus a dataset schema fingerprint to validated SQL.
+
+    Uses short-lived sessions of its own so it can be called from streaming
+    responses, after the request's session has been closed.
+    """
+
+    def __init__(
+        self, session_factory: async_sessionmaker[AsyncSession] = async_session_factory
+    ) -> None:
+        self._session_factory = session_factory
+
+    async def lookup(self, question: str, fingerprint: str) -> CachedAnswer | None:
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(CachedAnswer).where(
+                    CachedAnswer.schema_fingerprint == fingerprint,
+                    CachedAnswer.normalized_question == normalized,
+                )
+            )
+            match = result.scalars().first()
+
+            if match is None and settings.answer_cache_similarity < 1.0:
+                result = await db.execute(
+                    select(CachedAnswer)
+                    .where(CachedAnswer.schema_fingerprint == fingerprint)
+                    .order_by(CachedAnswer.last_used_at.desc())
+                    .limit(MAX_CANDIDATES)
+                )
+                best_score = settings.answer_cache_similarity
+                literals = question_literals(question)
+                for candidate in result.scalars():
+                    # "top 10" vs "top 100" or 2023 vs 2024 score high but need other SQL
+                    if question_literals(candidate.question) != literals:
+                        continue
+                    score = similarity(normalized, candidate.normalized_question)
+                    if score >= best_score:
+                        match, best_score = candidate, score
+
+            if match is not None:
+                await db.execute(
+                    update(CachedAnswer)
+                    .where(CachedAnswer.id == match.id)
+                    .values(
+                        hit_count=CachedAnswer.hit_count + 1, last_used_at=datetime.utcnow()
+                    )
+                )
+                await db.commit()
+            return match
+
+    async def store(self, question: str, fingerprint: str, content: str, sql: str) -> None:
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(CachedAnswer).where(
+                    CachedAnswer.schema_fingerprint == fingerprint,
+                    CachedAnswer.normalized_question == normalized,
+                )
+            )
+            entry = result.scalars().first()
+            if entry is None:
+                entry = CachedAnswer(
+                    schema_fingerprint=fingerprint,
+                    normalized_question=normalized,
+                    question=question,
+                )
+                db.add(entry)
+            entry.content = content
+            entry.generated_sql = sql
+            entry.last_used_at = datetime.utcnow()
+            await db.commit()
+
+    async def invalidate(self, answer_id: str) -> None:
+        async with self._session_factory() as db:
+            entry = await db.get(CachedAnswer, answer_id)
+            if entry:
+                await db.delete(entry)
+                await db.commit()
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.report import MetricSnapshot
+from app.services.duckdb_service import DuckDBService
+from app.services.metric_evaluator import PERIOD_PLACEHOLDER, MetricEvaluator, PeriodValues
+from app.services.neo4j_service import Neo4jService
+
+
+def period_range(start: str, end: str) -> list[str]:
+    """Inclusive list of ``YYYY-MM`` periods from ``start`` to ``end``."""
+    year, month = map(int, start.split("-"))
+    end_year, end_month = map(int, end.split("-"))
+    periods = []
+    while (year, month) <= (end_year, end_month):
+        periods.append(f"{year}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
+
+class SnapshotBackfillService:
+    """Populates metric snapshot history for a range of periods.
+
+    Each metric is evaluated for all of its missing periods in one DuckDB query,
+    metrics are evaluated concurrently, and every metric's snapshots are written
+    and committed as soon as they are ready. Periods already stored are skipped,
+    so an interrupted backfill resumes where it stopped when re-run. Metrics whose
+    SQL does not take ``$period`` are reported in ``errors`` rather than filled.
+    """
+
+    def __init__(self, db: AsyncSession, duckdb: DuckDBService, neo4j: Neo4jService) -> None:
+        self.db = db
+        self.neo4j = neo4j
+        self.evaluator = MetricEvaluator(duckdb)
+
+    async def backfill(
+        self,
+        metric_id: str,
+        start_period: str,
+        end_period: str,
+        include_children: bool = True,
+        overwrite: bool = False,
+    ) -> dict | None:
+        started = time.perf_counter()
+        if include_children:
+            metrics = await self.neo4j.get_subtree_flat(metric_id)
+        else:
+            metric = await self.neo4j.get_metric(metric_id)
+            metrics = [metric] if metric else []
+        if not metrics:
+            return None
+        # A metric reachable along several paths appears once per path
+        metrics = list({metric["id"]: metric for metric in metrics}.values())
+
+        periods = period_range(start_period, end_period)
+        stored = {} if overwrite else await self._stored_periods(metrics, start_period, end_period)
+        summary = {
+            "metrics": len(metrics),
+            "periods": len(periods),
+            "computed": 0,
+            "skipped": 0,
+            "empty": 0,
+            "errors": {},
+        }
+
+        semaphore = asyncio.Semaphore(settings.report_metric_concurrency)
+
+        async def evaluate(metric: dict, missing: list[str]) -> tuple[dict, list[str], PeriodValues]:
+            async with semaphore:
+                return metric, missing, await self.evaluator.evaluate_periods(
+                    metric["sql_query"], missing
+                )
+
+        tasks = []
+        for metric in metrics:
+            if not metric.get("sql_query"):
+                summary["errors"][metric["id"]] = "No SQL query defined"
+                continue
+            if PERIOD_PLACEHOLDER not in metric["sql_query"]:
+                # Its value for a past period is unknowable; copying today's would invent history
+                summary["errors"][metric["id"]] = (
+                    f"SQL does not reference {PERIOD_PLACEHOLDER}; history cannot be backfilled"
+                )
+                continue
+            done = stored.get(metric["id"], set())
+            missing = [period for period in periods if period not in done]
+            summary["skipped"] += len(periods) - len(missing)
+            if missing:
+                tasks.append(asyncio.create_task(evaluate(metric, missing)))
+
+        # The session is not safe for concurrent use, so writes happen here as results land
+        for next_done in asyncio.as_completed(tasks):
+            metric, missing, evaluation = await next_done
+            rows = [
+                {"metric_id": metric["id"], "value": value, "period": period}
+                for period, value in evaluation.values.items()
+                if value is not None
+            ]
+            await self._write(metric["id"], rows, missing if overwrite else [])
+            summary["computed"] += len(rows)
+            summary["empty"] += len(missing) - len(rows) - len(evaluation.errors)
+            if evaluation.errors:
+                first = next(iter(evaluation.errors))
+                summary["errors"][metric["id"]] = (
+                    f"{len(evaluation.errors)} period(s) failed, e.g. {first}: "
+                    f"{evaluation.errors[first]}"
+                )
+
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return summary
+
+    async def _stored_periods(
+        self, metrics: list[dict], start_period: str, end_period: str
+    ) -> dict[str, set[str]]:
+        stmt = (
+            select(MetricSnapshot.metric_id, MetricSnapshot.period)
+            .where(MetricSnapshot.metric_id.in_([m["id"] for m in metrics]))
+            .where(MetricSnapshot.period.between(start_period, end_period))
+            .distinct()
+        )
+        stored: dict[str, set[str]] = {}
+        for metric_id, period in (await self.db.execute(stmt)).all():
+            stored.setdefault(metric_id, set()).add(period)
+        return stored
+
+    async def _write(self, metric_id: str, rows: list[dict], replace_periods: list[str]) -> None:
+        if replace_periods:
+            await self.db.execute(
+                delete(MetricSnapshot)
+                .where(MetricSnapshot.metric_id == metric_id)
+                .where(MetricSnapshot.period.in_(replace_periods))
+            )
+        if rows:
+            await self.db.execute(insert(MetricSnapshot), rows)
+        await self.db.commit()
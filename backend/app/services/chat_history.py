@@ -0,0 +1,129 @@
+import re
+from dataclasses import dataclass
+
+from app.config import settings
+
+# Rough English/SQL ratio for both providers' tokenizers; exact counts aren't
+# needed to keep the prompt bounded
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role markers and separators per chat message
+
+# History token budget by provider, used when chat_history_token_budget is 0
+PROVIDER_HISTORY_BUDGETS = {"anthropic": 6000, "openai": 4000, "fake": 2000}
+
+# Share of the budget held back for the summary of older queries
+SUMMARY_SHARE = 0.25
+
+SUMMARY_HEADER = "Previous queries in this conversation (oldest first):"
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def message_tokens(messages: list[dict[str, str]]) -> int:
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def history_budget(provider: str | None = None) -> int:
+    if settings.chat_history_token_budget:
+        return settings.chat_history_token_budget
+    return PROVIDER_HISTORY_BUDGETS.get(provider or settings.llm_provider, 4000)
+
+
+@dataclass
+class Turn:
+    role: str
+    content: str
+    generated_sql: str | None = None
+
+    def as_message(self) -> dict[str, str]:
+        content = self.content
+        # The reply usually quotes its SQL already; only append it when it doesn't
+        if self.role == "assistant" and self.generated_sql and self.generated_sql not in content:
+            content += f"\n```sql\n{self.generated_sql}\n```"
+        return {"role": self.role, "content": content}
+
+
+@dataclass
+class CompactHistory:
+    messages: list[dict[str, str]]
+    verbatim_turns: int
+    summarized_queries: int
+    tokens: int
+
+
+def _exchanges(turns: list[Turn]) -> list[list[Turn]]:
+    """Group turns into exchanges that each start with a user message."""
+    exchanges: list[list[Turn]] = []
+    for turn in turns:
+        if turn.role == "user" or not exchanges:
+            exchanges.append([])
+        exchanges[-1].append(turn)
+    return exchanges
+
+
+def _one_line(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def compact_history(
+    turns: list[Turn], earlier_sql: list[str], budget: int
+) -> CompactHistory:
+    """Fit a conversation into ``budget`` tokens of LLM history.
+
+    ``turns`` are the most recent messages, oldest first; ``earlier_sql`` is SQL
+    from before them, newest first. The newest exchanges are kept verbatim while
+    they fit; everything older is reduced to its SQL and listed in a summary
+    that is prepended to the first kept user message.
+    """
+    # The window can open mid-exchange (e.g. an unanswered question before a reply);
+    # providers require history to start with a user turn
+    start = next((i for i, turn in enumerate(turns) if turn.role == "user"), len(turns))
+    orphaned, turns = turns[:start], turns[start:]
+
+    verbatim_budget = int(budget * (1 - SUMMARY_SHARE))
+    kept: list[list[Turn]] = []
+    used = 0
+    exchanges = _exchanges(turns)
+    while exchanges:
+        cost = message_tokens([t.as_message() for t in exchanges[-1]])
+        if used + cost > verbatim_budget:
+            break
+        kept.insert(0, exchanges.pop())
+        used += cost
+
+    # Dropped exchanges are newer than earlier_sql, so they lead the newest-first pool
+    pool = [t.generated_sql for ex in reversed(exchanges) for t in reversed(ex) if t.generated_sql]
+    pool += [t.generated_sql for t in reversed(orphaned) if t.generated_sql]
+    pool += earlier_sql
+
+    lines: list[str] = []
+    seen: set[str] = set()
+    summary_used = estimate_tokens(SUMMARY_HEADER) + MESSAGE_OVERHEAD_TOKENS
+    for sql in pool:
+        line = f"- {_one_line(sql)}"
+        if line in seen:
+            continue
+        cost = estimate_tokens(line) + 1
+        if used + summary_used + cost > budget:
+            break
+        seen.add(line)
+        lines.append(line)
+        summary_used += cost
+
+    messages = [t.as_message() for ex in kept for t in ex]
+    if lines:
+        summary = "\n".join([SUMMARY_HEADER, *reversed(lines)])
+        if messages:
+            messages[0] = {"role": "user", "content": f"{summary}\n\n{messages[0]['content']}"}
+        else:
+            messages = [{"role": "user", "content": summary}]
+        used += summary_used
+
+    return CompactHistory(
+        messages=messages,
+        verbatim_turns=sum(len(ex) for ex in kept),
+        summarized_queries=len(lines),
+        tokens=used,
+    )
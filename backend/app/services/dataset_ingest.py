@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.database import async_session_factory
+from app.models.dataset import Dataset
+from app.services.duckdb_service import DuckDBService
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetIngestor:
+    """Turns stored uploads into queryable DuckDB datasets in the background.
+
+    CSVs are converted to zstd Parquet with ``parquet_row_group_size`` row groups
+    (in view mode) and the file is registered under the dataset's reserved table
+    name. At most ``ingest_max_concurrent`` ingests run at once; datasets left
+    ``ingesting`` by a restart are picked up again by :meth:`resume_pending`.
+    """
+
+    def __init__(self, duckdb: DuckDBService) -> None:
+        self.duckdb = duckdb
+        self._semaphore = asyncio.Semaphore(settings.ingest_max_concurrent)
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def submit(self, dataset_id: str) -> None:
+        if dataset_id in self._tasks:
+            return
+        task = asyncio.create_task(self._ingest(dataset_id))
+        self._tasks[dataset_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(dataset_id, None))
+
+    async def resume_pending(self) -> None:
+        async with async_session_factory() as db:
+            result = await db.execute(select(Dataset.id).where(Dataset.status == "ingesting"))
+            pending = result.scalars().all()
+        for dataset_id in pending:
+            self.submit(dataset_id)
+        if pending:
+            logger.info(f"Resuming ingestion of {len(pending)} dataset(s)")
+
+    async def cancel(self, dataset_id: str) -> None:
+        task = self._tasks.get(dataset_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _ingest(self, dataset_id: str) -> None:
+        async with self._semaphore, async_session_factory() as db:
+            dataset = await db.get(Dataset, dataset_id)
+            if not dataset or dataset.status != "ingesting":
+                return
+            as_view = settings.dataset_storage == "view"
+            try:
+                if as_view and dataset.stored_path.lower().endswith(".csv"):
+                    dataset.stored_path = await self._convert(dataset.stored_path)
+                    await db.commit()
+                # A restart may have interrupted a previous attempt after registration
+                await self.duckdb.drop_table_async(dataset.duckdb_table)
+                _, column_schema, row_count = await self.duckdb.create_table_from_file_async(
+                    dataset.stored_path,
+                    dataset.filename,
+                    as_view=as_view,
+                    table_name=dataset.duckdb_table,
+                )
+            except Exception as e:
+                logger.error(f"Ingestion failed for dataset {dataset_id}: {e}")
+                dataset.status = "failed"
+                dataset.error = str(e)
+                if os.path.exists(dataset.stored_path):
+                    os.remove(dataset.stored_path)
+                await db.commit()
+                return
+
+            dataset.column_schema = column_schema
+            dataset.row_count = row_count
+            dataset.status = "ready"
+            await db.commit()
+            logger.info(f"Dataset {dataset_id} ready as {dataset.duckdb_table} ({row_count} rows)")
+
+    async def _convert(self, csv_path: str) -> str:
+        parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+        if not os.path.exists(csv_path) and os.path.exists(parquet_path):
+            return parquet_path  # converted before a restart, not yet recorded
+        conversion = asyncio.ensure_future(
+            self.duckdb.convert_csv_to_parquet_async(csv_path, parquet_path)
+        )
+        try:
+            await asyncio.shield(conversion)
+        except BaseException:
+            # The COPY cannot be interrupted; let it finish before removing its output
+            await asyncio.gather(conversion, return_exceptions=True)
+            if os.path.exists(parquet_path):
+                os.remove(parquet_path)
+            raise
+        os.remove(csv_path)
+        return parquet_path
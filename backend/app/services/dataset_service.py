@@ -1,60 +1,98 @@
+import asyncio
+import hashlib
 import os
-import shutil
 import uuid
 from pathlib import Path
 
+import pyarrow as pa
 from fastapi import UploadFile
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.dataset import Dataset
+from app.services.dataset_ingest import DatasetIngestor
 from app.services.duckdb_service import DuckDBService
+from app.services.schema_context import SchemaContextCache
+from app.services.upload_service import UploadSessions, check_extension, write_stream
+
+# Serializes table-name reservation between concurrent uploads in this process
+_reserve_lock = asyncio.Lock()
 
 
 class DatasetService:
-    def __init__(self, db: AsyncSession, duckdb: DuckDBService) -> None:
+    def __init__(
+        self,
+        db: AsyncSession,
+        duckdb: DuckDBService,
+        schema_cache: SchemaContextCache | None = None,
+        ingestor: DatasetIngestor | None = None,
+    ) -> None:
         self.db = db
         self.duckdb = duckdb
+        self.schema_cache = schema_cache
+        self.ingestor = ingestor
 
     async def upload(self, file: UploadFile) -> Dataset:
+        """Stream a multipart upload to disk and queue it for ingestion."""
         filename = file.filename or "unknown"
-        file_ext = Path(filename).suffix.lower()
-        if file_ext not in (".csv", ".parquet"):
-            raise ValueError(f"Unsupported file type: {file_ext}. Only CSV and Parquet are supported.")
-
-        # Save file to disk
-        file_id = str(uuid.uuid4())
-        stored_name = f"{file_id}{file_ext}"
-        stored_path = str(settings.upload_dir / stored_name)
-        settings.upload_dir.mkdir(parents=True, exist_ok=True)
+        file_ext = check_extension(filename)
 
-        with open(stored_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        settings.upload_dir.mkdir(parents=True, exist_ok=True)
+        stored_path = settings.upload_dir / f"{uuid.uuid4()}{file_ext}"
+        hasher = hashlib.sha256()
 
-        file_size = os.path.getsize(stored_path)
+        async def chunks():
+            while chunk := await file.read(settings.upload_write_buffer_bytes):
+                yield chunk
 
-        # Create DuckDB table
         try:
-            table_name, column_schema, row_count = self.duckdb.create_table_from_file(
-                stored_path, filename
+            file_size = await write_stream(
+                stored_path, chunks(), settings.max_upload_bytes, hasher
             )
-        except Exception:
-            os.remove(stored_path)
+        except BaseException:
+            stored_path.unlink(missing_ok=True)
             raise
+        return await self._register(filename, str(stored_path), file_size, hasher.hexdigest())
 
-        dataset = Dataset(
-            filename=filename,
-            stored_path=stored_path,
-            file_type=file_ext.lstrip("."),
-            file_size=file_size,
-            duckdb_table=table_name,
-            column_schema=column_schema,
-            row_count=row_count,
+    async def create_from_upload(self, upload_id: str, sessions: UploadSessions) -> Dataset:
+        """Finish a resumable upload and queue it for ingestion."""
+        settings.upload_dir.mkdir(parents=True, exist_ok=True)
+        filename, stored_path, file_size, content_hash = await sessions.finish(
+            upload_id, settings.upload_dir
         )
-        self.db.add(dataset)
-        await self.db.commit()
+        return await self._register(filename, stored_path, file_size, content_hash)
+
+    async def _register(
+        self, filename: str, stored_path: str, file_size: int, content_hash: str
+    ) -> Dataset:
+        # Reserve the table name now so the dataset is addressable while it ingests.
+        # Every row holds its name (duckdb_table is unique), failed ingests included
+        try:
+            async with _reserve_lock:
+                result = await self.db.execute(select(Dataset.duckdb_table))
+                table_name = await self.duckdb.unique_table_name_async(
+                    filename, set(result.scalars().all())
+                )
+                dataset = Dataset(
+                    filename=filename,
+                    stored_path=stored_path,
+                    file_type=Path(filename).suffix.lower().lstrip("."),
+                    file_size=file_size,
+                    duckdb_table=table_name,
+                    column_schema={},
+                    row_count=0,
+                    content_hash=content_hash,
+                    status="ingesting",
+                )
+                self.db.add(dataset)
+                await self.db.commit()
+        except Exception:
+            os.remove(stored_path)
+            raise
         await self.db.refresh(dataset)
+        if self.ingestor:
+            self.ingestor.submit(dataset.id)
         return dataset
 
     async def list_all(self) -> list[Dataset]:
@@ -69,8 +107,12 @@ class DatasetService:
         if not dataset:
             return False
 
+        if self.ingestor:
+            await self.ingestor.cancel(dataset_id)
+            await self.db.refresh(dataset)
+
         # Remove DuckDB table
-        self.duckdb.drop_table(dataset.duckdb_table)
+        await self.duckdb.drop_table_async(dataset.duckdb_table)
 
         # Remove file
         if os.path.exists(dataset.stored_path):
@@ -78,9 +120,16 @@ class DatasetService:
 
         await self.db.delete(dataset)
         await self.db.commit()
+        if self.schema_cache:
+            self.schema_cache.invalidate(dataset_id)
         return True
 
-    def preview(self, table_name: str, limit: int = 50) -> tuple[list[str], list[dict], int]:
-        columns, rows = self.duckdb.preview_table(table_name, limit)
-        total = self.duckdb.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    async def preview(self, table_name: str, limit: int = 50) -> tuple[list[str], list[dict], int]:
+        columns, rows = await self.duckdb.preview_table_async(table_name, limit)
+        total = await self.duckdb.count_rows_async(table_name)
         return columns, rows, total
+
+    async def preview_arrow(self, table_name: str, limit: int = 50) -> tuple[pa.Table, int]:
+        table = await self.duckdb.preview_table_arrow_async(table_name, limit)
+        total = await self.duckdb.count_rows_async(table_name)
+        return table, total
@@ -1,20 +1,143 @@
+import asyncio
+import contextvars
+import functools
 import re
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, TypeVar
 
 import duckdb
+import pyarrow as pa
 
 from app.config import settings
+from app.services.query_cache import (
+    QueryResultCache,
+    estimate_rows_nbytes,
+    is_volatile,
+    normalize_sql,
+    referenced_identifiers,
+)
+from app.services.result_cursor import ResultCursor, ResultCursorRegistry
+
+T = TypeVar("T")
+
+
+# Statement types that never change data. DESCRIBE, SHOW and table-valued PRAGMAs
+# parse as SELECT; IMPORT DATABASE expands into CREATE and COPY statements. CALL
+# is left out: table functions such as dbgen() create tables.
+_NON_WRITING = {
+    duckdb.StatementType.SELECT,
+    duckdb.StatementType.EXPLAIN,
+    duckdb.StatementType.PRAGMA,
+    duckdb.StatementType.TRANSACTION,
+    duckdb.StatementType.PREPARE,
+    duckdb.StatementType.ANALYZE,
+    duckdb.StatementType.VACUUM,
+    duckdb.StatementType.EXPORT,
+}
+
+
+def _all_selects(statements: list) -> bool:
+    return all(st.type == duckdb.StatementType.SELECT for st in statements)
+
+
+def _changes_data(statements: list) -> bool:
+    return any(st.type not in _NON_WRITING for st in statements)
+
+
+def _fetch_arrow(result: duckdb.DuckDBPyConnection) -> pa.Table:
+    # ``fetch_arrow_table`` was renamed to ``to_arrow_table`` in newer DuckDB releases.
+    fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+    return fetch()
+
+
+class QueryScope:
+    """Cursors opened for one unit of work, so its running queries can be interrupted.
+
+    Entered in the task doing the work, the scope follows that task's context,
+    including into tasks it spawns and the worker threads ``DuckDBService.run``
+    dispatches to. After ``interrupt`` no new cursor can be opened in it. Work in a
+    ``background`` scope runs on a separate, smaller worker pool so it cannot
+    hold every slot interactive queries need.
+    """
+
+    def __init__(self, background: bool = False) -> None:
+        self.background = background
+        self._cursors: weakref.WeakSet[duckdb.DuckDBPyConnection] = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._token: contextvars.Token | None = None
+        self.interrupted = False
+
+    def __enter__(self) -> "QueryScope":
+        self._token = _query_scope.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _query_scope.reset(self._token)
+
+    def track(self, cur: duckdb.DuckDBPyConnection) -> None:
+        with self._lock:
+            if self.interrupted:
+                cur.close()
+                raise duckdb.InterruptException("INTERRUPT Error: Interrupted!")
+            self._cursors.add(cur)
+
+    def interrupt(self) -> None:
+        with self._lock:
+            self.interrupted = True
+            cursors = list(self._cursors)
+        for cur in cursors:
+            try:
+                cur.interrupt()
+            except duckdb.Error:
+                pass  # already closed
+
+
+_query_scope: contextvars.ContextVar[QueryScope | None] = contextvars.ContextVar(
+    "duckdb_query_scope", default=None
+)
 
 
 class DuckDBService:
     def __init__(self) -> None:
         self._conn: duckdb.DuckDBPyConnection | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._background_executor: ThreadPoolExecutor | None = None
+        self.result_cursors = ResultCursorRegistry(
+            ttl_seconds=settings.result_cursor_ttl_seconds,
+            max_open=settings.max_open_result_cursors,
+        )
+        self.result_cache = QueryResultCache(
+            max_bytes=settings.query_cache_max_bytes,
+            max_entries=settings.query_cache_max_entries,
+        )
+        # Bumped when a table is created or dropped through this service; any other
+        # write (DDL/DML run as a query) bumps the epoch and invalidates everything.
+        # Read-only statements that aren't SELECTs (EXPLAIN, PRAGMA, ...) leave both.
+        self._table_versions: dict[str, int] = {}
+        self._cache_epoch = 0
+        self._versions_lock = threading.Lock()
 
     def connect(self) -> None:
         Path(settings.duckdb_path).parent.mkdir(parents=True, exist_ok=True)
         self._conn = duckdb.connect(settings.duckdb_path)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.duckdb_max_workers, thread_name_prefix="duckdb"
+        )
+        self._background_executor = ThreadPoolExecutor(
+            max_workers=settings.duckdb_background_workers, thread_name_prefix="duckdb-bg"
+        )
 
     def close(self) -> None:
+        self.result_cursors.close_all()
+        for executor in (self._executor, self._background_executor):
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = self._background_executor = None
         if self._conn:
             self._conn.close()
             self._conn = None
@@ -25,14 +148,68 @@ class DuckDBService:
             raise RuntimeError("DuckDB not connected")
         return self._conn
 
-    def _safe_table_name(self, filename: str) -> str:
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        # A connection is not safe to share between threads; every unit of work
+        # gets its own cursor (a lightweight connection to the same database).
+        cur = self.conn.cursor()
+        if (scope := _query_scope.get()) is not None:
+            scope.track(cur)
+        return cur
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking DuckDB call on the worker pool without blocking the event loop."""
+        if self._executor is None:
+            raise RuntimeError("DuckDB not connected")
+        scope = _query_scope.get()
+        executor = self._background_executor if scope and scope.background else self._executor
+        loop = asyncio.get_running_loop()
+        # Executor threads don't inherit context; carry it so a QueryScope applies there
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await loop.run_in_executor(executor, call)
+
+    def _bump_table_version(self, table_name: str) -> None:
+        table_name = table_name.lower()
+        with self._versions_lock:
+            self._table_versions[table_name] = self._table_versions.get(table_name, 0) + 1
+        self.result_cache.invalidate_tables({table_name})
+
+    def _invalidate_all(self) -> None:
+        with self._versions_lock:
+            self._cache_epoch += 1
+        self.result_cache.clear()
+
+    def _statements(self, cur: duckdb.DuckDBPyConnection, sql: str) -> list:
+        try:
+            return cur.extract_statements(sql)
+        except Exception:
+            return []  # unparseable; execute() will report the error
+
+    def _cache_key(
+        self, kind: str, sql: str, read_only: bool
+    ) -> tuple[tuple | None, frozenset[str]]:
+        """Return ``(key, tables)`` for ``sql``.
+
+        ``key`` is None when the result must not be cached: the cache is disabled,
+        the query is non-deterministic, or it is not a plain read-only SELECT.
+        """
+        if not settings.query_cache_enabled or not read_only or is_volatile(sql):
+            return None, frozenset()
+        tables = referenced_identifiers(sql)
+        with self._versions_lock:
+            versions = tuple(sorted((t, self._table_versions.get(t, 0)) for t in tables))
+            key = (kind, normalize_sql(sql), self._cache_epoch, versions)
+        return key, tables
+
+    def _safe_table_name(
+        self, cur: duckdb.DuckDBPyConnection, filename: str, reserved: set[str] = frozenset()
+    ) -> str:
         name = Path(filename).stem
         name = re.sub(r"[^a-zA-Z0-9_]", "_", name)
         name = re.sub(r"_+", "_", name).strip("_").lower()
         if not name or name[0].isdigit():
             name = f"t_{name}"
         # Ensure uniqueness by checking existing tables
-        existing = {row[0] for row in self.conn.execute("SHOW TABLES").fetchall()}
+        existing = {row[0] for row in cur.execute("SHOW TABLES").fetchall()} | reserved
         base = name
         counter = 1
         while name in existing:
@@ -40,51 +217,270 @@ class DuckDBService:
             counter += 1
         return name
 
-    def create_table_from_file(self, file_path: str, filename: str) -> tuple[str, dict, int]:
-        table_name = self._safe_table_name(filename)
+    def unique_table_name(self, filename: str, reserved: set[str] = frozenset()) -> str:
+        """A free table name derived from ``filename``, avoiding ``reserved`` names too."""
+        with self.cursor() as cur:
+            return self._safe_table_name(cur, filename, reserved)
+
+    def create_table_from_file(
+        self,
+        file_path: str,
+        filename: str,
+        as_view: bool = False,
+        table_name: str | None = None,
+    ) -> tuple[str, dict, int]:
+        """Register ``file_path`` under ``table_name`` or a name derived from ``filename``.
+
+        With ``as_view`` a Parquet file is exposed as a view over the file instead
+        of being copied into the database; schema and row count then come from the
+        Parquet footer, so registration time does not depend on file size.
+        """
+        is_parquet = file_path.lower().endswith(".parquet")
+        if is_parquet and as_view:
+            file_path = str(Path(file_path).resolve())
         path = file_path.replace("'", "''")
+        with self.cursor() as cur:
+            table_name = table_name or self._safe_table_name(cur, filename)
+            if is_parquet and as_view:
+                cur.execute(f"CREATE VIEW {table_name} AS SELECT * FROM read_parquet('{path}')")
+                row_count = cur.execute(
+                    f"SELECT COALESCE(SUM(num_rows), 0) FROM parquet_file_metadata('{path}')"
+                ).fetchone()[0]
+            elif is_parquet:
+                cur.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_parquet('{path}')")
+                row_count = cur.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            else:
+                cur.execute(
+                    f"CREATE TABLE {table_name} AS SELECT * FROM read_csv_auto('{path}', header=true)"
+                )
+                row_count = cur.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
 
-        if filename.lower().endswith(".parquet"):
-            self.conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_parquet('{path}')")
-        else:
-            self.conn.execute(
-                f"CREATE TABLE {table_name} AS SELECT * FROM read_csv_auto('{path}', header=true)"
-            )
+            schema = self._get_table_schema(cur, table_name)
+        self._bump_table_version(table_name)
+        return table_name, schema, int(row_count)
 
-        schema = self._get_table_schema(table_name)
-        row_count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-        return table_name, schema, row_count
+    def convert_csv_to_parquet(self, csv_path: str, parquet_path: str) -> None:
+        source = csv_path.replace("'", "''")
+        target = parquet_path.replace("'", "''")
+        with self.cursor() as cur:
+            cur.execute(
+                f"COPY (SELECT * FROM read_csv_auto('{source}', header=true)) "
+                f"TO '{target}' (FORMAT parquet, COMPRESSION zstd, "
+                f"ROW_GROUP_SIZE {int(settings.parquet_row_group_size)})"
+            )
 
-    def _get_table_schema(self, table_name: str) -> dict:
-        result = self.conn.execute(f"DESCRIBE {table_name}").fetchall()
+    def _get_table_schema(self, cur: duckdb.DuckDBPyConnection, table_name: str) -> dict:
+        result = cur.execute(f"DESCRIBE {table_name}").fetchall()
         return {row[0]: row[1] for row in result}
 
     def preview_table(self, table_name: str, limit: int = 50) -> tuple[list[str], list[dict]]:
-        result = self.conn.execute(f"SELECT * FROM {table_name} LIMIT {int(limit)}")
-        columns = [desc[0] for desc in result.description]
-        rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        with self.cursor() as cur:
+            result = cur.execute(f"SELECT * FROM {table_name} LIMIT {int(limit)}")
+            columns = [desc[0] for desc in result.description]
+            rows = [dict(zip(columns, row)) for row in result.fetchall()]
         return columns, rows
 
+    def count_rows(self, table_name: str) -> int:
+        with self.cursor() as cur:
+            return cur.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
     def execute_query(self, sql: str) -> tuple[list[str], list[dict], int]:
-        result = self.conn.execute(sql)
-        columns = [desc[0] for desc in result.description]
-        rows = [dict(zip(columns, row)) for row in result.fetchall()]
-        return columns, rows, len(rows)
+        """Run ``sql`` and return ``(columns, rows, row_count)``.
+
+        Results of read-only queries may come from the result cache and are
+        shared between callers, so they must be treated as read-only.
+        """
+        columns, rows, row_count, _ = self.execute_query_timed(sql)
+        return columns, rows, row_count
+
+    def execute_query_timed(self, sql: str) -> tuple[list[str], list[dict], int, dict]:
+        """Like ``execute_query``, also returning per-phase timings in milliseconds.
+
+        A single SELECT is parsed, bound and planned once and then executed from
+        that plan, so parser and binder errors are raised here directly and no
+        separate ``validate_sql`` (EXPLAIN) round trip is needed.
+        """
+        timings: dict = {}
+        started = time.perf_counter()
+
+        def lap(phase: str) -> None:
+            nonlocal started
+            now = time.perf_counter()
+            timings[f"{phase}_ms"] = round((now - started) * 1000, 3)
+            started = now
+
+        with self.cursor() as cur:
+            statements = cur.extract_statements(sql)
+            lap("parse")
+            read_only = _all_selects(statements)
+            key, tables = self._cache_key("rows", sql, read_only)
+            if key and (cached := self.result_cache.get(key)) is not None:
+                timings["cache_hit"] = True
+                return (*cached, timings)
+
+            if read_only and len(statements) == 1:
+                relation = cur.sql(sql)
+                lap("plan")
+                result = relation.execute()
+            else:
+                result = cur.execute(sql)
+            lap("execute")
+            columns = [desc[0] for desc in result.description]
+            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+            lap("fetch")
+        if _changes_data(statements):
+            self._invalidate_all()
+        if key:
+            value = (columns, rows, len(rows))
+            self.result_cache.put(key, value, estimate_rows_nbytes(rows), tables)
+        timings["cache_hit"] = False
+        return columns, rows, len(rows), timings
+
+    def execute_arrow(self, sql: str) -> pa.Table:
+        with self.cursor() as cur:
+            statements = self._statements(cur, sql)
+            key, tables = self._cache_key("arrow", sql, _all_selects(statements))
+            if key and (cached := self.result_cache.get(key)) is not None:
+                return cached
+            table = _fetch_arrow(cur.execute(sql))
+        if _changes_data(statements):
+            self._invalidate_all()
+        if key:
+            self.result_cache.put(key, table, table.nbytes, tables)
+        return table
+
+    def preview_table_arrow(self, table_name: str, limit: int = 50) -> pa.Table:
+        with self.cursor() as cur:
+            return _fetch_arrow(cur.execute(f"SELECT * FROM {table_name} LIMIT {int(limit)}"))
+
+    def open_result_cursor(self, sql: str, batch_size: int) -> ResultCursor:
+        cur = self.cursor()
+        try:
+            statements = self._statements(cur, sql)
+            result_cursor = ResultCursor(cur, sql, batch_size)
+        except Exception:
+            cur.close()
+            raise
+        if _changes_data(statements):
+            self._invalidate_all()
+        return result_cursor
 
     def validate_sql(self, sql: str) -> str | None:
         try:
-            self.conn.execute(f"EXPLAIN {sql}")
+            with self.cursor() as cur:
+                cur.execute(f"EXPLAIN {sql}")
             return None
         except Exception as e:
             return str(e)
 
     def drop_table(self, table_name: str) -> None:
-        self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        with self.cursor() as cur:
+            # Datasets are tables or views over files; DROP must name the right kind
+            found = cur.execute(
+                "SELECT table_type FROM information_schema.tables WHERE table_name = ?",
+                [table_name],
+            ).fetchone()
+            kind = "VIEW" if found and found[0] == "VIEW" else "TABLE"
+            cur.execute(f"DROP {kind} IF EXISTS {table_name}")
+        self._bump_table_version(table_name)
 
     def get_table_info(self, table_name: str) -> dict:
-        schema = self._get_table_schema(table_name)
-        row_count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-        sample = self.conn.execute(f"SELECT * FROM {table_name} LIMIT 5")
-        columns = [desc[0] for desc in sample.description]
-        sample_rows = [dict(zip(columns, row)) for row in sample.fetchall()]
+        with self.cursor() as cur:
+            schema = self._get_table_schema(cur, table_name)
+            row_count = cur.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            sample = cur.execute(f"SELECT * FROM {table_name} LIMIT 5")
+            columns = [desc[0] for desc in sample.description]
+            sample_rows = [dict(zip(columns, row)) for row in sample.fetchall()]
         return {"schema": schema, "row_count": row_count, "sample_rows": sample_rows}
+
+    # Async variants: same semantics, executed on the worker pool.
+
+    async def execute_query_async(self, sql: str) -> tuple[list[str], list[dict], int]:
+        return await self.run(self.execute_query, sql)
+
+    async def execute_query_timed_async(
+        self, sql: str
+    ) -> tuple[list[str], list[dict], int, dict]:
+        return await self.run(self.execute_query_timed, sql)
+
+    async def preview_table_async(
+        self, table_name: str, limit: int = 50
+    ) -> tuple[list[str], list[dict]]:
+        return await self.run(self.preview_table, table_name, limit)
+
+    async def execute_arrow_async(self, sql: str) -> pa.Table:
+        return await self.run(self.execute_arrow, sql)
+
+    async def preview_table_arrow_async(self, table_name: str, limit: int = 50) -> pa.Table:
+        return await self.run(self.preview_table_arrow, table_name, limit)
+
+    async def get_table_info_async(self, table_name: str) -> dict:
+        return await self.run(self.get_table_info, table_name)
+
+    async def count_rows_async(self, table_name: str) -> int:
+        return await self.run(self.count_rows, table_name)
+
+    async def validate_sql_async(self, sql: str) -> str | None:
+        return await self.run(self.validate_sql, sql)
+
+    async def create_table_from_file_async(
+        self,
+        file_path: str,
+        filename: str,
+        as_view: bool = False,
+        table_name: str | None = None,
+    ) -> tuple[str, dict, int]:
+        return await self.run(
+            self.create_table_from_file, file_path, filename, as_view, table_name
+        )
+
+    async def unique_table_name_async(
+        self, filename: str, reserved: set[str] = frozenset()
+    ) -> str:
+        return await self.run(self.unique_table_name, filename, reserved)
+
+    async def convert_csv_to_parquet_async(self, csv_path: str, parquet_path: str) -> None:
+        await self.run(self.convert_csv_to_parquet, csv_path, parquet_path)
+
+    async def drop_table_async(self, table_name: str) -> None:
+        await self.run(self.drop_table, table_name)
+
+    async def open_result_cursor_async(self, sql: str, batch_size: int) -> ResultCursor:
+        return await self.run(self.open_result_cursor, sql, batch_size)
+
+    # Paged and streamed results
+
+    async def _read_page(
+        self, cursor: ResultCursor, page_size: int, cursor_id: str | None = None
+    ) -> tuple[pa.Table, str | None]:
+        try:
+            page = await self.run(cursor.read, page_size)
+        except BaseException:
+            cursor.close()
+            raise
+        if not cursor.has_more:
+            cursor.close()
+            return page, None
+        return page, self.result_cursors.park(cursor, cursor_id)
+
+    async def start_paged_query(self, sql: str, page_size: int) -> tuple[pa.Table, str | None]:
+        """Run ``sql`` and return its first page plus a token for the next one (if any)."""
+        cursor = await self.open_result_cursor_async(sql, page_size)
+        return await self._read_page(cursor, page_size)
+
+    async def fetch_next_page(self, page_token: str, page_size: int) -> tuple[pa.Table, str | None]:
+        """Continue a paged query; raises ``KeyError`` for unknown, expired or reused tokens."""
+        cursor_id, cursor = self.result_cursors.claim(page_token)
+        return await self._read_page(cursor, page_size, cursor_id)
+
+    async def iter_batches(
+        self, cursor: ResultCursor, batch_size: int
+    ) -> AsyncIterator[pa.Table]:
+        """Yield ``cursor`` in chunks of ``batch_size`` rows, closing it when done."""
+        try:
+            while cursor.has_more:
+                chunk = await self.run(cursor.read, batch_size)
+                if chunk.num_rows:
+                    yield chunk
+        finally:
+            cursor.close()
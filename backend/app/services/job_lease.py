@@ -0,0 +1,148 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.triggers.base import BaseTrigger
+from sqlalchemy import and_, not_, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from app.config import settings
+from app.models.database import async_session_factory
+from app.models.scheduler import SchedulerLease
+
+# Widening windows searched for the most recent fire time; the first window that
+# contains one holds at most ~60 fire times, so the scan stays cheap for any cadence.
+_LOOKBACKS = (
+    timedelta(minutes=1),
+    timedelta(hours=1),
+    timedelta(days=1),
+    timedelta(days=32),
+    timedelta(days=366),
+)
+
+
+def latest_fire_time(trigger: BaseTrigger, now: datetime) -> datetime | None:
+    """Most recent time at or before ``now`` that ``trigger`` was due."""
+    for lookback in _LOOKBACKS:
+        latest = None
+        fire = trigger.get_next_fire_time(None, now - lookback)
+        while fire is not None and fire <= now:
+            latest = fire
+            fire = trigger.get_next_fire_time(fire, fire + timedelta(microseconds=1))
+        if latest is not None:
+            return latest
+    return None
+
+
+def _as_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class JobLeases:
+    """Claims scheduled runs in SQLite so each fire time runs on exactly one worker.
+
+    Every worker schedules the same jobs; when one fires, the worker claims the
+    job's due fire time with a conditional upsert. Only the first claim for a given
+    fire time succeeds, and a worker that was down claims at most the latest missed
+    fire time, so missed runs are coalesced into one.
+
+    A claim is a lease: the running worker renews it and marks the fire time
+    complete when the job finishes. If the worker dies mid-run the lease expires
+    and the fire time can be claimed again, so a claimed run is not lost. A new
+    fire time can't be claimed while the previous run still holds its lease.
+    """
+
+    def __init__(self, owner: str | None = None, lease_seconds: float | None = None) -> None:
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = (
+            settings.scheduler_lease_seconds if lease_seconds is None else lease_seconds
+        )
+
+    async def claim(self, job_id: str, fire_time: datetime) -> bool:
+        fire_at = _as_utc(fire_time)
+        now = datetime.utcnow()
+        lease = SchedulerLease
+        done = and_(
+            lease.completed_fire_at.is_not(None), lease.completed_fire_at >= lease.last_fire_at
+        )
+        expired = lease.expires_at < now
+        stmt = insert(lease).values(
+            job_id=job_id,
+            last_fire_at=fire_at,
+            owner=self.owner,
+            claimed_at=now,
+            expires_at=now + timedelta(seconds=self.lease_seconds),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[lease.job_id],
+            set_={
+                "last_fire_at": stmt.excluded.last_fire_at,
+                "owner": stmt.excluded.owner,
+                "claimed_at": stmt.excluded.claimed_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=or_(
+                # A newer fire time, once the previous run finished or was abandoned
+                and_(
+                    lease.last_fire_at < stmt.excluded.last_fire_at,
+                    or_(done, lease.expires_at.is_(None), expired),
+                ),
+                # The same fire time, abandoned mid-run by a worker that died
+                and_(lease.last_fire_at == stmt.excluded.last_fire_at, not_(done), expired),
+            ),
+        )
+        async with async_session_factory() as db:
+            result = await db.execute(stmt)
+            await db.commit()
+            return result.rowcount == 1
+
+    async def renew(self, job_id: str, fire_time: datetime) -> bool:
+        """Extend this worker's lease on a running fire time; False if it was lost."""
+        return await self._update_own(
+            job_id,
+            fire_time,
+            expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds),
+        )
+
+    async def complete(self, job_id: str, fire_time: datetime) -> bool:
+        """Mark a claimed fire time as run and release the lease."""
+        return await self._update_own(
+            job_id, fire_time, completed_fire_at=_as_utc(fire_time), expires_at=None
+        )
+
+    async def _update_own(self, job_id: str, fire_time: datetime, **values) -> bool:
+        stmt = (
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.job_id == job_id,
+                SchedulerLease.owner == self.owner,
+                SchedulerLease.last_fire_at == _as_utc(fire_time),
+            )
+            .values(**values)
+        )
+        async with async_session_factory() as db:
+            result = await db.execute(stmt)
+            await db.commit()
+            return result.rowcount == 1
+
+    async def known_jobs(self) -> set[str]:
+        """Jobs that have run before, and so may have missed runs to catch up on."""
+        async with async_session_factory() as db:
+            result = await db.execute(select(SchedulerLease.job_id))
+            return set(result.scalars().all())
+
+    async def abandoned_jobs(self) -> set[str]:
+        """Jobs whose claimed run expired before it completed."""
+        lease = SchedulerLease
+        async with async_session_factory() as db:
+            result = await db.execute(
+                select(lease.job_id).where(
+                    lease.expires_at < datetime.utcnow(),
+                    or_(
+                        lease.completed_fire_at.is_(None),
+                        lease.completed_fire_at < lease.last_fire_at,
+                    ),
+                )
+            )
+            return set(result.scalars().all())
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import random
+import time
+from collections.abc import AsyncIterator
+
+import anthropic
+import openai
+
+from app.config import settings
+from app.providers.base import LLMProvider
+from app.services.chat_history import estimate_tokens, message_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504, 529}  # 529: Anthropic overloaded
+
+_CONNECTION_ERRORS = (anthropic.APIConnectionError, openai.APIConnectionError)
+
+
+class LLMUnavailable(Exception):
+    """The provider stayed rate limited, failing or slow until the request deadline."""
+
+
+class TokenBucket:
+    """Refills at ``rate`` per second up to ``capacity``; ``acquire`` waits for enough tokens."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        # A request larger than the bucket waits for a full bucket instead of forever
+        cost = min(cost, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                await asyncio.sleep((cost - self._tokens) / self.rate)
+
+
+def _retry_after(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _retryable(exc: Exception) -> bool:
+    return (
+        getattr(exc, "status_code", None) in RETRYABLE_STATUS
+        or isinstance(exc, (*_CONNECTION_ERRORS, asyncio.TimeoutError))
+    )
+
+
+class LLMGateway:
+    """Shared front door to an ``LLMProvider`` for every chat request in the process.
+
+    Calls wait their turn behind a concurrency semaphore and optional request and
+    input-token buckets (per minute, so bursts queue instead of drawing 429s).
+    Rate limits, 5xx responses and connection errors are retried with jittered
+    exponential backoff, honouring Retry-After, until the request's deadline;
+    then ``LLMUnavailable`` is raised. A stream is only retried before its first
+    token, and its deadline covers the wait to start. ``stats`` reports queue
+    depth and outcome counters.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        max_concurrent: int | None = None,
+        requests_per_minute: int | None = None,
+        input_tokens_per_minute: int | None = None,
+        deadline: float | None = None,
+        max_retries: int | None = None,
+        backoff_base: float = 0.5,
+    ) -> None:
+        self.provider = provider
+        self.max_concurrent = max_concurrent or settings.llm_max_concurrent
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        rpm = (
+            settings.llm_requests_per_minute if requests_per_minute is None else requests_per_minute
+        )
+        tpm = (
+            settings.llm_input_tokens_per_minute
+            if input_tokens_per_minute is None
+            else input_tokens_per_minute
+        )
+        self._requests = TokenBucket(rpm / 60, max(1, rpm // 60)) if rpm else None
+        self._input_tokens = TokenBucket(tpm / 60, tpm / 6) if tpm else None
+        self.deadline = settings.llm_request_timeout_seconds if deadline is None else deadline
+        self.max_retries = settings.llm_max_retries if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.failures = 0
+        self._wait_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "avg_wait_ms": round(self._wait_seconds / self.requests * 1000, 3)
+            if self.requests
+            else 0.0,
+        }
+
+    async def _admit(self, cost: int) -> None:
+        """Wait for a concurrency slot and rate budget; the caller releases the semaphore."""
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+            try:
+                if self._requests:
+                    await self._requests.acquire()
+                if self._input_tokens:
+                    await self._input_tokens.acquire(cost)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+            self._wait_seconds += time.monotonic() - started
+
+    async def _backoff(self, exc: Exception, attempt: int, deadline: float) -> None:
+        if getattr(exc, "status_code", None) == 429:
+            self.rate_limited += 1
+        if not _retryable(exc):
+            self.failures += 1
+            raise exc
+        # Full jitter spreads out clients that were throttled together
+        delay = random.uniform(0, self.backoff_base * 2**attempt)
+        if (retry_after := _retry_after(exc)) is not None:
+            delay = max(delay, retry_after)
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            self.failures += 1
+            raise LLMUnavailable(f"LLM provider unavailable: {exc}") from exc
+        logger.warning(f"LLM call failed ({exc}); retrying in {delay:.1f}s")
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def generate(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> str:
+        deadline = time.monotonic() + self.deadline
+        cost = estimate_tokens(system_prompt) + message_tokens(messages)
+        self.requests += 1
+        attempt = 0
+        while True:
+            try:
+                async with asyncio.timeout(max(0.0, deadline - time.monotonic())):
+                    await self._admit(cost)
+                    self.in_flight += 1
+                    try:
+                        return await self.provider.generate(system_prompt, messages, usage)
+                    finally:
+                        self.in_flight -= 1
+                        self._semaphore.release()
+            except TimeoutError:
+                self.timeouts += 1
+                raise LLMUnavailable(f"LLM request exceeded its {self.deadline:g}s deadline")
+            except Exception as e:
+                await self._backoff(e, attempt, deadline)
+                attempt += 1
+
+    async def stream(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> AsyncIterator[str]:
+        deadline = time.monotonic() + self.deadline
+        cost = estimate_tokens(system_prompt) + message_tokens(messages)
+        self.requests += 1
+        attempt = 0
+        while True:
+            try:
+                async with asyncio.timeout(max(0.0, deadline - time.monotonic())):
+                    await self._admit(cost)
+            except TimeoutError:
+                self.timeouts += 1
+                raise LLMUnavailable(f"LLM request exceeded its {self.deadline:g}s deadline")
+            # Once admitted, stalls are bounded by the client's read timeout; a deadline
+            # here would cancel whichever task is consuming the stream
+            self.in_flight += 1
+            started = False
+            try:
+                async for text in self.provider.stream(system_prompt, messages, usage):
+                    started = True
+                    yield text
+                return
+            except Exception as e:
+                if started:
+                    self.failures += 1
+                    raise
+                error = e
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+            await self._backoff(error, attempt, deadline)
+            attempt += 1
+
+    async def close(self) -> None:
+        await self.provider.close()
+
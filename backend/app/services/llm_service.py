@@ -1,21 +1,50 @@
+from collections.abc import AsyncIterator
+
 from app.config import settings
 from app.providers.anthropic_provider import AnthropicProvider
 from app.providers.base import LLMProvider
+from app.providers.fake_provider import FakeProvider
 from app.providers.openai_provider import OpenAIProvider
+from app.services.llm_gateway import LLMGateway
 
 
 class LLMService:
     def __init__(self) -> None:
         self._provider: LLMProvider | None = None
+        self._gateway: LLMGateway | None = None
 
     @property
     def provider(self) -> LLMProvider:
         if self._provider is None:
             if settings.llm_provider == "openai":
                 self._provider = OpenAIProvider()
+            elif settings.llm_provider == "fake":
+                self._provider = FakeProvider()
             else:
                 self._provider = AnthropicProvider()
         return self._provider
 
-    async def generate(self, system_prompt: str, messages: list[dict[str, str]]) -> str:
-        return await self.provider.generate(system_prompt, messages)
+    @property
+    def gateway(self) -> LLMGateway:
+        if self._gateway is None:
+            self._gateway = LLMGateway(self.provider)
+        return self._gateway
+
+    async def generate(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> str:
+        return await self.gateway.generate(system_prompt, messages, usage)
+
+    def stream(
+        self, system_prompt: str, messages: list[dict[str, str]], usage: dict | None = None
+    ) -> AsyncIterator[str]:
+        return self.gateway.stream(system_prompt, messages, usage)
+
+    def stats(self) -> dict:
+        return {"provider": settings.llm_provider, **self.gateway.stats()}
+
+    async def close(self) -> None:
+        if self._gateway is not None:
+            await self._gateway.close()
+        elif self._provider is not None:
+            await self._provider.close()
@@ -0,0 +1,123 @@
+import re
+from dataclasses import dataclass, field
+
+from app.services.duckdb_service import DuckDBService
+
+PERIOD_PLACEHOLDER = "$period"
+
+
+def _period_literal(period: str) -> str:
+    return "'" + period.replace("'", "''") + "'"
+
+
+def bind_period(sql: str, period: str) -> str:
+    return sql.replace(PERIOD_PLACEHOLDER, _period_literal(period))
+
+
+def _top_level(sql: str) -> str:
+    """``sql`` without string literals and parenthesised parts, upper-cased."""
+    text = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    depth, kept = 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0:
+            kept.append(char)
+    return " ".join("".join(kept).upper().split())
+
+
+def relies_on_row_order(sql: str) -> bool:
+    """True if the query's first row depends on an ORDER BY that vectorizing would drop.
+
+    Inside the LATERAL rewrite DuckDB discards an ORDER BY unless a LIMIT keeps it
+    meaningful, so "first row" would change for ordered multi-row metric queries.
+    """
+    top = _top_level(sql)
+    return "ORDER BY" in top and re.search(r"\bLIMIT 1\b", top) is None
+
+
+def vectorize_periods(sql: str, periods: list[str]) -> str:
+    """Rewrite a ``$period`` metric query to return ``(__period, value...)`` per period.
+
+    The metric query becomes a LATERAL subquery correlated with a VALUES list of
+    periods, which DuckDB decorrelates into a single scan of the source table.
+    """
+    values = ", ".join(f"({_period_literal(period)})" for period in periods)
+    body = sql.strip().rstrip(";").replace(PERIOD_PLACEHOLDER, "__periods.period")
+    return (
+        "SELECT __periods.period AS __period, __metric.* "
+        f"FROM (VALUES {values}) AS __periods(period), LATERAL ({body}) AS __metric"
+    )
+
+
+def _to_float(value) -> float | None:
+    return float(value) if value is not None else None
+
+
+@dataclass
+class PeriodValues:
+    values: dict[str, float | None] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+class MetricEvaluator:
+    """Evaluates metric SQL (first column of the first row) for one or many periods."""
+
+    def __init__(self, duckdb: DuckDBService) -> None:
+        self.duckdb = duckdb
+
+    async def evaluate(self, sql: str, period: str | None = None) -> float | None:
+        if period is not None:
+            sql = bind_period(sql, period)
+        _, rows, _ = await self.duckdb.execute_query_async(sql)
+        if not rows:
+            return None
+        return _to_float(next(iter(rows[0].values())))
+
+    async def evaluate_periods(self, sql: str, periods: list[str]) -> PeriodValues:
+        """Evaluate ``sql`` for every period, in one query when possible.
+
+        Periods with no rows map to None. If the vectorized query cannot be run
+        (e.g. a construct DuckDB cannot decorrelate), each period is evaluated
+        on its own so errors are reported per period.
+        """
+        periods = list(dict.fromkeys(periods))
+        if not periods:
+            return PeriodValues()
+
+        if PERIOD_PLACEHOLDER not in sql:
+            return await self._evaluate_each(sql, periods[:1], fill=periods)
+        if relies_on_row_order(sql):
+            return await self._evaluate_each(sql, periods)
+
+        try:
+            _, rows, _ = await self.duckdb.execute_query_async(vectorize_periods(sql, periods))
+            values: dict[str, float | None] = {}
+            for row in rows:
+                period, *columns = row.values()
+                if period not in values and columns:
+                    values[period] = _to_float(columns[0])
+        except Exception:
+            return await self._evaluate_each(sql, periods)
+        return PeriodValues(values={period: values.get(period) for period in periods})
+
+    async def _evaluate_each(
+        self, sql: str, periods: list[str], fill: list[str] | None = None
+    ) -> PeriodValues:
+        result = PeriodValues()
+        for period in periods:
+            try:
+                result.values[period] = await self.evaluate(sql, period)
+            except Exception as e:
+                result.errors[period] = str(e)
+        # Period-independent SQL: one evaluation stands for every period
+        for period in fill or []:
+            if period in result.errors or period in result.values:
+                continue
+            if periods[0] in result.errors:
+                result.errors[period] = result.errors[periods[0]]
+            else:
+                result.values[period] = result.values[periods[0]]
+        return result
@@ -1,13 +1,129 @@
+import asyncio
+import logging
+import time
 import uuid
+from dataclasses import dataclass, field
 
 from neo4j import AsyncDriver, AsyncGraphDatabase
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _sort_key(metric: dict) -> tuple:
+    # Same order as Cypher's ORDER BY sort_order, name (nulls last)
+    sort_order = metric.get("sort_order")
+    return (sort_order is None, sort_order or 0, metric.get("name") or "")
+
+
+async def _collect_graph(result) -> tuple[dict[str, dict], dict[str, list[str]]]:
+    """Read ``(m, child_ids)`` records into a node map and an adjacency list."""
+    nodes: dict[str, dict] = {}
+    child_ids: dict[str, list[str]] = {}
+    async for record in result:
+        node = dict(record["m"])
+        nodes[node["id"]] = node
+        child_ids[node["id"]] = record["child_ids"]
+    return nodes, child_ids
+
+
+def _build_tree(
+    root_id: str,
+    nodes: dict[str, dict],
+    child_ids: dict[str, list[str]],
+    path: set[str] | None = None,
+) -> dict:
+    """Assemble the nested tree under ``root_id``; O(n) for a tree.
+
+    Each occurrence gets its own dict, so a metric reachable from two parents
+    appears under both. Edges back to a node on the current path are skipped.
+    """
+    path = path if path is not None else set()
+    path.add(root_id)
+    children = sorted(
+        (nodes[cid] for cid in child_ids.get(root_id, []) if cid in nodes and cid not in path),
+        key=_sort_key,
+    )
+    tree = {
+        **nodes[root_id],
+        "children": [_build_tree(child["id"], nodes, child_ids, path) for child in children],
+    }
+    path.discard(root_id)
+    return tree
+
+
+@dataclass
+class MetricGraph:
+    """In-memory snapshot of all Metric nodes and HAS_CHILD edges."""
+
+    nodes: dict[str, dict]
+    child_ids: dict[str, list[str]]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def metric(self, metric_id: str) -> dict | None:
+        node = self.nodes.get(metric_id)
+        if node is None:
+            return None
+        children = [
+            self.nodes[cid] for cid in self.child_ids.get(metric_id, []) if cid in self.nodes
+        ]
+        return {**node, "children": [dict(c) for c in sorted(children, key=_sort_key)]}
+
+    def tree(self) -> list[dict]:
+        has_parent = {cid for ids in self.child_ids.values() for cid in ids}
+        roots = sorted(
+            (node for node in self.nodes.values() if node["id"] not in has_parent), key=_sort_key
+        )
+        return [_build_tree(root["id"], self.nodes, self.child_ids) for root in roots]
+
+    def subtree(self, root_id: str) -> dict | None:
+        if root_id not in self.nodes:
+            return None
+        return _build_tree(root_id, self.nodes, self.child_ids)
+
+    def subtree_flat(self, root_id: str) -> list[dict]:
+        """Breadth-first descendants of ``root_id`` (inclusive) with their ``depth``."""
+        if root_id not in self.nodes:
+            return []
+        metrics = []
+        frontier = [(root_id, frozenset({root_id}))]
+        depth = 0
+        while frontier:
+            next_frontier = []
+            for metric_id, path in frontier:
+                metrics.append({**self.nodes[metric_id], "depth": depth})
+                children = sorted(
+                    (
+                        self.nodes[cid]
+                        for cid in self.child_ids.get(metric_id, [])
+                        if cid in self.nodes and cid not in path
+                    ),
+                    key=_sort_key,
+                )
+                next_frontier.extend((c["id"], path | {c["id"]}) for c in children)
+            frontier = next_frontier
+            depth += 1
+        return metrics
+
 
 class Neo4jService:
+    """Metric hierarchy stored in Neo4j.
+
+    Reads are served from a ``MetricGraph`` snapshot that is loaded on connect,
+    invalidated by every write made through this service, and reloaded after
+    ``metric_cache_ttl_seconds`` to pick up writes made by other processes. If a
+    reload fails, the last snapshot keeps being served and the reload is retried
+    after ``metric_cache_retry_seconds``.
+    """
+
     def __init__(self) -> None:
         self._driver: AsyncDriver | None = None
+        self._graph: MetricGraph | None = None
+        self._graph_stale = True
+        self._graph_generation = 0  # bumped by every write
+        self._graph_retry_at = 0.0
+        self._graph_lock = asyncio.Lock()
 
     async def connect(self) -> None:
         self._driver = AsyncGraphDatabase.driver(
@@ -19,6 +135,7 @@ class Neo4jService:
             await session.run(
                 "CREATE CONSTRAINT metric_id IF NOT EXISTS FOR (m:Metric) REQUIRE m.id IS UNIQUE"
             )
+        await self.refresh_graph()
 
     async def close(self) -> None:
         if self._driver:
@@ -31,6 +148,48 @@ class Neo4jService:
             raise RuntimeError("Neo4j not connected")
         return self._driver
 
+    async def refresh_graph(self) -> MetricGraph:
+        generation = self._graph_generation
+        async with self.driver.session() as session:
+            result = await session.run(
+                """
+                MATCH (m:Metric)
+                OPTIONAL MATCH (m)-[:HAS_CHILD]->(child:Metric)
+                RETURN m, collect(child.id) AS child_ids
+                """
+            )
+            nodes, child_ids = await _collect_graph(result)
+        self._graph = MetricGraph(nodes, child_ids)
+        # A write that landed while loading may be missing from this snapshot
+        self._graph_stale = generation != self._graph_generation
+        return self._graph
+
+    def invalidate_graph(self) -> None:
+        self._graph_generation += 1
+        self._graph_stale = True
+        self._graph_retry_at = 0.0
+
+    async def _snapshot(self) -> MetricGraph:
+        graph = self._graph
+        now = time.monotonic()
+        expired = graph is not None and now - graph.loaded_at > settings.metric_cache_ttl_seconds
+        if graph is not None and not self._graph_stale and not expired:
+            return graph
+        if graph is not None and now < self._graph_retry_at:
+            return graph
+
+        async with self._graph_lock:
+            if self._graph is not graph:  # another task reloaded it meanwhile
+                return self._graph
+            try:
+                return await self.refresh_graph()
+            except Exception as e:
+                if graph is None:
+                    raise
+                self._graph_retry_at = now + settings.metric_cache_retry_seconds
+                logger.warning(f"Metric graph reload failed, serving cached snapshot: {e}")
+                return graph
+
     async def create_metric(
         self,
         name: str,
@@ -74,25 +233,11 @@ class Neo4jService:
                     sort_order=sort_order,
                 )
 
-            return metric
+        self.invalidate_graph()
+        return metric
 
     async def get_metric(self, metric_id: str) -> dict | None:
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (m:Metric {id: $id})
-                OPTIONAL MATCH (m)-[:HAS_CHILD]->(child:Metric)
-                RETURN m, collect(child) AS children
-                ORDER BY child.sort_order
-                """,
-                id=metric_id,
-            )
-            record = await result.single()
-            if not record:
-                return None
-            metric = dict(record["m"])
-            metric["children"] = [dict(c) for c in record["children"] if c]
-            return metric
+        return (await self._snapshot()).metric(metric_id)
 
     async def update_metric(self, metric_id: str, updates: dict) -> dict | None:
         set_clauses = []
@@ -109,7 +254,8 @@ class Neo4jService:
         async with self.driver.session() as session:
             result = await session.run(query, **params)
             record = await result.single()
-            return dict(record["m"]) if record else None
+        self.invalidate_graph()
+        return dict(record["m"]) if record else None
 
     async def delete_metric(self, metric_id: str) -> bool:
         async with self.driver.session() as session:
@@ -130,62 +276,14 @@ class Neo4jService:
                 id=metric_id,
             )
             record = await result.single()
-            return record["deleted"] > 0
+        self.invalidate_graph()
+        return record["deleted"] > 0
 
     async def get_tree(self) -> list[dict]:
-        async with self.driver.session() as session:
-            # Get root metrics (no parent)
-            result = await session.run(
-                """
-                MATCH (m:Metric)
-                WHERE NOT ()-[:HAS_CHILD]->(m)
-                RETURN m ORDER BY m.sort_order, m.name
-                """
-            )
-            roots = [dict(record["m"]) async for record in result]
-
-            # Build tree recursively
-            tree = []
-            for root in roots:
-                tree.append(await self._build_subtree(session, root))
-            return tree
+        return (await self._snapshot()).tree()
 
     async def get_subtree(self, root_id: str) -> dict | None:
-        async with self.driver.session() as session:
-            result = await session.run(
-                "MATCH (m:Metric {id: $id}) RETURN m", id=root_id
-            )
-            record = await result.single()
-            if not record:
-                return None
-            root = dict(record["m"])
-            return await self._build_subtree(session, root)
-
-    async def _build_subtree(self, session, node: dict) -> dict:
-        result = await session.run(
-            """
-            MATCH (parent:Metric {id: $id})-[:HAS_CHILD]->(child:Metric)
-            RETURN child ORDER BY child.sort_order, child.name
-            """,
-            id=node["id"],
-        )
-        children = [dict(record["child"]) async for record in result]
-        node["children"] = [await self._build_subtree(session, child) for child in children]
-        return node
+        return (await self._snapshot()).subtree(root_id)
 
     async def get_subtree_flat(self, root_id: str) -> list[dict]:
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH path = (root:Metric {id: $root_id})-[:HAS_CHILD*0..]->(descendant:Metric)
-                RETURN descendant, length(path) AS depth
-                ORDER BY depth
-                """,
-                root_id=root_id,
-            )
-            metrics = []
-            async for record in result:
-                m = dict(record["descendant"])
-                m["depth"] = record["depth"]
-                metrics.append(m)
-            return metrics
+        return (await self._snapshot()).subtree_flat(root_id)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Slack's recommended ceiling for a message's text; batches are split to stay under it
+MAX_TEXT_CHARS = 4000
+
+
+def split_batch(messages: list[str], limit: int = MAX_TEXT_CHARS) -> list[str]:
+    """Join messages with newlines into as few posts as fit within ``limit`` characters."""
+    posts: list[str] = []
+    current = ""
+    for message in messages:
+        if len(message) > limit:
+            message = message[: limit - 1] + "…"
+        if current and len(current) + 1 + len(message) <= limit:
+            current += "\n" + message
+            continue
+        if current:
+            posts.append(current)
+        current = message
+    if current:
+        posts.append(current)
+    return posts
+
+
+class SlackDispatcher:
+    """Delivers Slack webhook messages from bounded queues on a shared, pooled client.
+
+    Each webhook has its own queue and worker, so one rate-limited or failing
+    webhook doesn't hold up the others. Messages enqueued for the same webhook
+    within the batch window are joined into posts under Slack's text limit, each
+    webhook is held to a minimum interval between posts, and failed posts are
+    retried with exponential backoff (honouring Retry-After on 429).
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        queue_size: int | None = None,
+        rate_per_second: float | None = None,
+        batch_window: float | None = None,
+        max_retries: int | None = None,
+        backoff_base: float = 0.5,
+    ) -> None:
+        self._client = client
+        self._owns_client = client is None
+        self._queue_size = queue_size or settings.slack_queue_size
+        self._queues: dict[str, asyncio.Queue[str]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._started = False
+        rate = rate_per_second or settings.slack_rate_limit_per_second
+        self._min_interval = 1.0 / rate if rate > 0 else 0.0
+        self._batch_window = (
+            settings.slack_batch_window_seconds if batch_window is None else batch_window
+        )
+        self._max_retries = settings.slack_max_retries if max_retries is None else max_retries
+        self._backoff_base = backoff_base
+        self._next_post_at: dict[str, float] = {}
+        self._webhook_locks: dict[str, asyncio.Lock] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10)
+        return self._client
+
+    def start(self) -> None:
+        self._started = True
+        for webhook_url in self._queues:
+            self._start_worker(webhook_url)
+
+    def _start_worker(self, webhook_url: str) -> None:
+        if webhook_url not in self._workers:
+            self._workers[webhook_url] = asyncio.create_task(self._run(webhook_url))
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        if self._workers:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(queue.join() for queue in self._queues.values())),
+                    drain_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._pending()} undelivered Slack message(s)")
+            for worker in self._workers.values():
+                worker.cancel()
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+            self._workers.clear()
+        self._started = False
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _pending(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def enqueue(self, webhook_url: str, message: str) -> bool:
+        """Queue a message without waiting on Slack. Returns False if the queue is full."""
+        # queue_size bounds the messages waiting across all webhooks
+        if self._pending() >= self._queue_size:
+            logger.warning("Slack queue full, dropping notification")
+            return False
+        self._queues.setdefault(webhook_url, asyncio.Queue()).put_nowait(message)
+        if self._started:
+            self._start_worker(webhook_url)
+        return True
+
+    async def send(self, webhook_url: str, message: str) -> bool:
+        """Post immediately (still rate limited and retried) and report delivery."""
+        lock = self._webhook_locks.setdefault(webhook_url, asyncio.Lock())
+        async with lock:
+            delay = self._next_post_at.get(webhook_url, 0.0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                return await self._post_with_retries(webhook_url, message)
+            finally:
+                self._next_post_at[webhook_url] = time.monotonic() + self._min_interval
+
+    async def _run(self, webhook_url: str) -> None:
+        queue = self._queues[webhook_url]
+        while True:
+            batch = [await queue.get()]
+            if self._batch_window:
+                await asyncio.sleep(self._batch_window)
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                for text in split_batch(batch):
+                    await self.send(webhook_url, text)
+            except Exception as e:
+                logger.error(f"Slack dispatch failed: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _post_with_retries(self, webhook_url: str, message: str) -> bool:
+        for attempt in range(self._max_retries + 1):
+            retry_after = None
+            try:
+                resp = await self.client.post(webhook_url, json={"text": message})
+                if resp.status_code == 200:
+                    return True
+                if resp.status_code not in RETRYABLE_STATUS:
+                    logger.warning(f"Slack webhook rejected message: HTTP {resp.status_code}")
+                    return False
+                retry_after = resp.headers.get("Retry-After")
+            except httpx.HTTPError as e:
+                logger.warning(f"Slack webhook request failed: {e}")
+
+            if attempt == self._max_retries:
+                break
+            delay = self._backoff_base * 2**attempt
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+        return False
@@ -0,0 +1,128 @@
+"""In-memory LRU cache for DuckDB query results.
+
+Entries are keyed by normalized SQL plus the version stamp of every table the
+query may read, so uploading or dropping a dataset makes stale results
+unreachable without having to track which cached queries touched it.
+"""
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_WHITESPACE = re.compile(r"\s+")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+# Results of these depend on something other than the tables a query reads
+_VOLATILE = re.compile(
+    r"\b(random|uuid|gen_random_uuid|nextval|setseed|now|today|current_date|current_time"
+    r"|current_timestamp|get_current_time|get_current_timestamp|read_\w+|glob)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and trailing semicolons outside of quoted literals."""
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else _WHITESPACE.sub(" ", part) for i, part in enumerate(parts)
+    )
+
+
+def referenced_identifiers(sql: str) -> frozenset[str]:
+    """Lower-cased identifiers in ``sql``: a superset of the tables it can read."""
+    names: set[str] = set()
+    for i, part in enumerate(_QUOTED.split(sql)):
+        if not i % 2:
+            names.update(_IDENTIFIER.findall(part))
+        elif part.startswith('"'):
+            names.add(part[1:-1].replace('""', '"'))
+    return frozenset(name.lower() for name in names)
+
+
+def is_volatile(sql: str) -> bool:
+    unquoted = "".join(_QUOTED.split(sql)[::2])
+    return bool(_VOLATILE.search(unquoted))
+
+
+def estimate_rows_nbytes(rows: list[dict], sample_size: int = 100) -> int:
+    if not rows:
+        return 0
+    sample = rows[:sample_size]
+    sampled = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+        for row in sample
+    )
+    return sys.getsizeof(rows) + sampled * len(rows) // len(sample)
+
+
+class QueryResultCache:
+    """Thread-safe LRU bounded by entry count and approximate size in bytes.
+
+    Results larger than a quarter of the byte budget are not cached, so a single
+    huge result cannot flush every dashboard query out of the cache.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[Any, int, frozenset[str]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: Any, nbytes: int, tables: frozenset[str]) -> None:
+        if nbytes > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[1]
+            self._entries[key] = (value, nbytes, tables)
+            self._bytes += nbytes
+            while self._entries and (
+                self._bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                _, (_, evicted_bytes, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+
+    def invalidate_tables(self, tables: set[str]) -> None:
+        """Drop entries that read any of ``tables`` (already unreachable; frees memory)."""
+        with self._lock:
+            stale = [key for key, (_, _, read) in self._entries.items() if read & tables]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+            }
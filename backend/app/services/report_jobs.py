@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.config import settings
+from app.models.database import async_session_factory
+from app.services.duckdb_service import DuckDBService, QueryScope
+from app.services.neo4j_service import Neo4jService
+from app.services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+FINISHED = {"completed", "failed", "cancelled"}
+
+
+@dataclass
+class ReportJob:
+    id: str
+    schedule_id: str
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    metrics_done: int = 0
+    metrics_total: int = 0
+    report_id: str | None = None
+    error: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+    queries: QueryScope = field(
+        default_factory=lambda: QueryScope(background=True), repr=False
+    )
+
+
+class ReportJobManager:
+    """Runs report generation in the background, at most ``max_concurrent`` at a time.
+
+    On-demand runs are submitted as jobs that can be polled and cancelled; scheduled
+    runs go through :meth:`run` and share the same concurrency cap. Either kind can be
+    cancelled, which also interrupts its DuckDB queries; those run on DuckDB's
+    background pool, away from interactive queries. Job state lives
+    in this process, and finished jobs are kept until ``max_finished`` newer ones exist.
+    """
+
+    def __init__(
+        self,
+        duckdb: DuckDBService,
+        neo4j: Neo4jService,
+        max_concurrent: int | None = None,
+        max_finished: int = 100,
+    ) -> None:
+        self.duckdb = duckdb
+        self.neo4j = neo4j
+        self.max_finished = max_finished
+        self._semaphore = asyncio.Semaphore(max_concurrent or settings.report_max_concurrent_runs)
+        self._jobs: dict[str, ReportJob] = {}
+
+    def submit(self, schedule_id: str) -> ReportJob:
+        job = ReportJob(id=str(uuid.uuid4()), schedule_id=schedule_id)
+        job.task = asyncio.create_task(self._execute(job))
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    async def run(self, schedule_id: str) -> ReportJob:
+        """Run a report to completion under the shared cap, waiting for it.
+
+        The run still gets its own task, so it is listed and cancellable like a
+        submitted job; cancelling the caller cancels the run too.
+        """
+        job = self.submit(schedule_id)
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    def get(self, job_id: str) -> ReportJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self, schedule_id: str | None = None) -> list[ReportJob]:
+        jobs = [j for j in self._jobs.values() if schedule_id in (None, j.schedule_id)]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    async def cancel(self, job_id: str) -> ReportJob | None:
+        job = self._jobs.get(job_id)
+        if job and job.status not in FINISHED and job.task is not None:
+            job.queries.interrupt()
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    async def shutdown(self) -> None:
+        running = [j for j in self._jobs.values() if j.task and not j.task.done()]
+        for job in running:
+            job.queries.interrupt()
+            job.task.cancel()
+        tasks = [job.task for job in running]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _execute(self, job: ReportJob) -> None:
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                job.started_at = datetime.utcnow()
+                with job.queries:
+                    async with async_session_factory() as db:
+                        service = ReportService(db, self.duckdb, self.neo4j)
+                        report = await service.generate_report(
+                            job.schedule_id, on_progress=self._progress(job)
+                        )
+            if report is None:
+                job.status = "failed"
+                job.error = "Schedule not found or no metrics"
+            else:
+                job.status = "completed"
+                job.report_id = report.id
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Report job {job.id} failed for {job.schedule_id}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    @staticmethod
+    def _progress(job: ReportJob) -> Callable[[int, int], None]:
+        def update(done: int, total: int) -> None:
+            job.metrics_done = done
+            job.metrics_total = total
+
+        return update
+
+    def _prune(self) -> None:
+        finished = [j for j in self.list() if j.status in FINISHED]
+        for job in finished[self.max_finished :]:
+            del self._jobs[job.id]
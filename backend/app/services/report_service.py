@@ -1,14 +1,49 @@
-import statistics
+import asyncio
+import time
+from collections.abc import Callable
 from datetime import datetime
 
-from sqlalchemy import select
+import pandas as pd
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.report import MetricSnapshot, Report, ReportSchedule
 from app.services.duckdb_service import DuckDBService
+from app.services.metric_evaluator import MetricEvaluator
 from app.services.neo4j_service import Neo4jService
 
 
+ANOMALY_HISTORY_LIMIT = 12
+ANOMALY_MIN_HISTORY = 3
+ANOMALY_Z_THRESHOLD = 2.0
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def score_anomalies(history: pd.DataFrame, current: dict[str, float]) -> dict[str, bool]:
+    """Flag metrics whose current value is more than 2 sample stdevs from their history mean.
+
+    ``history`` has ``metric_id`` and ``value`` columns; scoring runs over all metrics at once.
+    """
+    if history.empty or not current:
+        return {metric_id: False for metric_id in current}
+    stats = history.dropna(subset=["value"]).groupby("metric_id")["value"].agg(
+        ["mean", "std", "count"]
+    )
+    stats = stats.reindex(list(current))
+    values = pd.Series(current, dtype="float64")
+    z_scores = (values - stats["mean"]).abs() / stats["std"]
+    flags = (
+        (stats["count"] >= ANOMALY_MIN_HISTORY)
+        & (stats["std"] > 0)
+        & (z_scores > ANOMALY_Z_THRESHOLD)
+    )
+    return {metric_id: bool(flag) for metric_id, flag in flags.items()}
+
+
 class ReportService:
     def __init__(
         self, db: AsyncSession, duckdb: DuckDBService, neo4j: Neo4jService
@@ -16,8 +51,12 @@ class ReportService:
         self.db = db
         self.duckdb = duckdb
         self.neo4j = neo4j
+        self.evaluator = MetricEvaluator(duckdb)
 
-    async def generate_report(self, schedule_id: str) -> Report | None:
+    async def generate_report(
+        self, schedule_id: str, on_progress: Callable[[int, int], None] | None = None
+    ) -> Report | None:
+        started = time.perf_counter()
         schedule = await self.db.get(ReportSchedule, schedule_id)
         if not schedule:
             return None
@@ -31,15 +70,50 @@ class ReportService:
             prev_period = f"{now.year}-{now.month - 1:02d}"
 
         # Get full metric subtree
+        phase = time.perf_counter()
         metrics = await self.neo4j.get_subtree_flat(schedule.root_metric_id)
         if not metrics:
             return None
-
-        report_data = {"metrics": [], "period": current_period, "prev_period": prev_period}
-
-        for metric in metrics:
-            metric_result = await self._compute_metric(metric, current_period, prev_period)
-            report_data["metrics"].append(metric_result)
+        load_ms = _elapsed_ms(phase)
+        done = 0
+        if on_progress:
+            on_progress(done, len(metrics))
+
+        # DuckDB work fans out across worker cursors; gather keeps tree order
+        phase = time.perf_counter()
+        semaphore = asyncio.Semaphore(settings.report_metric_concurrency)
+
+        async def compute(metric: dict) -> tuple[dict, float]:
+            nonlocal done
+            async with semaphore:
+                metric_started = time.perf_counter()
+                result = await self._compute_metric(metric, current_period, prev_period)
+            done += 1
+            if on_progress:
+                on_progress(done, len(metrics))
+            return result, _elapsed_ms(metric_started)
+
+        computed = await asyncio.gather(*(compute(metric) for metric in metrics))
+        compute_ms = _elapsed_ms(phase)
+
+        # One bulk insert and one history query for the whole report
+        phase = time.perf_counter()
+        results = [metric_result for metric_result, _ in computed]
+        await self._record_snapshots(results, current_period)
+        await self._flag_anomalies(results)
+        report_data = {"metrics": results, "period": current_period, "prev_period": prev_period}
+        anomaly_ms = _elapsed_ms(phase)
+
+        report_data["timings"] = {
+            "total_ms": _elapsed_ms(started),
+            "load_metrics_ms": load_ms,
+            "compute_ms": compute_ms,
+            "anomaly_ms": anomaly_ms,
+            "concurrency": settings.report_metric_concurrency,
+            "per_metric_ms": {
+                metric_result["metric_id"]: ms for metric_result, ms in computed
+            },
+        }
 
         report = Report(
             schedule_id=schedule_id,
@@ -74,35 +148,13 @@ class ReportService:
             result["error"] = "No SQL query defined"
             return result
 
-        # Execute for current period
-        try:
-            current_sql = sql.replace("$period", f"'{current_period}'")
-            _, rows, _ = self.duckdb.execute_query(current_sql)
-            if rows:
-                first_val = list(rows[0].values())[0]
-                result["current_value"] = float(first_val) if first_val is not None else None
-        except Exception as e:
-            result["error"] = str(e)
+        # Current and previous period in one scan; only a current-period failure is an error
+        evaluation = await self.evaluator.evaluate_periods(sql, [current_period, prev_period])
+        if current_period in evaluation.errors:
+            result["error"] = evaluation.errors[current_period]
             return result
-
-        # Store snapshot
-        if result["current_value"] is not None:
-            snapshot = MetricSnapshot(
-                metric_id=metric["id"],
-                value=result["current_value"],
-                period=current_period,
-            )
-            self.db.add(snapshot)
-
-        # Execute for previous period
-        try:
-            prev_sql = sql.replace("$period", f"'{prev_period}'")
-            _, rows, _ = self.duckdb.execute_query(prev_sql)
-            if rows:
-                first_val = list(rows[0].values())[0]
-                result["previous_value"] = float(first_val) if first_val is not None else None
-        except Exception:
-            pass
+        result["current_value"] = evaluation.values.get(current_period)
+        result["previous_value"] = evaluation.values.get(prev_period)
 
         # Compute delta
         if result["current_value"] is not None and result["previous_value"] is not None:
@@ -112,31 +164,45 @@ class ReportService:
                     (result["delta"] / abs(result["previous_value"])) * 100, 2
                 )
 
-        # Anomaly detection: check against historical snapshots
-        result["is_anomaly"] = await self._check_anomaly(metric["id"], result["current_value"])
-
         return result
 
-    async def _check_anomaly(self, metric_id: str, current_value: float | None) -> bool:
-        if current_value is None:
-            return False
-
-        stmt = (
-            select(MetricSnapshot.value)
-            .where(MetricSnapshot.metric_id == metric_id)
-            .order_by(MetricSnapshot.period.desc())
-            .limit(12)
+    async def _record_snapshots(self, results: list[dict], current_period: str) -> None:
+        rows = [
+            {"metric_id": r["metric_id"], "value": r["current_value"], "period": current_period}
+            for r in results
+            if r["current_value"] is not None
+        ]
+        if rows:
+            await self.db.execute(insert(MetricSnapshot), rows)
+
+    async def _flag_anomalies(self, results: list[dict]) -> None:
+        # Anomaly detection: check against historical snapshots (including the new ones)
+        current = {
+            r["metric_id"]: r["current_value"]
+            for r in results
+            if r["error"] is None and r["current_value"] is not None
+        }
+        history = await self._load_history(list(current))
+        flags = score_anomalies(history, current)
+        for r in results:
+            r["is_anomaly"] = flags.get(r["metric_id"], False)
+
+    async def _load_history(self, metric_ids: list[str]) -> pd.DataFrame:
+        """Latest snapshots per metric, fetched for every metric in one query."""
+        if not metric_ids:
+            return pd.DataFrame(columns=["metric_id", "value"])
+        recency = (
+            func.row_number()
+            .over(partition_by=MetricSnapshot.metric_id, order_by=MetricSnapshot.period.desc())
+            .label("recency")
+        )
+        ranked = (
+            select(MetricSnapshot.metric_id, MetricSnapshot.value, recency)
+            .where(MetricSnapshot.metric_id.in_(metric_ids))
+            .subquery()
+        )
+        stmt = select(ranked.c.metric_id, ranked.c.value).where(
+            ranked.c.recency <= ANOMALY_HISTORY_LIMIT
         )
         result = await self.db.execute(stmt)
-        values = [row[0] for row in result.fetchall() if row[0] is not None]
-
-        if len(values) < 3:
-            return False
-
-        mean = statistics.mean(values)
-        stdev = statistics.stdev(values)
-        if stdev == 0:
-            return False
-
-        z_score = abs(current_value - mean) / stdev
-        return z_score > 2.0
+        return pd.DataFrame(result.all(), columns=["metric_id", "value"])
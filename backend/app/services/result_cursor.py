@@ -0,0 +1,139 @@
+"""Server-side result cursors for paging through large query results.
+
+A ``ResultCursor`` keeps a DuckDB cursor open on a result set and pulls record
+batches from it only as pages are requested, so a client can scroll through
+millions of rows while the backend holds at most about one page in memory.
+"""
+
+import secrets
+import threading
+import time
+from typing import Any
+
+import duckdb
+import pyarrow as pa
+
+
+def open_arrow_reader(result: Any, batch_size: int) -> pa.RecordBatchReader:
+    # ``fetch_record_batch`` was renamed to ``to_arrow_reader`` in newer DuckDB releases.
+    open_reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+    return open_reader(batch_size)
+
+
+class ResultCursor:
+    def __init__(self, cursor: duckdb.DuckDBPyConnection, sql: str, batch_size: int) -> None:
+        self._cursor = cursor
+        self._reader = open_arrow_reader(cursor.execute(sql), batch_size)
+        self._pending: list[pa.RecordBatch] = []
+        self._pending_rows = 0
+        self._exhausted = False
+        self._lock = threading.Lock()
+        self.position = 0
+
+    @property
+    def schema(self) -> pa.Schema:
+        return self._reader.schema
+
+    @property
+    def has_more(self) -> bool:
+        return self._pending_rows > 0 or not self._exhausted
+
+    def _pull(self) -> None:
+        try:
+            batch = self._reader.read_next_batch()
+        except StopIteration:
+            self._exhausted = True
+            return
+        if batch.num_rows:
+            self._pending.append(batch)
+            self._pending_rows += batch.num_rows
+
+    def read(self, max_rows: int) -> pa.Table:
+        """Return the next ``max_rows`` rows (fewer at the end of the result)."""
+        with self._lock:
+            while self._pending_rows < max_rows and not self._exhausted:
+                self._pull()
+
+            buffered = pa.Table.from_batches(self._pending, schema=self.schema)
+            page = buffered.slice(0, max_rows)
+            rest = buffered.slice(max_rows)
+            self._pending = rest.to_batches()
+            self._pending_rows = rest.num_rows
+            self.position += page.num_rows
+
+            # Look one batch ahead so has_more is exact at page boundaries
+            if not self._pending_rows and not self._exhausted:
+                self._pull()
+            return page
+
+    def close(self) -> None:
+        with self._lock:
+            self._pending = []
+            self._pending_rows = 0
+            self._exhausted = True
+            self._cursor.close()
+
+
+class ResultCursorRegistry:
+    """Open result cursors addressable by page token, expired after ``ttl_seconds`` idle.
+
+    A page token encodes the cursor id and the row offset it resumes from, so a
+    replayed or out-of-order token is rejected instead of silently skipping rows.
+    A cursor is taken out of the registry while a page is read from it and
+    parked again afterwards, which gives each request exclusive use of it.
+    """
+
+    def __init__(self, ttl_seconds: int, max_open: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_open = max_open
+        self._cursors: dict[str, tuple[ResultCursor, float]] = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float) -> list[ResultCursor]:
+        expired = [cid for cid, (_, expires_at) in self._cursors.items() if expires_at <= now]
+        return [self._cursors.pop(cid)[0] for cid in expired]
+
+    def park(self, cursor: ResultCursor, cursor_id: str | None = None) -> str:
+        """Store ``cursor`` until its next page is requested and return the page token."""
+        now = time.monotonic()
+        cursor_id = cursor_id or secrets.token_urlsafe(16)
+        with self._lock:
+            to_close = self._evict_expired(now)
+            while len(self._cursors) >= self.max_open:
+                oldest = min(self._cursors, key=lambda cid: self._cursors[cid][1])
+                to_close.append(self._cursors.pop(oldest)[0])
+            self._cursors[cursor_id] = (cursor, now + self.ttl_seconds)
+        for stale in to_close:
+            stale.close()
+        return f"{cursor_id}.{cursor.position}"
+
+    def claim(self, page_token: str) -> tuple[str, ResultCursor]:
+        """Take the cursor for ``page_token``; raises ``KeyError`` if unknown, expired or stale."""
+        cursor_id, _, position = page_token.rpartition(".")
+        with self._lock:
+            to_close = self._evict_expired(time.monotonic())
+            entry = self._cursors.get(cursor_id)
+            if entry and str(entry[0].position) == position:
+                del self._cursors[cursor_id]
+            else:
+                entry = None
+        for stale in to_close:
+            stale.close()
+        if entry is None:
+            raise KeyError(page_token)
+        return cursor_id, entry[0]
+
+    def release(self, page_token: str) -> bool:
+        cursor_id, _, _ = page_token.rpartition(".")
+        with self._lock:
+            entry = self._cursors.pop(cursor_id, None)
+        if entry:
+            entry[0].close()
+        return entry is not None
+
+    def close_all(self) -> None:
+        with self._lock:
+            cursors = [cursor for cursor, _ in self._cursors.values()]
+            self._cursors.clear()
+        for cursor in cursors:
+            cursor.close()
@@ -0,0 +1,151 @@
+"""Content negotiation and serialization for Arrow-backed query results.
+
+Results fetched as a ``pyarrow.Table`` never pass through per-row Python dicts:
+they are either written as an Arrow IPC stream or laid out column by column.
+Columnar JSON is encoded from the Arrow arrays with compute kernels; only
+column types without a vectorized encoding are converted to Python values.
+"""
+
+import io
+import json
+from collections.abc import AsyncIterator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pydantic_core
+from fastapi import Response
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.querypilot.columnar+json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_COLUMNAR_FORMATS = (ARROW_STREAM_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE)
+
+
+def negotiate(accept: str | None) -> str | None:
+    """Return the columnar media type requested by ``accept``, or None for row JSON."""
+    if not accept:
+        return None
+    requested = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+    for media_type in requested:
+        if media_type in _COLUMNAR_FORMATS:
+            return media_type
+    return None
+
+
+def _text(value: str) -> pa.Scalar:
+    return pa.scalar(value, pa.large_string())
+
+
+def _quoted(strings: pa.ChunkedArray) -> pa.ChunkedArray:
+    return pc.binary_join_element_wise(_text('"'), strings, _text('"'), _text(""))
+
+
+def _encode_values(column: pa.ChunkedArray) -> pa.ChunkedArray | None:
+    """Each value of ``column`` as a JSON token, or None if there is no vectorized encoding.
+
+    Matches the previous pydantic encoding: non-finite floats become null and
+    decimals are strings.
+    """
+    kind = column.type
+    if pa.types.is_dictionary(kind):
+        column = column.cast(kind.value_type)
+        kind = kind.value_type
+    if pa.types.is_null(kind):
+        return pa.chunked_array([pa.nulls(len(column), pa.large_string())])
+    if pa.types.is_integer(kind) or pa.types.is_boolean(kind):
+        return column.cast(pa.large_string())
+    if pa.types.is_floating(kind):
+        return pc.if_else(pc.is_finite(column), column.cast(pa.large_string()), None)
+    if pa.types.is_decimal(kind) or pa.types.is_date(kind) or pa.types.is_time(kind):
+        return _quoted(column.cast(pa.large_string()))
+    if pa.types.is_timestamp(kind):
+        text = pc.replace_substring(column.cast(pa.large_string()), " ", "T", max_replacements=1)
+        return _quoted(text)
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        text = column.cast(pa.large_string())
+        # Control characters need \u escapes; leave those rare columns to pydantic
+        if pc.any(pc.match_substring_regex(text, r"[\x00-\x1f]")).as_py():
+            return None
+        text = pc.replace_substring(text, "\\", "\\\\")
+        return _quoted(pc.replace_substring(text, '"', '\\"'))
+    return None
+
+
+def _column_json(column: pa.ChunkedArray) -> str:
+    encoded = _encode_values(column)
+    if encoded is None:
+        return pydantic_core.to_json(column.to_pylist()).decode()
+    parts = []
+    for chunk in pc.fill_null(encoded, "null").chunks:
+        if len(chunk):
+            row = pa.ListArray.from_arrays([0, len(chunk)], chunk)
+            parts.append(pc.binary_join(row, _text(","))[0].as_py())
+    return "[" + ",".join(parts) + "]"
+
+
+def to_columnar_json(table: pa.Table, **extra) -> str:
+    """``{"columns": [...], "data": [[...], ...], "row_count": n, **extra}`` as JSON."""
+    data = ",".join(_column_json(column) for column in table.columns)
+    header = json.dumps(table.column_names)
+    tail = "".join(f",{json.dumps(key)}:{json.dumps(value)}" for key, value in extra.items())
+    return f'{{"columns":{header},"data":[{data}],"row_count":{table.num_rows}{tail}}}'
+
+
+def to_ipc_bytes(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def columnar_response(
+    table: pa.Table,
+    media_type: str,
+    headers: dict[str, str] | None = None,
+    **extra,
+) -> Response:
+    """Serialize ``table`` as ``media_type``.
+
+    ``extra`` fields are added to the columnar JSON body, and are sent as ``X-``
+    headers for Arrow IPC.
+    """
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        arrow_headers = {"X-Row-Count": str(table.num_rows), **(headers or {})}
+        for key, value in extra.items():
+            if value is None:
+                continue
+            arrow_headers[f"X-{key.replace('_', '-').title()}"] = str(value)
+        return Response(content=to_ipc_bytes(table), media_type=media_type, headers=arrow_headers)
+
+    return Response(
+        content=to_columnar_json(table, **extra), media_type=media_type, headers=headers
+    )
+
+
+async def iter_ndjson(schema: pa.Schema, chunks: AsyncIterator[pa.Table]) -> AsyncIterator[bytes]:
+    """Emit a ``{"columns": [...]}`` header line, then one JSON object per row."""
+    yield (json.dumps({"columns": schema.names}) + "\n").encode()
+    async for chunk in chunks:
+        lines = [json.dumps(row, default=str) for row in chunk.to_pylist()]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def iter_arrow_ipc(
+    schema: pa.Schema, chunks: AsyncIterator[pa.Table]
+) -> AsyncIterator[bytes]:
+    """Emit an Arrow IPC stream incrementally, one message group per chunk."""
+    buffer = io.BytesIO()
+
+    def drain() -> bytes:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        yield drain()
+        async for chunk in chunks:
+            writer.write_table(chunk)
+            yield drain()
+    yield drain()
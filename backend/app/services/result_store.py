@@ -0,0 +1,84 @@
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+
+def _rows_table(columns: list[str], rows: list[dict]) -> pa.Table:
+    if not rows:
+        return pa.table({name: pa.array([], pa.null()) for name in columns})
+    return pa.Table.from_pylist(rows).select(columns)
+
+
+class ResultStore:
+    """Keeps full chat query results as zstd Parquet files keyed by message id.
+
+    Only a JSON-safe preview of ``message_result_preview_rows`` rows goes into
+    ``Message.result_data``; when the result is larger than that, the full result
+    is written here and flagged with ``"stored": True`` so it can be streamed back.
+    """
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = root or settings.data_dir / "results"
+
+    def path(self, message_id: str) -> Path:
+        return self.root / f"{message_id}.parquet"
+
+    async def save(self, message_id: str, result_data: dict | None) -> dict | None:
+        """Spill ``result_data`` if it is large; returns what to keep in SQLite."""
+        if not result_data:
+            return result_data
+        columns, rows = result_data["columns"], result_data["rows"]
+        preview_rows = settings.message_result_preview_rows
+        stored = len(rows) > preview_rows
+        if stored:
+            await asyncio.to_thread(self._write, message_id, columns, rows)
+        return {
+            **result_data,
+            "rows": jsonable_encoder(rows[:preview_rows]),
+            "row_count": result_data.get("row_count", len(rows)),
+            "truncated": stored,
+            "stored": stored,
+        }
+
+    def _write(self, message_id: str, columns: list[str], rows: list[dict]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        target = self.path(message_id)
+        partial = target.with_suffix(".parquet.tmp")
+        pq.write_table(
+            _rows_table(columns, rows),
+            partial,
+            compression="zstd",
+            row_group_size=settings.stream_batch_size,
+        )
+        os.replace(partial, target)
+
+    def schema(self, message_id: str, result_data: dict) -> pa.Schema:
+        if result_data.get("stored"):
+            return pq.read_schema(self.path(message_id))
+        return _rows_table(result_data["columns"], result_data["rows"]).schema
+
+    async def iter_batches(
+        self, message_id: str, result_data: dict, batch_size: int
+    ) -> AsyncIterator[pa.Table]:
+        """Yield the full result; small results come straight from ``result_data``."""
+        if not result_data.get("stored"):
+            yield _rows_table(result_data["columns"], result_data["rows"])
+            return
+        parquet = await asyncio.to_thread(pq.ParquetFile, self.path(message_id))
+        batches = parquet.iter_batches(batch_size=batch_size)
+        try:
+            while batch := await asyncio.to_thread(next, batches, None):
+                yield pa.Table.from_batches([batch])
+        finally:
+            parquet.close()
+
+    def delete(self, message_ids: list[str]) -> None:
+        for message_id in message_ids:
+            self.path(message_id).unlink(missing_ok=True)
@@ -1,72 +1,219 @@
+import asyncio
 import logging
+import math
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.alarm import Alarm
 from app.models.database import async_session_factory
 from app.models.report import ReportSchedule
 from app.services.alarm_service import AlarmService
 from app.services.duckdb_service import DuckDBService
+from app.services.job_lease import JobLeases, latest_fire_time
 from app.services.neo4j_service import Neo4jService
-from app.services.report_service import ReportService
+from app.services.notification_service import SlackDispatcher
+from app.services.report_jobs import ReportJobManager
 
 logger = logging.getLogger(__name__)
 
+# Interval jobs are anchored to a fixed instant so every worker computes the same fire times
+INTERVAL_ANCHOR = datetime(2000, 1, 1, tzinfo=timezone.utc)
+SYNC_JOB_ID = "sync_jobs"
+ALARM_JOB_ID = "alarm_checks"
+
 
 class SchedulerService:
-    def __init__(self, duckdb: DuckDBService, neo4j: Neo4jService) -> None:
-        self.scheduler = AsyncIOScheduler()
+    """Runs alarm and report jobs; safe to start in every API worker process.
+
+    Each worker schedules every job, reconciles its jobs with SQLite periodically
+    (changes made through another worker's API show up within
+    ``scheduler_sync_seconds``), and only runs a due job after claiming its fire
+    time through :class:`JobLeases`. A run whose worker died is rerun by another
+    worker once its lease expires.
+    """
+
+    def __init__(
+        self,
+        duckdb: DuckDBService,
+        neo4j: Neo4jService,
+        notifier: SlackDispatcher,
+        report_jobs: ReportJobManager,
+    ) -> None:
+        self.scheduler = AsyncIOScheduler(
+            job_defaults={
+                "coalesce": True,
+                "max_instances": 1,
+                "misfire_grace_time": settings.scheduler_misfire_grace_seconds,
+            }
+        )
         self.duckdb = duckdb
         self.neo4j = neo4j
+        self.notifier = notifier
+        self.report_jobs = report_jobs
+        self.leases = JobLeases()
+        # Active alarm ids by check interval; one job ticks at the intervals' GCD and
+        # evaluates every alarm due at that tick together
+        self._alarm_buckets: dict[int, set[str]] = {}
+        self._alarm_tick: int | None = None
+        self._report_crons: dict[str, str] = {}
+        # Catch-up and retried runs started outside APScheduler
+        self._tasks: set[asyncio.Task] = set()
 
     async def start(self) -> None:
-        await self._load_alarm_jobs()
-        await self._load_report_jobs()
+        await self._sync_jobs()
+        self.scheduler.add_job(
+            self._sync_jobs,
+            trigger=IntervalTrigger(seconds=settings.scheduler_sync_seconds),
+            id=SYNC_JOB_ID,
+            replace_existing=True,
+        )
         self.scheduler.start()
-        logger.info("Scheduler started")
+        self._spawn(self._catch_up())
+        logger.info(f"Scheduler started ({self.leases.owner})")
 
     async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
         self.scheduler.shutdown(wait=False)
         logger.info("Scheduler stopped")
 
-    async def _load_alarm_jobs(self) -> None:
+    async def _sync_jobs(self) -> None:
         async with async_session_factory() as db:
-            result = await db.execute(select(Alarm).where(Alarm.is_active == True))
-            alarms = result.scalars().all()
-            for alarm in alarms:
-                self.add_alarm_job(alarm.id, alarm.check_interval)
+            alarms = (
+                await db.execute(
+                    select(Alarm.id, Alarm.check_interval).where(Alarm.is_active == True)
+                )
+            ).all()
+            schedules = (
+                await db.execute(
+                    select(ReportSchedule.id, ReportSchedule.cron_expression).where(
+                        ReportSchedule.is_active == True
+                    )
+                )
+            ).all()
 
-    async def _load_report_jobs(self) -> None:
-        async with async_session_factory() as db:
-            result = await db.execute(
-                select(ReportSchedule).where(ReportSchedule.is_active == True)
-            )
-            schedules = result.scalars().all()
-            for schedule in schedules:
-                self.add_report_job(schedule.id, schedule.cron_expression)
+        active_alarms = {alarm_id for alarm_id, _ in alarms}
+        for bucket in list(self._alarm_buckets.values()):
+            for alarm_id in bucket - active_alarms:
+                self.remove_alarm_job(alarm_id)
+        for alarm_id, interval_seconds in alarms:
+            if alarm_id not in self._alarm_buckets.get(interval_seconds, ()):
+                self.add_alarm_job(alarm_id, interval_seconds)
+
+        active_schedules = dict(schedules)
+        for schedule_id in set(self._report_crons) - set(active_schedules):
+            self.remove_report_job(schedule_id)
+        for schedule_id, cron_expression in active_schedules.items():
+            if self._report_crons.get(schedule_id) != cron_expression:
+                self.add_report_job(schedule_id, cron_expression)
+
+        if self.scheduler.running:
+            await self._retry_abandoned()
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _run_now(self, job_ids: set[str]) -> None:
+        """Start the given jobs concurrently; each still has to claim its fire time."""
+        for job in self.scheduler.get_jobs():
+            if job.id in job_ids:
+                self._spawn(job.func(*job.args))
+
+    async def _catch_up(self) -> None:
+        """Run each previously-run job once if its latest fire time was missed while down."""
+        try:
+            self._run_now(await self.leases.known_jobs())
+        except Exception as e:
+            logger.error(f"Scheduler catch-up failed: {e}")
+
+    async def _retry_abandoned(self) -> None:
+        """Rerun jobs whose claimed run expired unfinished, e.g. when its worker died."""
+        try:
+            self._run_now(await self.leases.abandoned_jobs())
+        except Exception as e:
+            logger.error(f"Could not check for abandoned jobs: {e}")
+
+    async def _run_exclusive(
+        self, job_id: str, func: Callable[..., Awaitable[None]], *args
+    ) -> None:
+        job = self.scheduler.get_job(job_id)
+        if job is None:
+            return
+        fire_time = latest_fire_time(job.trigger, datetime.now(timezone.utc))
+        if fire_time is None:
+            return
+        try:
+            claimed = await self.leases.claim(job_id, fire_time)
+        except Exception as e:
+            logger.error(f"Could not claim {job_id}: {e}")
+            return
+        if not claimed:
+            return
+        heartbeat = asyncio.create_task(self._renew_lease(job_id, fire_time))
+        try:
+            await func(*args)
+        finally:
+            heartbeat.cancel()
+        # Left incomplete if the run raised or was cancelled: the lease expires and
+        # _retry_abandoned runs it again
+        try:
+            await self.leases.complete(job_id, fire_time)
+        except Exception as e:
+            logger.error(f"Could not mark {job_id} complete: {e}")
+
+    async def _renew_lease(self, job_id: str, fire_time: datetime) -> None:
+        while True:
+            await asyncio.sleep(self.leases.lease_seconds / 3)
+            try:
+                if not await self.leases.renew(job_id, fire_time):
+                    logger.warning(f"Lost the lease on {job_id}; another worker may rerun it")
+                    return
+            except Exception as e:
+                logger.error(f"Could not renew the lease on {job_id}: {e}")
 
     def add_alarm_job(self, alarm_id: str, interval_seconds: int) -> None:
-        job_id = f"alarm_{alarm_id}"
+        self.remove_alarm_job(alarm_id)
+        self._alarm_buckets.setdefault(interval_seconds, set()).add(alarm_id)
+        self._reschedule_alarm_checks()
+
+    def remove_alarm_job(self, alarm_id: str) -> None:
+        for interval_seconds, bucket in list(self._alarm_buckets.items()):
+            if alarm_id not in bucket:
+                continue
+            bucket.discard(alarm_id)
+            if bucket:
+                continue
+            del self._alarm_buckets[interval_seconds]
+            self._reschedule_alarm_checks()
+
+    def _reschedule_alarm_checks(self) -> None:
+        tick = math.gcd(*self._alarm_buckets) or None
+        if tick == self._alarm_tick:
+            return
+        self._alarm_tick = tick
+        if tick is None:
+            try:
+                self.scheduler.remove_job(ALARM_JOB_ID)
+                logger.info(f"Removed alarm job {ALARM_JOB_ID}")
+            except Exception:
+                pass
+            return
         self.scheduler.add_job(
-            self._run_alarm_check,
-            trigger=IntervalTrigger(seconds=interval_seconds),
-            id=job_id,
-            args=[alarm_id],
+            self._run_exclusive,
+            trigger=IntervalTrigger(seconds=tick, start_date=INTERVAL_ANCHOR),
+            id=ALARM_JOB_ID,
+            args=[ALARM_JOB_ID, self._run_alarm_check],
             replace_existing=True,
         )
-        logger.info(f"Added alarm job {job_id} (every {interval_seconds}s)")
-
-    def remove_alarm_job(self, alarm_id: str) -> None:
-        job_id = f"alarm_{alarm_id}"
-        try:
-            self.scheduler.remove_job(job_id)
-            logger.info(f"Removed alarm job {job_id}")
-        except Exception:
-            pass
+        logger.info(f"Scheduled {ALARM_JOB_ID} every {tick}s")
 
     def add_report_job(self, schedule_id: str, cron_expression: str) -> None:
         job_id = f"report_{schedule_id}"
@@ -83,38 +230,49 @@ class SchedulerService:
             trigger = CronTrigger(day="1", hour="9")
 
         self.scheduler.add_job(
-            self._run_report_generation,
+            self._run_exclusive,
             trigger=trigger,
             id=job_id,
-            args=[schedule_id],
+            args=[job_id, self._run_report_generation, schedule_id],
             replace_existing=True,
         )
+        self._report_crons[schedule_id] = cron_expression
         logger.info(f"Added report job {job_id} ({cron_expression})")
 
     def remove_report_job(self, schedule_id: str) -> None:
         job_id = f"report_{schedule_id}"
+        self._report_crons.pop(schedule_id, None)
         try:
             self.scheduler.remove_job(job_id)
             logger.info(f"Removed report job {job_id}")
         except Exception:
             pass
 
-    async def _run_alarm_check(self, alarm_id: str) -> None:
+    async def _run_alarm_check(self) -> None:
+        job = self.scheduler.get_job(ALARM_JOB_ID)
+        fire_time = job and latest_fire_time(job.trigger, datetime.now(timezone.utc))
+        if fire_time is None:
+            return
+        elapsed = round((fire_time - INTERVAL_ANCHOR).total_seconds())
+        # Read alarms from SQLite: they may have been added through another worker
         async with async_session_factory() as db:
-            alarm = await db.get(Alarm, alarm_id)
-            if not alarm or not alarm.is_active:
+            result = await db.execute(select(Alarm).where(Alarm.is_active == True))
+            alarms = [
+                a
+                for a in result.scalars().all()
+                if a.check_interval > 0 and elapsed % a.check_interval == 0
+            ]
+            if not alarms:
                 return
-            service = AlarmService(db, self.duckdb, self.neo4j)
+            service = AlarmService(db, self.duckdb, self.neo4j, self.notifier)
             try:
-                await service.evaluate(alarm)
+                await service.evaluate_batch(alarms)
             except Exception as e:
-                logger.error(f"Alarm check failed for {alarm_id}: {e}")
+                logger.error(f"Alarm check failed for {len(alarms)} alarms: {e}")
 
     async def _run_report_generation(self, schedule_id: str) -> None:
-        async with async_session_factory() as db:
-            service = ReportService(db, self.duckdb, self.neo4j)
-            try:
-                await service.generate_report(schedule_id)
-                logger.info(f"Report generated for schedule {schedule_id}")
-            except Exception as e:
-                logger.error(f"Report generation failed for {schedule_id}: {e}")
+        job = await self.report_jobs.run(schedule_id)
+        if job.status == "completed":
+            logger.info(f"Report generated for schedule {schedule_id}")
+        else:
+            logger.error(f"Report generation failed for {schedule_id}: {job.error}")
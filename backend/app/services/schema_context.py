@@ -0,0 +1,41 @@
+import threading
+from collections import OrderedDict
+
+from app.config import settings
+
+
+class SchemaContextCache:
+    """Rendered ``build_table_schema_text`` output per ordered set of datasets.
+
+    Keys are dataset ids, which are never reused, so an upload cannot make an
+    entry stale; deleting a dataset drops every entry that includes it. The
+    least recently used entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        self.max_entries = max_entries or settings.schema_context_cache_max_entries
+        self._entries: OrderedDict[tuple[str, ...], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_ids: tuple[str, ...]) -> str | None:
+        with self._lock:
+            schema_text = self._entries.get(dataset_ids)
+            if schema_text is not None:
+                self._entries.move_to_end(dataset_ids)
+            return schema_text
+
+    def put(self, dataset_ids: tuple[str, ...], schema_text: str) -> None:
+        with self._lock:
+            self._entries[dataset_ids] = schema_text
+            self._entries.move_to_end(dataset_ids)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dataset_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if dataset_id in key]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,8 +1,21 @@
+import asyncio
 import re
+import time
+from collections.abc import AsyncIterator
 
-from app.prompts.text_to_sql import RETRY_PROMPT, SYSTEM_PROMPT, build_table_schema_text
+from app.config import settings
+from app.models.dataset import Dataset
+from app.prompts.text_to_sql import (
+    PROMPT_SAMPLE_ROWS,
+    RETRY_PROMPT,
+    SYSTEM_PROMPT,
+    build_table_schema_text,
+)
+from app.services.answer_cache import AnswerCache, schema_fingerprint
+from app.services.chat_history import estimate_tokens, message_tokens
 from app.services.duckdb_service import DuckDBService
 from app.services.llm_service import LLMService
+from app.services.schema_context import SchemaContextCache
 
 MAX_RETRIES = 3
 
@@ -69,81 +82,204 @@ def _suggest_chart(columns: list[str], rows: list[dict]) -> dict | None:
     return None
 
 
+def _with_question(history: list[dict[str, str]], question: str) -> list[dict[str, str]]:
+    # A history that ends on a user message (e.g. only the summary of older
+    # queries) is merged with the question to keep roles alternating
+    if history and history[-1]["role"] == "user":
+        merged = {"role": "user", "content": f"{history[-1]['content']}\n\n{question}"}
+        return [*history[:-1], merged]
+    return [*history, {"role": "user", "content": question}]
+
+
 class TextToSQLService:
-    def __init__(self, llm: LLMService, duckdb: DuckDBService) -> None:
+    def __init__(
+        self,
+        llm: LLMService,
+        duckdb: DuckDBService,
+        schema_cache: SchemaContextCache | None = None,
+        answer_cache: AnswerCache | None = None,
+    ) -> None:
         self.llm = llm
         self.duckdb = duckdb
+        self.schema_cache = schema_cache
+        self.answer_cache = answer_cache
+
+    async def _build_schema_context(self, datasets: list[Dataset]) -> str:
+        key = tuple(ds.id for ds in datasets)
+        if self.schema_cache and (cached := self.schema_cache.get(key)) is not None:
+            return cached
 
-    def _build_schema_context(self, dataset_tables: list[str]) -> str:
-        tables = []
-        for table_name in dataset_tables:
-            info = self.duckdb.get_table_info(table_name)
-            tables.append({"table_name": table_name, **info})
-        return build_table_schema_text(tables)
+        # Schema and row count were recorded at upload; only sample rows need DuckDB,
+        # and only as many as the prompt shows
+        samples = await asyncio.gather(
+            *(
+                self.duckdb.preview_table_async(ds.duckdb_table, PROMPT_SAMPLE_ROWS)
+                for ds in datasets
+            )
+        )
+        tables = [
+            {
+                "table_name": ds.duckdb_table,
+                "schema": ds.column_schema,
+                "row_count": ds.row_count,
+                "sample_rows": rows,
+            }
+            for ds, (_, rows) in zip(datasets, samples)
+        ]
+        schema_text = build_table_schema_text(tables)
+        if self.schema_cache:
+            self.schema_cache.put(key, schema_text)
+        return schema_text
 
     async def generate_and_execute(
         self,
         question: str,
-        dataset_tables: list[str],
+        datasets: list[Dataset],
         conversation_history: list[dict[str, str]],
     ) -> dict:
-        schema_text = self._build_schema_context(dataset_tables)
+        result: dict = {}
+        async for event, data in self.iter_events(question, datasets, conversation_history):
+            if event == "result":
+                result = data
+        return result
+
+    async def iter_events(
+        self,
+        question: str,
+        datasets: list[Dataset],
+        conversation_history: list[dict[str, str]],
+        stream: bool = False,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """Run the pipeline, yielding ``(event, data)`` pairs as it progresses.
+
+        With ``stream`` the LLM response arrives as ``token`` events. Each
+        generated query yields a ``sql`` event before it runs, and a ``retry``
+        event if it fails. The run always ends with one ``result`` event that
+        carries the dict ``generate_and_execute`` returns.
+
+        Standalone questions (no conversation history) are looked up in the
+        answer cache first; a hit runs the stored SQL without calling the LLM.
+        """
+        # Follow-ups depend on earlier turns, so only standalone questions are cached
+        fingerprint = None
+        if self.answer_cache and settings.answer_cache_enabled and not conversation_history:
+            fingerprint = schema_fingerprint(datasets)
+            cached = await self.answer_cache.lookup(question, fingerprint)
+            if cached:
+                yield "sql", {"sql": cached.generated_sql, "attempt": 0, "cached": True}
+                try:
+                    columns, rows, row_count, query_timings = (
+                        await self.duckdb.execute_query_timed_async(cached.generated_sql)
+                    )
+                except Exception:
+                    await self.answer_cache.invalidate(cached.id)
+                else:
+                    yield "result", {
+                        "content": cached.content,
+                        "generated_sql": cached.generated_sql,
+                        "result_data": {
+                            "columns": columns,
+                            "rows": rows,
+                            "row_count": row_count,
+                        },
+                        "chart_config": _suggest_chart(columns, rows),
+                        "error": None,
+                        "timings": {"llm_ms": 0.0, **query_timings, "answer_cache_hit": True},
+                        "usage": None,
+                    }
+                    return
+
+        schema_text = await self._build_schema_context(datasets)
         system = SYSTEM_PROMPT.format(table_schemas=schema_text)
 
-        messages = [*conversation_history, {"role": "user", "content": question}]
+        base_messages = _with_question(conversation_history, question)
+        messages = base_messages
+        system_tokens = estimate_tokens(system)
 
+        # Milliseconds spent in the LLM plus the DuckDB phases of the final attempt
+        timings: dict = {"llm_ms": 0.0}
+        # Token counts summed across attempts: our prompt-size estimate, persisted with
+        # the message, plus whatever the provider reports
+        usage: dict = {"estimated_input_tokens": 0}
         last_error = None
         for attempt in range(MAX_RETRIES):
             if attempt > 0 and last_error:
-                messages.append({"role": "assistant", "content": f"```sql\n{sql}\n```"})
-                messages.append(
-                    {"role": "user", "content": RETRY_PROMPT.format(error=last_error)}
-                )
+                # Only the latest failed attempt is replayed, so retries don't grow the prompt
+                messages = [
+                    *base_messages,
+                    {"role": "assistant", "content": f"```sql\n{sql}\n```"},
+                    {"role": "user", "content": RETRY_PROMPT.format(error=last_error)},
+                ]
 
-            response_text = await self.llm.generate(system, messages)
+            usage["estimated_input_tokens"] += system_tokens + message_tokens(messages)
+            started = time.perf_counter()
+            if stream:
+                parts = []
+                async for text in self.llm.stream(system, messages, usage):
+                    parts.append(text)
+                    yield "token", {"text": text, "attempt": attempt + 1}
+                response_text = "".join(parts)
+            else:
+                response_text = await self.llm.generate(system, messages, usage)
+            timings["llm_ms"] += round((time.perf_counter() - started) * 1000, 3)
             sql = _extract_sql(response_text)
 
             if not sql:
-                return {
+                yield "result", {
                     "content": response_text,
                     "generated_sql": None,
                     "result_data": None,
                     "chart_config": None,
                     "error": None,
+                    "timings": timings,
+                    "usage": usage,
                 }
+                return
 
             if _DISALLOWED.search(sql):
-                return {
+                yield "result", {
                     "content": "I can only generate SELECT queries for safety reasons.",
                     "generated_sql": sql,
                     "result_data": None,
                     "chart_config": None,
                     "error": "Query contains disallowed statements (DDL/DML)",
+                    "timings": timings,
+                    "usage": usage,
                 }
+                return
 
-            validation_error = self.duckdb.validate_sql(sql)
-            if validation_error:
-                last_error = validation_error
-                continue
+            yield "sql", {"sql": sql, "attempt": attempt + 1}
 
+            # Parser/binder errors surface from the same call that runs the query
             try:
-                columns, rows, row_count = self.duckdb.execute_query(sql)
-                chart_config = _suggest_chart(columns, rows)
-                return {
-                    "content": response_text,
-                    "generated_sql": sql,
-                    "result_data": {"columns": columns, "rows": rows, "row_count": row_count},
-                    "chart_config": chart_config,
-                    "error": None,
-                }
+                columns, rows, row_count, query_timings = (
+                    await self.duckdb.execute_query_timed_async(sql)
+                )
             except Exception as e:
                 last_error = str(e)
+                yield "retry", {"error": last_error, "attempt": attempt + 1}
                 continue
 
-        return {
+            if fingerprint:
+                await self.answer_cache.store(question, fingerprint, response_text, sql)
+            chart_config = _suggest_chart(columns, rows)
+            yield "result", {
+                "content": response_text,
+                "generated_sql": sql,
+                "result_data": {"columns": columns, "rows": rows, "row_count": row_count},
+                "chart_config": chart_config,
+                "error": None,
+                "timings": {**timings, **query_timings, "attempts": attempt + 1},
+                "usage": usage,
+            }
+            return
+
+        yield "result", {
             "content": response_text,
             "generated_sql": sql,
             "result_data": None,
             "chart_config": None,
             "error": f"Query failed after {MAX_RETRIES} attempts: {last_error}",
+            "timings": {**timings, "attempts": MAX_RETRIES},
+            "usage": usage,
         }
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from app.config import settings
+
+ALLOWED_EXTENSIONS = (".csv", ".parquet")
+HASH_READ_BYTES = 8 * 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class UploadOffsetMismatch(ValueError):
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+def check_extension(filename: str) -> str:
+    file_ext = Path(filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {file_ext}. Only CSV and Parquet are supported.")
+    return file_ext
+
+
+def _append(path: Path, chunk: bytes, hasher) -> None:
+    with open(path, "ab") as f:
+        f.write(chunk)
+    hasher.update(chunk)
+
+
+async def write_stream(
+    path: Path, chunks: AsyncIterator[bytes], limit: int, hasher=None, offset: int = 0
+) -> int:
+    """Append ``chunks`` to ``path`` off the event loop, hashing as they arrive.
+
+    Returns the new size; raises ``UploadTooLarge`` once the file would exceed ``limit``.
+    """
+    hasher = hasher or hashlib.sha256()
+    buffer = bytearray()
+    size = offset
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            raise UploadTooLarge(f"Upload exceeds {limit} bytes")
+        buffer += chunk
+        if len(buffer) >= settings.upload_write_buffer_bytes:
+            await asyncio.to_thread(_append, path, bytes(buffer), hasher)
+            buffer.clear()
+    if buffer:
+        await asyncio.to_thread(_append, path, bytes(buffer), hasher)
+    return size
+
+
+def _hash_file(path: Path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_READ_BYTES):
+            hasher.update(block)
+    return hasher
+
+
+class UploadSessions:
+    """Resumable uploads: a partial file plus a JSON sidecar under ``upload_dir/partial``.
+
+    Clients append chunks at the current offset (a mismatched offset is rejected
+    with the server's offset so the client can resume), and the running sha256 is
+    kept in memory; after a restart it is rebuilt from the partial file.
+    """
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = root or settings.upload_dir / "partial"
+        self._hashers: dict[str, tuple[int, object]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _paths(self, upload_id: str) -> tuple[Path, Path]:
+        if not upload_id.replace("-", "").isalnum():
+            raise KeyError(upload_id)
+        return self.root / f"{upload_id}.part", self.root / f"{upload_id}.json"
+
+    def create(self, filename: str, size: int) -> dict:
+        check_extension(filename)
+        if size > settings.max_upload_bytes:
+            raise UploadTooLarge(f"Upload exceeds {settings.max_upload_bytes} bytes")
+        self.root.mkdir(parents=True, exist_ok=True)
+        upload_id = str(uuid.uuid4())
+        part, meta = self._paths(upload_id)
+        part.touch()
+        meta.write_text(json.dumps({"filename": filename, "size": size}))
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> dict:
+        part, meta = self._paths(upload_id)
+        if not meta.exists():
+            raise KeyError(upload_id)
+        info = json.loads(meta.read_text())
+        return {"id": upload_id, **info, "offset": part.stat().st_size}
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> dict:
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            info = self.status(upload_id)
+            if offset != info["offset"]:
+                raise UploadOffsetMismatch(info["offset"])
+            part, _ = self._paths(upload_id)
+            hasher = await self._hasher(upload_id, part, offset)
+            try:
+                await write_stream(part, chunks, info["size"], hasher, offset)
+            finally:
+                # Whatever reached the disk (and the hash) is kept so the client can resume
+                self._hashers[upload_id] = (part.stat().st_size, hasher)
+            return self.status(upload_id)
+
+    async def _hasher(self, upload_id: str, part: Path, offset: int):
+        cached = self._hashers.pop(upload_id, None)
+        if cached and cached[0] == offset:
+            return cached[1]
+        return await asyncio.to_thread(_hash_file, part)
+
+    async def finish(self, upload_id: str, dest_dir: Path) -> tuple[str, str, int, str]:
+        """Move a complete upload into ``dest_dir``; returns ``(filename, path, size, sha256)``."""
+        info = self.status(upload_id)
+        if info["offset"] != info["size"]:
+            raise ValueError(f"Upload incomplete: {info['offset']} of {info['size']} bytes")
+        part, meta = self._paths(upload_id)
+        hasher = await self._hasher(upload_id, part, info["offset"])
+        file_ext = check_extension(info["filename"])
+        dest = dest_dir / f"{uuid.uuid4()}{file_ext}"
+        os.replace(part, dest)
+        meta.unlink()
+        self._locks.pop(upload_id, None)
+        return info["filename"], str(dest), info["size"], hasher.hexdigest()
+
+    def abort(self, upload_id: str) -> None:
+        part, meta = self._paths(upload_id)
+        if not meta.exists():
+            raise KeyError(upload_id)
+        part.unlink(missing_ok=True)
+        meta.unlink()
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
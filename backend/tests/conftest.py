@@ -0,0 +1,72 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+# Settings are read at import time, so point everything at a scratch directory
+# and the offline LLM provider before the app is imported
+_data_dir = tempfile.mkdtemp(prefix="querypilot-test-")
+os.environ.update(
+    {
+        "DATA_DIR": _data_dir,
+        "UPLOAD_DIR": os.path.join(_data_dir, "uploads"),
+        "SQLITE_URL": f"sqlite+aiosqlite:///{_data_dir}/querypilot.db",
+        "DUCKDB_PATH": os.path.join(_data_dir, "querypilot.duckdb"),
+        "LLM_PROVIDER": "fake",
+        "NEO4J_URI": "bolt://127.0.0.1:1",
+        "SLACK_WEBHOOK_URL": "",
+    }
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.database import Base  # noqa: E402
+from app.services.duckdb_service import DuckDBService  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Sessions on a fresh SQLite database, for testing services without the app."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def duckdb_service(tmp_path, monkeypatch):
+    """A DuckDBService on its own database file."""
+    monkeypatch.setattr(settings, "duckdb_path", str(tmp_path / "test.duckdb"))
+    service = DuckDBService()
+    service.connect()
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def dataset(client):
+    """A small CSV dataset, uploaded and ingested."""
+    resp = client.post(
+        "/api/datasets/upload",
+        files={"file": ("sales.csv", b"region,amount\nnorth,10\nsouth,20\n", "text/csv")},
+    )
+    assert resp.status_code == 200, resp.text
+    dataset = resp.json()
+    deadline = time.monotonic() + 10
+    while dataset["status"] == "ingesting" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        dataset = client.get(f"/api/datasets/{dataset['id']}").json()
+    assert dataset["status"] == "ready", dataset
+    yield dataset
+    client.delete(f"/api/datasets/{dataset['id']}")
@@ -0,0 +1,77 @@
+from sqlalchemy import select
+
+from app.models.alarm import Alarm, AlarmEvent
+from app.services.alarm_service import AlarmService
+
+
+class FakeNeo4j:
+    def __init__(self, metrics: dict[str, dict]) -> None:
+        self.metrics = metrics
+
+    async def get_metric(self, metric_id: str) -> dict | None:
+        return self.metrics.get(metric_id)
+
+
+class RecordingNotifier:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, str]] = []
+
+    def enqueue(self, webhook_url: str, text: str) -> None:
+        self.sent.append((webhook_url, text))
+
+
+def _alarm(metric_id: str, threshold: float, status: str = "ok") -> Alarm:
+    return Alarm(
+        name=f"{metric_id} > {threshold}",
+        metric_id=metric_id,
+        operator="gt",
+        threshold=threshold,
+        check_interval=60,
+        slack_webhook="https://hooks.example/a",
+        status=status,
+    )
+
+
+async def test_alarms_on_one_metric_share_one_query(session_factory, duckdb_service):
+    metrics = {"revenue": {"name": "Revenue", "sql_query": "SELECT 42"}}
+    executed: list[str] = []
+    original = duckdb_service.execute_query
+
+    def counting(sql):
+        executed.append(sql)
+        return original(sql)
+
+    duckdb_service.execute_query = counting
+    notifier = RecordingNotifier()
+    async with session_factory() as db:
+        alarms = [_alarm("revenue", 10), _alarm("revenue", 100)]
+        db.add_all(alarms)
+        await db.commit()
+        service = AlarmService(db, duckdb_service, FakeNeo4j(metrics), notifier)
+
+        events = await service.evaluate_batch(alarms)
+
+    assert len(executed) == 1
+    assert [e.event_type for e in events] == ["triggered"]
+    assert [a.status for a in alarms] == ["triggered", "ok"]
+    assert all(a.last_value == 42 for a in alarms)
+    assert len(notifier.sent) == 1
+
+
+async def test_null_metric_records_an_error_event(session_factory, duckdb_service):
+    metrics = {"empty": {"name": "Empty", "sql_query": "SELECT NULL::DOUBLE"}}
+    notifier = RecordingNotifier()
+    async with session_factory() as db:
+        alarm = _alarm("empty", 10, status="triggered")
+        db.add(alarm)
+        await db.commit()
+        service = AlarmService(db, duckdb_service, FakeNeo4j(metrics), notifier)
+
+        event = await service.evaluate(alarm)
+
+        assert event is not None and event.event_type == "error"
+        assert alarm.status == "error"
+        assert alarm.last_checked_at is not None
+        stored = (await db.execute(select(AlarmEvent))).scalars().all()
+        assert [e.event_type for e in stored] == ["error"]
+    assert notifier.sent == []
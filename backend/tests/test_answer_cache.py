@@ -0,0 +1,58 @@
+import pytest
+
+from app.config import settings
+from app.services.answer_cache import AnswerCache, normalize_question, question_literals
+
+
+@pytest.mark.parametrize(
+    ("a", "b"),
+    [
+        ("revenue > 100", "revenue < 100"),
+        ("revenue >= 100", "revenue > 100"),
+        ("top 10 customers", "top 100 customers"),
+        ("für Köln", "fur Koln"),
+        ("按月统计收入", "按周统计收入"),
+    ],
+)
+def test_distinct_questions_do_not_collide(a, b):
+    assert normalize_question(a) != normalize_question(b)
+
+
+def test_normalization_keeps_unicode_words_and_folds_case_and_width():
+    assert normalize_question("按月统计收入") == "按月统计收入"
+    assert normalize_question("Für  KÖLN?") == "für köln"
+    assert normalize_question("ＴＯＰ １０") == "top 10"
+    assert normalize_question("Revenue>100!") == "revenue > 100"
+
+
+def test_question_literals():
+    assert question_literals("top 10 in 'West' for 2023") == ["'West'", "10", "2023"]
+
+
+async def test_distinct_questions_get_their_own_answers(session_factory):
+    cache = AnswerCache(session_factory)
+    await cache.store("revenue > 100", "fp", "more", "SELECT 1")
+    await cache.store("revenue < 100", "fp", "less", "SELECT 2")
+    await cache.store("按月统计收入", "fp", "monthly", "SELECT 3")
+
+    assert (await cache.lookup("Revenue > 100", "fp")).generated_sql == "SELECT 1"
+    assert (await cache.lookup("revenue < 100", "fp")).generated_sql == "SELECT 2"
+    assert (await cache.lookup("按月统计收入", "fp")).generated_sql == "SELECT 3"
+    assert await cache.lookup("按周统计收入", "fp") is None
+
+
+async def test_empty_keys_are_never_stored_or_matched(session_factory):
+    cache = AnswerCache(session_factory)
+    await cache.store("???", "fp", "nothing", "SELECT 1")
+    assert await cache.lookup("!!!", "fp") is None
+    assert await cache.lookup("???", "fp") is None
+
+
+async def test_fuzzy_match_requires_equal_literals(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "answer_cache_similarity", 0.8)
+    cache = AnswerCache(session_factory)
+    await cache.store("top 10 customers by total revenue", "fp", "top", "SELECT 10")
+
+    assert await cache.lookup("top 100 customers by total revenue", "fp") is None
+    hit = await cache.lookup("top 10 customer by total revenue", "fp")
+    assert hit is not None and hit.generated_sql == "SELECT 10"
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.models.report import MetricSnapshot
+from app.services.backfill_service import SnapshotBackfillService, period_range
+from app.services.metric_evaluator import MetricEvaluator
+
+METRICS = [
+    {"id": "revenue", "sql_query": "SELECT SUM(amount) FROM orders WHERE month = $period"},
+    {"id": "orders", "sql_query": "SELECT COUNT(*) FROM orders WHERE month = $period"},
+]
+
+
+class FakeNeo4j:
+    async def get_subtree_flat(self, metric_id: str) -> list[dict]:
+        # The shared child is reachable along two paths
+        return [*METRICS, METRICS[1]]
+
+    async def get_metric(self, metric_id: str) -> dict | None:
+        return next((m for m in METRICS if m["id"] == metric_id), None)
+
+
+@pytest.fixture
+def orders(duckdb_service, tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text("month,amount\n2026-01,10\n2026-01,30\n2026-02,5\n2026-03,7\n")
+    duckdb_service.create_table_from_file(str(path), "orders.csv", table_name="orders")
+    return duckdb_service
+
+
+async def _snapshots(db) -> dict[tuple[str, str], list[float]]:
+    stored: dict[tuple[str, str], list[float]] = {}
+    for snap in (await db.execute(select(MetricSnapshot))).scalars():
+        stored.setdefault((snap.metric_id, snap.period), []).append(snap.value)
+    return stored
+
+
+def test_period_range_crosses_years():
+    assert period_range("2025-11", "2026-02") == ["2025-11", "2025-12", "2026-01", "2026-02"]
+    assert period_range("2026-03", "2026-02") == []
+
+
+async def test_rerun_does_not_duplicate_snapshots(session_factory, orders):
+    async with session_factory() as db:
+        service = SnapshotBackfillService(db, orders, FakeNeo4j())
+        first = await service.backfill("revenue", "2026-01", "2026-03")
+        second = await service.backfill("revenue", "2026-01", "2026-03")
+
+        stored = await _snapshots(db)
+
+    assert (first["metrics"], first["computed"], first["skipped"]) == (2, 6, 0)
+    assert (second["computed"], second["skipped"]) == (0, 6)
+    assert stored[("revenue", "2026-01")] == [40]
+    assert stored[("orders", "2026-03")] == [1]
+    assert all(len(values) == 1 for values in stored.values())
+
+
+async def test_overwrite_replaces_stored_values(session_factory, orders):
+    async with session_factory() as db:
+        service = SnapshotBackfillService(db, orders, FakeNeo4j())
+        await service.backfill("revenue", "2026-01", "2026-02", include_children=False)
+        orders.execute_query("UPDATE orders SET amount = amount * 2")
+
+        summary = await service.backfill(
+            "revenue", "2026-01", "2026-02", include_children=False, overwrite=True
+        )
+        stored = await _snapshots(db)
+
+    assert summary["computed"] == 2
+    assert stored == {("revenue", "2026-01"): [80], ("revenue", "2026-02"): [10]}
+
+
+async def test_resumes_after_an_interrupted_run(session_factory, orders, monkeypatch):
+    real = MetricEvaluator.evaluate_periods
+
+    async def crash_on_orders(self, sql, periods):
+        if "COUNT" in sql:
+            await asyncio.sleep(0.05)  # let revenue's snapshots land first
+            raise RuntimeError("worker died")
+        return await real(self, sql, periods)
+
+    async with session_factory() as db:
+        service = SnapshotBackfillService(db, orders, FakeNeo4j())
+        monkeypatch.setattr(MetricEvaluator, "evaluate_periods", crash_on_orders)
+        with pytest.raises(RuntimeError):
+            await service.backfill("revenue", "2026-01", "2026-03")
+        assert {metric for metric, _ in await _snapshots(db)} == {"revenue"}
+
+        monkeypatch.setattr(MetricEvaluator, "evaluate_periods", real)
+        summary = await service.backfill("revenue", "2026-01", "2026-04")
+        stored = await _snapshots(db)
+
+    # Revenue's stored periods are skipped; 2026-04 has no orders, so SUM is empty
+    assert (summary["skipped"], summary["computed"], summary["empty"]) == (3, 4, 1)
+    assert stored[("orders", "2026-04")] == [0]
+    assert ("revenue", "2026-04") not in stored
+    assert all(len(values) == 1 for values in stored.values())
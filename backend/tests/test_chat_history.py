@@ -0,0 +1,84 @@
+from app.services.chat_history import (
+    SUMMARY_HEADER,
+    Turn,
+    compact_history,
+    message_tokens,
+)
+
+
+def _exchange(i: int, filler: int = 0) -> list[Turn]:
+    return [
+        Turn("user", f"question {i} " + "q" * filler),
+        Turn("assistant", f"answer {i}", generated_sql=f"SELECT {i}\n  FROM t"),
+    ]
+
+
+def _turns(count: int, filler: int = 0) -> list[Turn]:
+    return [turn for i in range(count) for turn in _exchange(i, filler)]
+
+
+def test_history_within_budget_is_kept_verbatim():
+    turns = _turns(3)
+
+    history = compact_history(turns, [], budget=10_000)
+
+    assert history.messages == [t.as_message() for t in turns]
+    assert history.verbatim_turns == 6
+    assert history.summarized_queries == 0
+    assert history.tokens == message_tokens(history.messages)
+
+
+def test_older_exchanges_are_summarized_newest_kept():
+    turns = _turns(6, filler=200)
+
+    history = compact_history(turns, ["SELECT earlier"], budget=300)
+
+    kept = history.messages
+    assert history.verbatim_turns < len(turns)
+    # Only whole exchanges are dropped, oldest first
+    assert [m["role"] for m in kept] == ["user", "assistant"] * (len(kept) // 2)
+    assert kept[-1]["content"].startswith("answer 5")
+    summary = kept[0]["content"].split("\n\n")[0].splitlines()
+    assert summary[0] == SUMMARY_HEADER
+    # Oldest first, each on one line, earlier_sql before the dropped exchanges
+    dropped = 6 - history.verbatim_turns // 2
+    assert summary[1:] == ["- SELECT earlier"] + [f"- SELECT {i} FROM t" for i in range(dropped)]
+    assert history.summarized_queries == dropped + 1
+    assert history.tokens <= 300
+
+
+def test_summary_keeps_newest_queries_when_it_overflows():
+    turns = _turns(1)
+    earlier = [f"SELECT {'x' * 40} AS c{i}" for i in range(50)]  # newest first
+
+    history = compact_history(turns, earlier, budget=120)
+
+    summary = history.messages[0]["content"].split("\n\n")[0].splitlines()[1:]
+    assert 0 < len(summary) < 50
+    assert summary[-1].endswith("AS c0")
+    assert history.tokens <= 120
+
+
+def test_duplicate_queries_are_summarized_once():
+    history = compact_history([], ["SELECT 1", "SELECT  1", "SELECT 2"], budget=1000)
+
+    assert history.messages == [
+        {"role": "user", "content": f"{SUMMARY_HEADER}\n- SELECT 2\n- SELECT 1"}
+    ]
+    assert history.summarized_queries == 2
+
+
+def test_history_never_opens_with_an_assistant_turn():
+    turns = [Turn("assistant", "orphaned answer", generated_sql="SELECT orphan")] + _turns(1)
+
+    history = compact_history(turns, [], budget=1000)
+
+    assert history.messages[0]["role"] == "user"
+    assert "orphaned answer" not in str(history.messages)
+    assert "- SELECT orphan" in history.messages[0]["content"]
+
+
+def test_sql_already_in_the_reply_is_not_repeated():
+    turn = Turn("assistant", "Run ```SELECT 1```", generated_sql="SELECT 1")
+    assert turn.as_message()["content"] == "Run ```SELECT 1```"
+    assert "```sql\nSELECT 2\n```" in Turn("assistant", "x", "SELECT 2").as_message()["content"]
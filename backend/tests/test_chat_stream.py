@@ -0,0 +1,56 @@
+import json
+
+from app.api.queries import SSE_MEDIA_TYPE
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_streamed_answer_events_and_persisted_message(client, dataset):
+    conv = client.post(
+        "/api/queries/conversations", json={"title": "t", "dataset_ids": [dataset["id"]]}
+    ).json()
+
+    with client.stream(
+        "POST",
+        f"/api/queries/conversations/{conv['id']}/messages",
+        json={"content": "show me the sales"},
+        headers={"Accept": SSE_MEDIA_TYPE},
+    ) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith(SSE_MEDIA_TYPE)
+        events = _events(resp.read().decode())
+
+    names = [name for name, _ in events]
+    # Tokens stream first, then the generated SQL, then exactly one final result
+    assert names[0] == "token"
+    assert names.index("sql") > max(i for i, name in enumerate(names) if name == "token")
+    assert names[-1] == "result" and names.count("result") == 1
+    assert "error" not in names
+
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    sql = next(data["sql"] for name, data in events if name == "sql")
+    assert sql == f"SELECT * FROM {dataset['duckdb_table']} LIMIT 10"
+    assert sql in tokens
+
+    result = events[-1][1]
+    assert result["role"] == "assistant"
+    assert result["generated_sql"] == sql
+    assert result["result_data"]["row_count"] == 2
+    assert result["error"] is None
+
+    detail = client.get(f"/api/queries/conversations/{conv['id']}").json()
+    assert [m["role"] for m in detail["messages"]] == ["user", "assistant"]
+    assert detail["messages"][0]["content"] == "show me the sales"
+    stored = detail["messages"][1]
+    assert stored["id"] == result["id"]
+    assert stored["content"] == tokens
+    assert stored["generated_sql"] == sql
+    assert stored["result_data"]["rows"] == result["result_data"]["rows"]
+
+    client.delete(f"/api/queries/conversations/{conv['id']}")
@@ -0,0 +1,56 @@
+import pytest
+
+from app.api import datasets
+from app.config import settings
+from app.services.dataset_service import DatasetService
+
+BOUNDARY = "testboundary"
+
+
+def _multipart(payload: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="big.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + payload + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 1000)
+    monkeypatch.setattr(datasets, "MULTIPART_OVERHEAD_BYTES", 200)
+
+    async def never_called(self, file):
+        raise AssertionError("the endpoint ran for an oversized body")
+
+    monkeypatch.setattr(DatasetService, "upload", never_called)
+
+
+def test_oversized_upload_is_rejected_from_content_length(client, small_limit):
+    resp = client.post(
+        "/api/datasets/upload", files={"file": ("big.csv", b"a,b\n" * 500, "text/csv")}
+    )
+
+    assert resp.status_code == 413
+    assert resp.json()["detail"] == "Upload exceeds 1000 bytes"
+
+
+def test_oversized_chunked_upload_is_rejected_while_streaming(client, small_limit):
+    body = _multipart(b"a,b\n" * 500)
+
+    def chunks():
+        for start in range(0, len(body), 256):
+            yield body[start : start + 256]
+
+    resp = client.post(
+        "/api/datasets/upload",
+        content=chunks(),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert resp.status_code == 413
+    assert "content-length" not in {k.lower() for k in resp.request.headers}
+
+
+def test_upload_within_the_limit_is_accepted(client, dataset):
+    assert dataset["row_count"] == 2
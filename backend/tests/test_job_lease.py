@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.services import job_lease
+from app.services.job_lease import JobLeases, latest_fire_time
+
+ANCHOR = datetime(2000, 1, 1, tzinfo=timezone.utc)
+FIRE = datetime(2026, 10, 18, 9, 0, tzinfo=timezone.utc)
+NEXT_FIRE = datetime(2026, 10, 18, 9, 5, tzinfo=timezone.utc)
+
+
+def _at(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+EVERY_5_MIN = IntervalTrigger(minutes=5, start_date=ANCHOR)
+
+
+@pytest.mark.parametrize(
+    "trigger, now, expected",
+    [
+        (EVERY_5_MIN, _at(2026, 10, 18, 9, 7, 30), _at(2026, 10, 18, 9, 5)),
+        (EVERY_5_MIN, _at(2026, 10, 18, 9, 5), _at(2026, 10, 18, 9, 5)),
+        (IntervalTrigger(hours=6, start_date=ANCHOR), _at(2026, 10, 18, 5), _at(2026, 10, 18)),
+        (CronTrigger(day="1", hour="9", timezone="UTC"), _at(2026, 10, 18, 12), _at(2026, 10, 1, 9)),
+        (CronTrigger(month="1", day="1", timezone="UTC"), _at(2026, 10, 18), _at(2026, 1, 1)),
+        (IntervalTrigger(minutes=5, start_date=_at(2030, 1, 1)), _at(2026, 10, 18), None),
+    ],
+)
+def test_latest_fire_time(trigger, now, expected):
+    assert latest_fire_time(trigger, now) == expected
+
+
+@pytest.fixture
+def leases_db(session_factory, monkeypatch):
+    monkeypatch.setattr(job_lease, "async_session_factory", session_factory)
+
+
+async def test_concurrent_claims_have_one_winner(leases_db):
+    workers = [JobLeases(owner=f"worker-{i}") for i in range(5)]
+
+    claims = await asyncio.gather(*(w.claim("report_a", FIRE) for w in workers))
+
+    assert sorted(claims) == [False] * 4 + [True]
+
+
+async def test_completed_fire_time_is_not_rerun(leases_db):
+    a, b = JobLeases(owner="a"), JobLeases(owner="b")
+    assert await a.claim("job", FIRE)
+    assert await a.complete("job", FIRE)
+
+    assert not await b.claim("job", FIRE)
+    assert await b.claim("job", NEXT_FIRE)
+
+
+async def test_next_fire_time_waits_for_a_running_claim(leases_db):
+    a, b = JobLeases(owner="a"), JobLeases(owner="b")
+    assert await a.claim("job", FIRE)
+
+    assert not await b.claim("job", NEXT_FIRE)
+    assert await a.renew("job", FIRE)
+    assert not await b.renew("job", FIRE)
+
+
+async def test_expired_claim_is_rerun(leases_db):
+    crashed, survivor = JobLeases(owner="a", lease_seconds=0), JobLeases(owner="b")
+    assert await crashed.claim("job", FIRE)
+    await asyncio.sleep(0.01)
+
+    assert await survivor.abandoned_jobs() == {"job"}
+    assert await survivor.claim("job", FIRE)
+    # The crashed worker no longer owns the run, so it can't complete it
+    assert not await crashed.complete("job", FIRE)
+    assert await survivor.complete("job", FIRE)
+    assert await survivor.abandoned_jobs() == set()
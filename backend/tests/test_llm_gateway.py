@@ -0,0 +1,182 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services import llm_gateway
+from app.services.llm_gateway import LLMGateway, LLMUnavailable, TokenBucket
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int, retry_after: str | None = None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": retry_after} if retry_after else {}
+        self.response = httpx.Response(status_code, headers=headers)
+
+
+class ScriptedProvider:
+    """Raises the scripted errors in turn, then answers; tracks concurrent calls."""
+
+    def __init__(self, errors: list[Exception] = (), delay: float = 0.0) -> None:
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate(self, system_prompt, messages, usage=None) -> str:
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return "ok"
+        finally:
+            self.active -= 1
+
+    async def stream(self, system_prompt, messages, usage=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        yield "o"
+        if self.errors:
+            raise self.errors.pop(0)
+        yield "k"
+
+    async def close(self) -> None:
+        pass
+
+
+def _gateway(provider, **kwargs) -> LLMGateway:
+    options = dict(
+        max_concurrent=4,
+        requests_per_minute=0,
+        input_tokens_per_minute=0,
+        deadline=5,
+        max_retries=3,
+        backoff_base=0.001,
+    )
+    return LLMGateway(provider, **{**options, **kwargs})
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays: list[float] = []
+    real_sleep = asyncio.sleep
+
+    async def record_sleep(delay: float) -> None:
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(llm_gateway.asyncio, "sleep", record_sleep)
+    return delays
+
+
+@pytest.mark.parametrize("status", [429, 500, 503, 529])
+async def test_retryable_errors_are_retried(status):
+    provider = ScriptedProvider([ProviderError(status), ProviderError(status)])
+    gateway = _gateway(provider)
+
+    assert await gateway.generate("system", MESSAGES) == "ok"
+    assert provider.calls == 3
+    assert gateway.stats()["retries"] == 2
+    assert gateway.stats()["rate_limited"] == (2 if status == 429 else 0)
+
+
+async def test_retry_after_is_honoured(sleeps):
+    gateway = _gateway(ScriptedProvider([ProviderError(429, retry_after="2")]))
+
+    assert await gateway.generate("system", MESSAGES) == "ok"
+    assert sleeps == [2.0]
+
+
+async def test_gives_up_after_max_retries():
+    provider = ScriptedProvider([ProviderError(503) for _ in range(5)])
+    gateway = _gateway(provider, max_retries=2)
+
+    with pytest.raises(LLMUnavailable):
+        await gateway.generate("system", MESSAGES)
+    assert provider.calls == 3
+    assert gateway.stats()["failures"] == 1
+
+
+async def test_client_errors_are_not_retried():
+    provider = ScriptedProvider([ProviderError(400)])
+    gateway = _gateway(provider)
+
+    with pytest.raises(ProviderError):
+        await gateway.generate("system", MESSAGES)
+    assert provider.calls == 1
+
+
+async def test_slow_call_hits_the_deadline():
+    gateway = _gateway(ScriptedProvider(delay=1), deadline=0.05)
+
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        await gateway.generate("system", MESSAGES)
+    assert time.monotonic() - started < 0.5
+    assert gateway.stats()["timeouts"] == 1
+
+
+async def test_retry_after_past_the_deadline_fails_without_waiting(sleeps):
+    provider = ScriptedProvider([ProviderError(429, retry_after="30")])
+    gateway = _gateway(provider, deadline=1)
+
+    with pytest.raises(LLMUnavailable):
+        await gateway.generate("system", MESSAGES)
+    assert sleeps == []
+    assert provider.calls == 1
+
+
+async def test_stream_is_retried_only_before_its_first_token():
+    provider = ScriptedProvider([ProviderError(503)])
+    gateway = _gateway(provider)
+    assert [text async for text in gateway.stream("system", MESSAGES)] == ["o", "k"]
+    assert provider.calls == 2
+
+    # Fails between tokens: the first token was already sent, so no retry
+    provider = ScriptedProvider()
+    gateway = _gateway(provider)
+    received = []
+    with pytest.raises(ProviderError):
+        async for text in gateway.stream("system", MESSAGES):
+            received.append(text)
+            provider.errors.append(ProviderError(503))
+    assert received == ["o"]
+    assert provider.calls == 1
+
+
+async def test_concurrency_is_capped():
+    provider = ScriptedProvider(delay=0.02)
+    gateway = _gateway(provider, max_concurrent=2)
+
+    await asyncio.gather(*(gateway.generate("system", MESSAGES) for _ in range(6)))
+
+    assert provider.max_active == 2
+    assert gateway.stats()["in_flight"] == 0
+
+
+async def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    started = time.monotonic()
+    await bucket.acquire()
+    await bucket.acquire()
+    assert time.monotonic() - started < 0.02
+    await bucket.acquire()
+    assert time.monotonic() - started >= 0.04  # one token refills in 0.05s
+
+
+async def test_token_bucket_caps_oversized_requests():
+    bucket = TokenBucket(rate=1000, capacity=5)
+
+    await asyncio.wait_for(bucket.acquire(cost=50), timeout=1)
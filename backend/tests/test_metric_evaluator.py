@@ -0,0 +1,93 @@
+import pytest
+
+from app.config import settings
+from app.services import metric_evaluator
+from app.services.metric_evaluator import MetricEvaluator
+
+PERIODS = ["2026-01", "2026-02", "2026-03", "2026-04"]  # 2026-04 has no orders
+
+METRICS = {
+    "count": "SELECT COUNT(*) FROM orders WHERE month = $period",
+    "sum": "SELECT SUM(amount) FROM orders WHERE month = $period;",
+    "cte": (
+        "WITH current AS (SELECT * FROM orders WHERE month = $period) "
+        "SELECT SUM(amount) / COUNT(*) FROM current"
+    ),
+    "subquery": (
+        "SELECT (SELECT MAX(amount) FROM orders WHERE month = $period) "
+        "- (SELECT MIN(amount) FROM orders WHERE month = $period)"
+    ),
+    "limited": "SELECT amount FROM orders WHERE month = $period ORDER BY amount DESC LIMIT 1",
+}
+
+
+@pytest.fixture
+def evaluator(duckdb_service, tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text(
+        "month,amount\n2026-01,10\n2026-01,30\n2026-02,5\n2026-03,7\n2026-03,1\n2026-03,2\n"
+    )
+    duckdb_service.create_table_from_file(str(path), "orders.csv", table_name="orders")
+    return MetricEvaluator(duckdb_service)
+
+
+@pytest.fixture
+def queries(duckdb_service, monkeypatch):
+    """SQL sent to DuckDB by the evaluator, bypassing the result cache."""
+    sent: list[str] = []
+    original = duckdb_service.execute_query_async
+
+    async def recording(sql):
+        sent.append(sql)
+        return await original(sql)
+
+    monkeypatch.setattr(duckdb_service, "execute_query_async", recording)
+    monkeypatch.setattr(settings, "query_cache_enabled", False)
+    return sent
+
+
+@pytest.mark.parametrize("name", METRICS)
+async def test_vectorized_matches_per_period(evaluator, queries, name):
+    sql = METRICS[name]
+    expected = {period: await evaluator.evaluate(sql, period) for period in PERIODS}
+    queries.clear()
+
+    result = await evaluator.evaluate_periods(sql, PERIODS)
+
+    assert result.values == expected
+    assert result.errors == {}
+    assert len(queries) == 1
+
+
+async def test_ordered_metric_falls_back_to_per_period(evaluator, queries):
+    sql = "SELECT amount FROM orders WHERE month = $period ORDER BY amount DESC"
+
+    result = await evaluator.evaluate_periods(sql, PERIODS)
+
+    assert result.values == {"2026-01": 30, "2026-02": 5, "2026-03": 7, "2026-04": None}
+    assert len(queries) == len(PERIODS)
+
+
+async def test_failed_vectorized_query_falls_back_to_per_period(evaluator, queries, monkeypatch):
+    monkeypatch.setattr(metric_evaluator, "vectorize_periods", lambda sql, periods: "SELEC")
+
+    result = await evaluator.evaluate_periods(METRICS["sum"], PERIODS)
+
+    assert result.values == {"2026-01": 40, "2026-02": 5, "2026-03": 10, "2026-04": None}
+    assert queries[0] == "SELEC" and len(queries) == 1 + len(PERIODS)
+
+
+async def test_errors_are_reported_per_period(evaluator):
+    result = await evaluator.evaluate_periods(
+        "SELECT SUM(amount) FROM missing WHERE month = $period", PERIODS[:2]
+    )
+
+    assert result.values == {}
+    assert set(result.errors) == set(PERIODS[:2])
+
+
+async def test_period_independent_sql_runs_once(evaluator, queries):
+    result = await evaluator.evaluate_periods("SELECT SUM(amount) FROM orders", PERIODS)
+
+    assert result.values == dict.fromkeys(PERIODS, 55)
+    assert len(queries) == 1
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import httpx
+
+from app.services import notification_service
+from app.services.notification_service import SlackDispatcher, split_batch
+
+WEBHOOK = "https://hooks.slack.test/services/a"
+OTHER_WEBHOOK = "https://hooks.slack.test/services/b"
+
+
+def _recording_client(responses: list[httpx.Response] | None = None):
+    """A client whose requests are recorded and answered from ``responses`` (then 200)."""
+    posts: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posts.append((str(request.url), json.loads(request.content)["text"]))
+        return responses.pop(0) if responses else httpx.Response(200)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), posts
+
+
+async def test_messages_within_batch_window_are_joined_per_webhook():
+    client, posts = _recording_client()
+    dispatcher = SlackDispatcher(client=client, batch_window=0.05, rate_per_second=100)
+    dispatcher.start()
+    for message in ("one", "two", "three"):
+        assert dispatcher.enqueue(WEBHOOK, message)
+    assert dispatcher.enqueue(OTHER_WEBHOOK, "elsewhere")
+    await dispatcher.stop()
+
+    assert sorted(posts) == [(WEBHOOK, "one\ntwo\nthree"), (OTHER_WEBHOOK, "elsewhere")]
+
+
+async def test_rate_limited_webhook_does_not_hold_up_others():
+    posts: list[str] = []
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == WEBHOOK:
+            await release.wait()
+        posts.append(str(request.url))
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    dispatcher = SlackDispatcher(client=client, batch_window=0, rate_per_second=100)
+    dispatcher.start()
+    dispatcher.enqueue(WEBHOOK, "stuck")
+    dispatcher.enqueue(OTHER_WEBHOOK, "delivered")
+    for _ in range(20):
+        if posts:
+            break
+        await asyncio.sleep(0.01)
+
+    assert posts == [OTHER_WEBHOOK]
+    release.set()
+    await dispatcher.stop()
+    assert posts == [OTHER_WEBHOOK, WEBHOOK]
+
+
+def test_split_batch_stays_under_the_text_limit():
+    assert split_batch(["a" * 4, "b" * 4, "c" * 4], limit=9) == ["aaaa\nbbbb", "cccc"]
+    assert split_batch(["x" * 20], limit=9) == ["x" * 8 + "…"]
+    assert split_batch([]) == []
+
+
+async def test_large_batches_are_posted_in_parts():
+    client, posts = _recording_client()
+    dispatcher = SlackDispatcher(client=client, batch_window=0.05, rate_per_second=1000)
+    dispatcher.start()
+    messages = [f"{i:04d} " + "m" * 995 for i in range(10)]
+    for message in messages:
+        dispatcher.enqueue(WEBHOOK, message)
+    await dispatcher.stop()
+
+    assert len(posts) == 4  # three 1000-char messages per post
+    assert all(len(text) <= 4000 for _, text in posts)
+    assert "\n".join(text for _, text in posts) == "\n".join(messages)
+
+
+async def test_429_is_retried_after_retry_after(monkeypatch):
+    delays: list[float] = []
+    real_sleep = asyncio.sleep
+
+    async def record_sleep(delay: float) -> None:
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(notification_service.asyncio, "sleep", record_sleep)
+    client, posts = _recording_client([httpx.Response(429, headers={"Retry-After": "7"})])
+    dispatcher = SlackDispatcher(client=client, max_retries=3, backoff_base=0.01)
+
+    assert await dispatcher.send(WEBHOOK, "alarm")
+    assert len(posts) == 2
+    assert 7.0 in delays  # Retry-After wins over the shorter exponential backoff
+
+
+async def test_gives_up_after_max_retries():
+    client, posts = _recording_client([httpx.Response(503) for _ in range(5)])
+    dispatcher = SlackDispatcher(client=client, max_retries=2, backoff_base=0.001)
+
+    assert not await dispatcher.send(WEBHOOK, "alarm")
+    assert len(posts) == 3
+
+
+async def test_enqueue_drops_when_queue_is_full():
+    client, posts = _recording_client()
+    dispatcher = SlackDispatcher(client=client, queue_size=2, batch_window=0)
+
+    assert dispatcher.enqueue(WEBHOOK, "first")
+    assert dispatcher.enqueue(WEBHOOK, "second")
+    assert not dispatcher.enqueue(WEBHOOK, "dropped")
+
+    dispatcher.start()
+    await dispatcher.stop()
+    assert [text for _, text in posts] == ["first\nsecond"]
@@ -0,0 +1,76 @@
+import pytest
+
+from app.services.query_cache import is_volatile, normalize_sql, referenced_identifiers
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT  *\n FROM sales ;", "SELECT * FROM sales"),
+        ("select a,\tb from t;;", "select a, b from t"),
+        ("SELECT 'a  b' FROM t", "SELECT 'a  b' FROM t"),
+        ('SELECT "two  spaces" FROM t', 'SELECT "two  spaces" FROM t'),
+    ],
+)
+def test_normalize_sql(sql, expected):
+    assert normalize_sql(sql) == expected
+
+
+def test_referenced_identifiers_skip_literals_and_unquote_names():
+    tables = referenced_identifiers("SELECT * FROM Sales JOIN \"Odd Name\" ON x = 'orders'")
+    assert {"sales", "odd name"} <= tables
+    assert "orders" not in tables
+
+
+def test_volatile_functions_outside_literals():
+    assert is_volatile("SELECT random()")
+    assert not is_volatile("SELECT 'random()' FROM t")
+
+
+def _csv(tmp_path, name: str, body: str) -> str:
+    path = tmp_path / f"{name}.csv"
+    path.write_text(body)
+    return str(path)
+
+
+@pytest.fixture
+def two_tables(duckdb_service, tmp_path):
+    duckdb_service.create_table_from_file(_csv(tmp_path, "a", "x\n1\n"), "a.csv", table_name="a")
+    duckdb_service.create_table_from_file(_csv(tmp_path, "b", "x\n2\n"), "b.csv", table_name="b")
+    for table in ("a", "b"):
+        duckdb_service.execute_query(f"SELECT sum(x) AS s FROM {table}")
+    return duckdb_service
+
+
+def _cached(service, sql: str) -> bool:
+    return service.execute_query_timed(sql)[3]["cache_hit"]
+
+
+def test_whitespace_variants_share_an_entry(two_tables):
+    assert _cached(two_tables, "select  sum(x) AS s\nFROM a;") is False
+    assert _cached(two_tables, "select sum(x) AS s FROM a") is True
+
+
+def test_replacing_a_table_evicts_only_its_entries(two_tables, tmp_path):
+    two_tables.drop_table("a")
+    two_tables.create_table_from_file(_csv(tmp_path, "a2", "x\n5\n"), "a.csv", table_name="a")
+
+    assert not _cached(two_tables, "SELECT sum(x) AS s FROM a")
+    assert two_tables.execute_query("SELECT sum(x) AS s FROM a")[1] == [{"s": 5}]
+    assert _cached(two_tables, "SELECT sum(x) AS s FROM b")
+
+
+@pytest.mark.parametrize(
+    "sql", ["DESCRIBE a", "SHOW TABLES", "EXPLAIN SELECT * FROM a", "PRAGMA enable_profiling"]
+)
+def test_read_only_statements_keep_the_cache(two_tables, sql):
+    two_tables.execute_query(sql)
+    assert _cached(two_tables, "SELECT sum(x) AS s FROM a")
+    assert _cached(two_tables, "SELECT sum(x) AS s FROM b")
+
+
+def test_writes_run_as_queries_invalidate_everything(two_tables):
+    two_tables.execute_query("INSERT INTO a VALUES (10)")
+
+    assert two_tables.execute_query("SELECT sum(x) AS s FROM a")[1] == [{"s": 11}]
+    assert not _cached(two_tables, "SELECT sum(x) AS s FROM b")
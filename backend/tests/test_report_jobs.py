@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services import report_jobs
+from app.services.report_jobs import ReportJobManager
+
+LONG_SCAN = "SELECT count(*) FROM range(100000000000)"
+
+
+class SlowReportService:
+    """Stands in for ReportService: runs a scan that only an interrupt stops."""
+
+    threads: list[str] = []
+
+    def __init__(self, db, duckdb, neo4j) -> None:
+        self.duckdb = duckdb
+
+    async def generate_report(self, schedule_id, on_progress=None):
+        def scan():
+            SlowReportService.threads.append(threading.current_thread().name)
+            with self.duckdb.cursor() as cur:
+                return cur.execute(LONG_SCAN).fetchall()
+
+        await self.duckdb.run(scan)
+
+
+@pytest.fixture
+def manager(duckdb_service, monkeypatch):
+    monkeypatch.setattr(report_jobs, "ReportService", SlowReportService)
+    SlowReportService.threads = []
+    return ReportJobManager(duckdb_service, neo4j=None)
+
+
+async def _wait_running(manager: ReportJobManager):
+    for _ in range(200):
+        running = [j for j in manager.list() if j.status == "running"]
+        if running and SlowReportService.threads:
+            return running[0]
+        await asyncio.sleep(0.01)
+    raise AssertionError("report never started")
+
+
+async def test_cancel_interrupts_report_queries_on_background_pool(manager, duckdb_service):
+    job = manager.submit("schedule")
+    await _wait_running(manager)
+    assert SlowReportService.threads[0].startswith("duckdb-bg")
+
+    await manager.cancel(job.id)
+    assert job.status == "cancelled"
+    # The interactive pool was never involved and answers straight away
+    result = await asyncio.wait_for(duckdb_service.execute_query_async("SELECT 1 AS x"), 5)
+    assert result[1] == [{"x": 1}]
+
+
+async def test_scheduled_runs_are_cancellable(manager):
+    scheduled = asyncio.create_task(manager.run("schedule"))
+    job = await _wait_running(manager)
+    assert job.task is not None
+
+    await asyncio.wait_for(manager.cancel(job.id), 5)
+    finished = await asyncio.wait_for(scheduled, 5)
+    assert finished is job and job.status == "cancelled"
@@ -0,0 +1,62 @@
+import pytest
+
+SQL = "SELECT range AS n FROM range(25)"
+
+
+async def test_pages_follow_tokens_to_the_end(duckdb_service):
+    page, token = await duckdb_service.start_paged_query(SQL, 10)
+    seen = page.column("n").to_pylist()
+    while token:
+        page, token = await duckdb_service.fetch_next_page(token, 10)
+        seen += page.column("n").to_pylist()
+
+    assert seen == list(range(25))
+
+
+async def test_replayed_token_is_rejected(duckdb_service):
+    _, token = await duckdb_service.start_paged_query(SQL, 10)
+    page, next_token = await duckdb_service.fetch_next_page(token, 10)
+    assert page.column("n").to_pylist() == list(range(10, 20))
+
+    with pytest.raises(KeyError):
+        await duckdb_service.fetch_next_page(token, 10)
+    # The rejected replay leaves the cursor usable from its current position
+    page, _ = await duckdb_service.fetch_next_page(next_token, 10)
+    assert page.column("n").to_pylist() == list(range(20, 25))
+
+
+@pytest.mark.parametrize("token", ["", "nope", "nope.10", "."])
+async def test_unknown_token_is_rejected(duckdb_service, token):
+    await duckdb_service.start_paged_query(SQL, 10)
+
+    with pytest.raises(KeyError):
+        await duckdb_service.fetch_next_page(token, 10)
+
+
+async def test_expired_token_is_rejected_and_its_cursor_closed(duckdb_service, monkeypatch):
+    monkeypatch.setattr(duckdb_service.result_cursors, "ttl_seconds", 0)
+    _, token = await duckdb_service.start_paged_query(SQL, 10)
+    cursor, _ = next(iter(duckdb_service.result_cursors._cursors.values()))
+
+    with pytest.raises(KeyError):
+        await duckdb_service.fetch_next_page(token, 10)
+    assert not cursor.has_more
+
+
+async def test_oldest_cursor_is_closed_past_max_open(duckdb_service, monkeypatch):
+    monkeypatch.setattr(duckdb_service.result_cursors, "max_open", 2)
+    tokens = [(await duckdb_service.start_paged_query(SQL, 10))[1] for _ in range(3)]
+
+    with pytest.raises(KeyError):
+        await duckdb_service.fetch_next_page(tokens[0], 10)
+    for token in tokens[1:]:
+        await duckdb_service.fetch_next_page(token, 10)
+
+
+async def test_released_token_is_rejected(duckdb_service):
+    _, token = await duckdb_service.start_paged_query(SQL, 10)
+
+    assert duckdb_service.result_cursors.release(token)
+    assert not duckdb_service.result_cursors.release(token)
+    with pytest.raises(KeyError):
+        await duckdb_service.fetch_next_page(token, 10)
@@ -0,0 +1,66 @@
+import datetime
+import decimal
+import json
+
+import pyarrow as pa
+import pytest
+
+from app.schemas.query import ColumnarPage
+from app.services.result_format import COLUMNAR_JSON_MEDIA_TYPE, to_columnar_json
+
+COLUMNS = {
+    "int": pa.array([1, None, -(2**62)], pa.int64()),
+    "float": pa.array([1.5, float("nan"), float("-inf")]),
+    "bool": pa.array([True, False, None]),
+    "text": pa.array(['say "hi"', "back\\slash", "ünïcode ✓"]),
+    "control": pa.array(["tab\there", "line\nbreak", None]),
+    "decimal": pa.array(
+        [decimal.Decimal("12.50"), None, decimal.Decimal("-1")], pa.decimal128(9, 2)
+    ),
+    "date": pa.array([datetime.date(2026, 1, 31), None, datetime.date(2026, 2, 1)]),
+    "nulls": pa.nulls(3),
+    "category": pa.array(["x", "y", "x"]).dictionary_encode(),
+    "list": pa.array([[1], [2, 3], None]),
+}
+
+
+@pytest.mark.parametrize("name", COLUMNS)
+def test_columnar_json_matches_the_pydantic_encoding(name):
+    table = pa.table({name: COLUMNS[name]})
+    expected = ColumnarPage(
+        columns=[name],
+        data=[table.column(0).to_pylist()],
+        row_count=3,
+        next_page_token="t",
+    ).model_dump_json()
+
+    assert json.loads(to_columnar_json(table, next_page_token="t")) == json.loads(expected)
+
+
+def test_multi_chunk_and_empty_columns():
+    chunked = pa.table({"n": pa.chunked_array([[1, 2], [], [3]])})
+    assert json.loads(to_columnar_json(chunked))["data"] == [[1, 2, 3]]
+
+    empty = pa.table({"s": pa.array([], pa.string())})
+    assert json.loads(to_columnar_json(empty)) == {"columns": ["s"], "data": [[]], "row_count": 0}
+
+
+def test_timestamps_are_iso_8601():
+    table = pa.table({"ts": [datetime.datetime(2026, 1, 31, 10, 30)]})
+    (value,) = json.loads(to_columnar_json(table))["data"][0]
+    assert datetime.datetime.fromisoformat(value) == datetime.datetime(2026, 1, 31, 10, 30)
+
+
+def test_preview_endpoint_serves_columnar_json(client, dataset):
+    resp = client.get(
+        f"/api/datasets/{dataset['id']}/preview", headers={"Accept": COLUMNAR_JSON_MEDIA_TYPE}
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == COLUMNAR_JSON_MEDIA_TYPE
+    assert resp.json() == {
+        "columns": ["region", "amount"],
+        "data": [["north", "south"], [10, 20]],
+        "row_count": 2,
+        "total_rows": 2,
+    }
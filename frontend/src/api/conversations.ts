@@ -1,11 +1,17 @@
 import { get, post, del } from "./client";
-import type { Conversation, ConversationDetail, Message } from "@/types";
+import type { Conversation, ConversationDetail, Message, MessagePage } from "@/types";
 
 export const conversationsApi = {
   list: () => get<Conversation[]>("/queries/conversations"),
 
   get: (id: string) => get<ConversationDetail>(`/queries/conversations/${id}`),
 
+  messages: (id: string, before?: string | null) => {
+    const params = new URLSearchParams({ include_results: "true" });
+    if (before) params.set("before", before);
+    return get<MessagePage>(`/queries/conversations/${id}/messages?${params}`);
+  },
+
   create: (title?: string, datasetIds?: string[]) =>
     post<Conversation>("/queries/conversations", {
       title: title || "New Conversation",
@@ -1,5 +1,5 @@
 import { get, post, put, del } from "./client";
-import type { ReportSchedule, ReportScheduleCreate, Report } from "@/types";
+import type { ReportSchedule, ReportScheduleCreate, Report, ReportJob } from "@/types";
 
 export const reportsApi = {
   listSchedules: () => get<ReportSchedule[]>("/reports/schedules"),
@@ -12,7 +12,11 @@ export const reportsApi = {
 
   deleteSchedule: (id: string) => del(`/reports/schedules/${id}`),
 
-  runSchedule: (id: string) => post<Report>(`/reports/schedules/${id}/run`),
+  runSchedule: (id: string) => post<ReportJob>(`/reports/schedules/${id}/run`),
+
+  getJob: (id: string) => get<ReportJob>(`/reports/jobs/${id}`),
+
+  cancelJob: (id: string) => del<ReportJob>(`/reports/jobs/${id}`),
 
   listReports: () => get<Report[]>("/reports"),
 
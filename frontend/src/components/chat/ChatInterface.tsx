@@ -1,4 +1,4 @@
-import { useState, useRef, useEffect } from "react";
+import { useState, useRef, useEffect, useLayoutEffect } from "react";
 import { Send, Loader2, Database, Compass } from "lucide-react";
 import { MessageBubble } from "./MessageBubble";
 import type { Message, Dataset } from "@/types";
@@ -10,8 +10,14 @@ interface ChatInterfaceProps {
   onSelectDatasets: (ids: string[]) => void;
   onSendMessage: (content: string) => void;
   isSending: boolean;
+  hasOlder?: boolean;
+  isLoadingOlder?: boolean;
+  onLoadOlder?: () => void;
 }
 
+// Scrolling within this many pixels of the top loads the previous page
+const LOAD_OLDER_THRESHOLD = 80;
+
 export function ChatInterface({
   messages,
   datasets,
@@ -19,15 +25,41 @@ export function ChatInterface({
   onSelectDatasets,
   onSendMessage,
   isSending,
+  hasOlder = false,
+  isLoadingOlder = false,
+  onLoadOlder,
 }: ChatInterfaceProps) {
   const [input, setInput] = useState("");
   const [showDatasetPicker, setShowDatasetPicker] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  const scrollRef = useRef<HTMLDivElement>(null);
   const inputRef = useRef<HTMLTextAreaElement>(null);
+  // Scroll height before an older page was requested, to keep the view anchored
+  const heightBeforeLoad = useRef<number | null>(null);
+  const lastMessageId = messages[messages.length - 1]?.id;
 
+  // Follow new messages at the bottom, but not older pages prepended at the top
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages]);
+  }, [lastMessageId]);
+
+  useLayoutEffect(() => {
+    const el = scrollRef.current;
+    if (el && heightBeforeLoad.current !== null && !isLoadingOlder) {
+      el.scrollTop += el.scrollHeight - heightBeforeLoad.current;
+      heightBeforeLoad.current = null;
+    }
+  }, [messages, isLoadingOlder]);
+
+  const loadOlder = () => {
+    if (!hasOlder || isLoadingOlder || !onLoadOlder) return;
+    heightBeforeLoad.current = scrollRef.current?.scrollHeight ?? null;
+    onLoadOlder();
+  };
+
+  const handleScroll = () => {
+    if ((scrollRef.current?.scrollTop ?? Infinity) < LOAD_OLDER_THRESHOLD) loadOlder();
+  };
 
   const handleSend = () => {
     const text = input.trim();
@@ -81,12 +113,15 @@ export function ChatInterface({
               datasets.map((ds) => (
                 <label
                   key={ds.id}
-                  className="flex items-center gap-3 px-3 py-2 rounded-md hover:bg-elevated cursor-pointer transition-colors"
+                  className={`flex items-center gap-3 px-3 py-2 rounded-md transition-colors ${
+                    ds.status === "ready" ? "hover:bg-elevated cursor-pointer" : "opacity-50 cursor-not-allowed"
+                  }`}
                 >
                   <input
                     type="checkbox"
                     checked={selectedDatasetIds.includes(ds.id)}
                     onChange={() => toggleDataset(ds.id)}
+                    disabled={ds.status !== "ready" && !selectedDatasetIds.includes(ds.id)}
                     className="accent-[#d4a548] rounded"
                   />
                   <div className="flex-1 min-w-0">
@@ -95,7 +130,11 @@ export function ChatInterface({
                       className="text-[11px] text-text-muted"
                       style={{ fontFamily: "'Azeret Mono', monospace" }}
                     >
-                      {ds.row_count.toLocaleString()} rows · {ds.duckdb_table}
+                      {ds.status === "ready"
+                        ? `${ds.row_count.toLocaleString()} rows · ${ds.duckdb_table}`
+                        : ds.status === "ingesting"
+                          ? "Preparing..."
+                          : "Ingestion failed"}
                     </p>
                   </div>
                 </label>
@@ -106,7 +145,7 @@ export function ChatInterface({
       </div>
 
       {/* Messages area */}
-      <div className="flex-1 overflow-y-auto px-6 py-6">
+      <div ref={scrollRef} onScroll={handleScroll} className="flex-1 overflow-y-auto px-6 py-6">
         {messages.length === 0 ? (
           <div className="flex flex-col items-center justify-center h-full text-center animate-fade-in">
             <div className="w-16 h-16 rounded-2xl bg-gold-dim/50 border border-gold/10 flex items-center justify-center mb-5">
@@ -140,6 +179,20 @@ export function ChatInterface({
           </div>
         ) : (
           <div className="space-y-6 max-w-4xl mx-auto">
+            {hasOlder && (
+              <div className="flex justify-center">
+                <button
+                  onClick={loadOlder}
+                  disabled={isLoadingOlder}
+                  className="flex items-center gap-2 px-3 py-1.5 rounded-lg border border-border-dim bg-surface text-[12px] text-text-secondary hover:text-text hover:border-border transition-all cursor-pointer disabled:opacity-50"
+                >
+                  {isLoadingOlder && (
+                    <Loader2 className="w-3 h-3 animate-[atlas-spin_1s_linear_infinite]" />
+                  )}
+                  Load older messages
+                </button>
+              </div>
+            )}
             {messages.map((msg) => (
               <MessageBubble key={msg.id} message={msg} />
             ))}
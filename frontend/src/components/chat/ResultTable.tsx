@@ -30,6 +30,7 @@ export function ResultTable({ data }: ResultTableProps) {
           style={{ fontFamily: "'Azeret Mono', monospace" }}
         >
           {data.row_count} row{data.row_count !== 1 ? "s" : ""}
+          {data.truncated && ` · showing first ${data.rows.length}`}
         </span>
       </div>
 
@@ -1,4 +1,4 @@
-import { Database, Trash2, Eye, FileSpreadsheet } from "lucide-react";
+import { Database, Trash2, Eye, FileSpreadsheet, Loader2, AlertTriangle } from "lucide-react";
 import type { Dataset } from "@/types";
 
 interface DatasetCardProps {
@@ -13,8 +13,31 @@ function formatBytes(bytes: number): string {
   return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
 }
 
+function StatusNote({ dataset }: { dataset: Dataset }) {
+  if (dataset.status === "ingesting") {
+    return (
+      <p className="mt-3 flex items-center gap-1.5 text-[12px] text-gold">
+        <Loader2 className="w-3.5 h-3.5 animate-[atlas-spin_1s_linear_infinite]" />
+        Preparing dataset...
+      </p>
+    );
+  }
+  if (dataset.status === "failed") {
+    return (
+      <p className="mt-3 flex items-center gap-1.5 text-[12px] text-coral">
+        <AlertTriangle className="w-3.5 h-3.5 shrink-0" />
+        <span className="truncate" title={dataset.error ?? undefined}>
+          {dataset.error ?? "Ingestion failed"}
+        </span>
+      </p>
+    );
+  }
+  return null;
+}
+
 export function DatasetCard({ dataset, onPreview, onDelete }: DatasetCardProps) {
   const colCount = Object.keys(dataset.column_schema).length;
+  const ready = dataset.status === "ready";
 
   return (
     <div className="atlas-card p-5 group animate-fade-in">
@@ -39,13 +62,15 @@ export function DatasetCard({ dataset, onPreview, onDelete }: DatasetCardProps)
 
         {/* Actions */}
         <div className="flex gap-1 opacity-0 group-hover:opacity-100 transition-opacity">
-          <button
-            onClick={onPreview}
-            className="p-1.5 rounded-md hover:bg-elevated text-text-muted hover:text-sky transition-all cursor-pointer"
-            title="Preview"
-          >
-            <Eye className="w-4 h-4" />
-          </button>
+          {ready && (
+            <button
+              onClick={onPreview}
+              className="p-1.5 rounded-md hover:bg-elevated text-text-muted hover:text-sky transition-all cursor-pointer"
+              title="Preview"
+            >
+              <Eye className="w-4 h-4" />
+            </button>
+          )}
           <button
             onClick={onDelete}
             className="p-1.5 rounded-md hover:bg-elevated text-text-muted hover:text-coral transition-all cursor-pointer"
@@ -56,6 +81,8 @@ export function DatasetCard({ dataset, onPreview, onDelete }: DatasetCardProps)
         </div>
       </div>
 
+      <StatusNote dataset={dataset} />
+
       {/* Stats */}
       <div className="grid grid-cols-3 gap-3 mt-4 pt-3 border-t border-border-dim">
         <div>
@@ -71,7 +98,7 @@ export function DatasetCard({ dataset, onPreview, onDelete }: DatasetCardProps)
             Rows
           </p>
           <p className="text-[13px] text-text-secondary font-medium" style={{ fontFamily: "'Azeret Mono', monospace" }}>
-            {dataset.row_count.toLocaleString()}
+            {ready ? dataset.row_count.toLocaleString() : "—"}
           </p>
         </div>
         <div>
@@ -79,7 +106,7 @@ export function DatasetCard({ dataset, onPreview, onDelete }: DatasetCardProps)
             Columns
           </p>
           <p className="text-[13px] text-text-secondary font-medium" style={{ fontFamily: "'Azeret Mono', monospace" }}>
-            {colCount}
+            {ready ? colCount : "—"}
           </p>
         </div>
       </div>
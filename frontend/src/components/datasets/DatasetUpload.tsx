@@ -61,7 +61,9 @@ export function DatasetUpload() {
             <div className="w-10 h-10 rounded-full bg-sage-dim border border-sage/20 flex items-center justify-center animate-scale-in">
               <Check className="w-5 h-5 text-sage" />
             </div>
-            <p className="text-sm text-sage">Upload complete!</p>
+            <p className="text-sm text-sage">
+              {upload.data?.status === "ingesting" ? "Uploaded, preparing dataset..." : "Upload complete!"}
+            </p>
           </>
         ) : upload.isError ? (
           <>
@@ -92,7 +92,10 @@ export function MetricForm({ metric, datasets, parentMetrics, onClose }: MetricF
               <select value={datasetId} onChange={(e) => setDatasetId(e.target.value)} className={inputClass}>
                 <option value="">Select...</option>
                 {datasets.map((ds) => (
-                  <option key={ds.id} value={ds.id}>{ds.filename}</option>
+                  <option key={ds.id} value={ds.id} disabled={ds.status !== "ready" && ds.id !== datasetId}>
+                    {ds.filename}
+                    {ds.status === "ingesting" ? " (preparing...)" : ds.status === "failed" ? " (failed)" : ""}
+                  </option>
                 ))}
               </select>
             </div>
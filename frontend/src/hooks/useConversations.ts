@@ -1,4 +1,4 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { conversationsApi } from "@/api/conversations";
 
 export function useConversations() {
@@ -16,6 +16,17 @@ export function useConversation(id: string | undefined) {
   });
 }
 
+/** Pages of messages, newest page first; older pages load via `fetchNextPage`. */
+export function useConversationMessages(id: string | undefined) {
+  return useInfiniteQuery({
+    queryKey: ["conversations", id, "messages"],
+    queryFn: ({ pageParam }) => conversationsApi.messages(id!, pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    enabled: !!id,
+  });
+}
+
 export function useCreateConversation() {
   const qc = useQueryClient();
   return useMutation({
@@ -1,10 +1,14 @@
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { datasetsApi } from "@/api/datasets";
 
+const INGEST_POLL_MS = 2000;
+
 export function useDatasets() {
   return useQuery({
     queryKey: ["datasets"],
     queryFn: datasetsApi.list,
+    refetchInterval: (query) =>
+      query.state.data?.some((d) => d.status === "ingesting") ? INGEST_POLL_MS : false,
   });
 }
 
@@ -13,6 +17,8 @@ export function useDataset(id: string | undefined) {
     queryKey: ["datasets", id],
     queryFn: () => datasetsApi.get(id!),
     enabled: !!id,
+    refetchInterval: (query) =>
+      query.state.data?.status === "ingesting" ? INGEST_POLL_MS : false,
   });
 }
 
@@ -39,10 +39,24 @@ export function useDeleteSchedule() {
   });
 }
 
+const JOB_POLL_MS = 1000;
+
+async function runAndWait(scheduleId: string) {
+  let job = await reportsApi.runSchedule(scheduleId);
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+    job = await reportsApi.getJob(job.id);
+  }
+  if (job.status !== "completed") {
+    throw new Error(job.error ?? `Report run ${job.status}`);
+  }
+  return job;
+}
+
 export function useRunSchedule() {
   const qc = useQueryClient();
   return useMutation({
-    mutationFn: reportsApi.runSchedule,
+    mutationFn: runAndWait,
     onSuccess: () => qc.invalidateQueries({ queryKey: ["reports"] }),
   });
 }
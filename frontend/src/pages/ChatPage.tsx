@@ -1,9 +1,9 @@
-import { useState, useCallback } from "react";
+import { useState, useCallback, useMemo } from "react";
 import { ConversationList } from "@/components/chat/ConversationList";
 import { ChatInterface } from "@/components/chat/ChatInterface";
 import {
   useConversations,
-  useConversation,
+  useConversationMessages,
   useCreateConversation,
   useDeleteConversation,
   useSendMessage,
@@ -15,13 +15,19 @@ export function ChatPage() {
   const [selectedDatasetIds, setSelectedDatasetIds] = useState<string[]>([]);
 
   const { data: conversations = [] } = useConversations();
-  const { data: activeConv } = useConversation(activeConvId);
+  const messagePages = useConversationMessages(activeConvId);
   const { data: datasets = [] } = useDatasets();
 
   const createConv = useCreateConversation();
   const deleteConv = useDeleteConversation();
   const sendMsg = useSendMessage();
 
+  // Pages arrive newest first, each ordered oldest first
+  const messages = useMemo(
+    () => (messagePages.data?.pages ?? []).slice().reverse().flatMap((page) => page.messages),
+    [messagePages.data],
+  );
+
   const handleCreate = useCallback(async () => {
     const conv = await createConv.mutateAsync({ datasetIds: selectedDatasetIds });
     setActiveConvId(conv.id);
@@ -80,7 +86,10 @@ export function ChatPage() {
       {/* Chat area */}
       <div className="flex-1 flex flex-col min-w-0">
         <ChatInterface
-          messages={activeConv?.messages ?? []}
+          messages={messages}
+          hasOlder={messagePages.hasNextPage}
+          isLoadingOlder={messagePages.isFetchingNextPage}
+          onLoadOlder={() => messagePages.fetchNextPage()}
           datasets={datasets}
           selectedDatasetIds={selectedDatasetIds}
           onSelectDatasets={setSelectedDatasetIds}
@@ -7,9 +7,14 @@ export interface Dataset {
   duckdb_table: string;
   column_schema: Record<string, string>;
   row_count: number;
+  content_hash: string | null;
+  status: DatasetStatus;
+  error: string | null;
   uploaded_at: string;
 }
 
+export type DatasetStatus = "ingesting" | "ready" | "failed";
+
 export interface DatasetPreview {
   columns: string[];
   rows: Record<string, unknown>[];
@@ -34,17 +39,34 @@ export interface Message {
   result_data: ResultData | null;
   chart_config: ChartConfig | null;
   error: string | null;
+  usage?: TokenUsage | null;
   created_at: string;
 }
 
+export interface TokenUsage {
+  estimated_input_tokens: number;
+  input_tokens?: number; // provider-reported from here on
+  output_tokens?: number;
+  cache_read_tokens?: number;
+  cache_write_tokens?: number;
+}
+
 export interface ConversationDetail extends Conversation {
-  messages: Message[];
+  messages: Message[]; // the most recent page, oldest first
+  next_cursor: string | null;
+}
+
+export interface MessagePage {
+  messages: Message[]; // oldest first
+  next_cursor: string | null; // pass as `before` to fetch older messages
 }
 
 export interface ResultData {
   columns: string[];
   rows: Record<string, unknown>[];
   row_count: number;
+  truncated?: boolean; // rows is a preview; the full result is at /queries/messages/{id}/result
+  stored?: boolean;
 }
 
 export interface ChartConfig {
@@ -118,6 +140,21 @@ export interface Report {
   generated_at: string;
 }
 
+export type ReportJobStatus = "queued" | "running" | "completed" | "failed" | "cancelled";
+
+export interface ReportJob {
+  id: string;
+  schedule_id: string;
+  status: ReportJobStatus;
+  metrics_done: number;
+  metrics_total: number;
+  report_id: string | null;
+  error: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 // ── Alarms ──
 export type AlarmOperator = "gt" | "gte" | "lt" | "lte" | "eq";
 export type AlarmStatus = "ok" | "triggered" | "error";